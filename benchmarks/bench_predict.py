@@ -0,0 +1,102 @@
+"""
+Benchmark for ML batch prediction: one feature extraction and predict call
+per pair versus batched extraction with one predict / predict_proba per
+model per chunk, and single-row latency of the sklearn models versus their
+flat-array compiled form
+
+Usage:
+    python benchmarks/bench_predict.py [--pairs 500] [--chunk-sizes 100 1000 5000] [--rows 200]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import time
+from src.database.connection import get_db_session
+from src.database.models import MarketReadinessScores
+from src.ml_models.feature_extraction import extract_features_for_prediction
+from src.ml_models.predict import FEATURE_COLUMNS, load_models, predict_batch_ml
+from src.ml_models.compiled_trees import compile_model
+
+def bench_per_pair(session, student_ids: list, n_pairs: int) -> float:
+    """Per-pair loop: one-row feature DataFrame, regressor.predict and classifier.predict per pair."""
+    classifier, _, regressor, label_encoder = load_models()
+    pairs = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).filter(
+        MarketReadinessScores.student_id.in_(student_ids)
+    ).order_by(MarketReadinessScores.student_id, MarketReadinessScores.role_id).limit(n_pairs).all()
+
+    start = time.perf_counter()
+    for student_id, role_id in pairs:
+        X = extract_features_for_prediction(student_id, role_id, session).reindex(
+            columns=FEATURE_COLUMNS, fill_value=0
+        )
+        regressor.predict(X)
+        label_encoder.inverse_transform(classifier.predict(X))
+    elapsed = time.perf_counter() - start
+
+    print(f"per pair ({len(pairs)} pairs): {elapsed:.2f}s ({len(pairs) / elapsed:,.0f} pairs/sec)")
+    return len(pairs) / elapsed
+
+def bench_batched(session, chunk_size: int) -> float:
+    """predict_batch_ml over every stored pair with the given chunk size."""
+    start = time.perf_counter()
+    n_pairs = len(predict_batch_ml(session, chunk_size=chunk_size))
+    elapsed = time.perf_counter() - start
+
+    print(f"batched, chunk {chunk_size:>5} ({n_pairs} pairs): {elapsed:.2f}s ({n_pairs / elapsed:,.0f} pairs/sec)")
+    return n_pairs / elapsed
+
+def bench_single_row(session, n_rows: int) -> None:
+    """Per-row predict latency of each model, sklearn vs compiled."""
+    classifier, gb_classifier, regressor, _ = load_models()
+    pairs = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).limit(n_rows).all()
+    rows = [
+        extract_features_for_prediction(student_id, role_id, session).reindex(columns=FEATURE_COLUMNS, fill_value=0)
+        for student_id, role_id in pairs
+    ]
+
+    for name, model in (('Decision Tree', classifier), ('Gradient Boosting', gb_classifier),
+                        ('Random Forest', regressor)):
+        if model is None:
+            continue
+        timings = {}
+        for label, predictor in (('sklearn', model), ('compiled', compile_model(model))):
+            predictor.predict(rows[0])
+            start = time.perf_counter()
+            for X in rows:
+                predictor.predict(X)
+            timings[label] = (time.perf_counter() - start) / len(rows)
+        print(f"single row, {name:<17}: sklearn {timings['sklearn'] * 1000:.2f} ms, "
+              f"compiled {timings['compiled'] * 1000:.3f} ms ({timings['sklearn'] / timings['compiled']:.0f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-pair vs batched ML prediction')
+    parser.add_argument('--pairs', type=int, default=500, help='Pairs for the per-pair benchmark')
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='Rows per model call for the batched benchmark')
+    parser.add_argument('--rows', type=int, default=200, help='Rows for the single-row latency benchmark')
+    args = parser.parse_args()
+
+    classifier, _, regressor, _ = load_models()
+    if classifier is None or regressor is None:
+        print("ERROR: Models not trained. Please run train_models.py first.")
+        return
+
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(MarketReadinessScores.student_id).distinct().order_by(
+            MarketReadinessScores.student_id
+        ).limit(args.pairs)]
+        per_pair = bench_per_pair(session, student_ids, args.pairs)
+        for chunk_size in args.chunk_sizes:
+            batched = bench_batched(session, chunk_size)
+            print(f"  {batched / per_pair:.1f}x per-pair throughput")
+        bench_single_row(session, args.rows)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
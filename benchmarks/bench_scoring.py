@@ -0,0 +1,146 @@
+"""
+Micro-benchmarks for rule-based scoring: float64 fast path vs exact
+(Decimal) arithmetic, and dense vs sparse (CSR) matrices on a large
+synthetic role catalog
+
+Usage:
+    python benchmarks/bench_scoring.py [--pairs 500] [--tile 200] [--roles 500] [--students 10000]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import time
+import numpy as np
+from src.database.connection import get_db_session
+from src.database.models import Student, JobRole, StudentSkills
+from src.core.scoring import calculate_readiness_score, score_portfolio
+from src.core.role_cache import get_all_role_requirements
+from src.core.scoring_matrix import load_student_skill_matrix, load_role_skill_matrix, score_matrices
+from src.core.scoring_sparse import score_sparse
+
+def _best_of(fn, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_single_pair(session, n_pairs: int) -> None:
+    """Time calculate_readiness_score (rule-based) per pair, fast vs exact."""
+    students = [s for (s,) in session.query(Student.student_id).limit(n_pairs)]
+    roles = [r for (r,) in session.query(JobRole.role_id)]
+    pairs = [(s, r) for s in students for r in roles][:n_pairs]
+
+    def run(exact):
+        for student_id, role_id in pairs:
+            calculate_readiness_score(student_id, role_id, session, use_ml=False, exact=exact)
+
+    run(False)  # warm the role cache
+    fast = _best_of(lambda: run(False))
+    exact = _best_of(lambda: run(True))
+    print(f"calculate_readiness_score ({len(pairs)} pairs, includes one query per pair)")
+    print(f"  exact: {exact * 1e6 / len(pairs):8.1f} µs/pair")
+    print(f"  float: {fast * 1e6 / len(pairs):8.1f} µs/pair  ({exact / fast:.2f}x)")
+
+def bench_portfolio(session) -> None:
+    """Time the scoring arithmetic alone (skills prefetched), fast vs exact."""
+    portfolios = {}
+    for student_id, skill_id, score in session.query(
+        StudentSkills.student_id, StudentSkills.skill_id, StudentSkills.proficiency_score
+    ):
+        portfolios.setdefault(student_id, []).append((skill_id, score))
+    roles = [r for r in get_all_role_requirements(session).values() if r['skill_ids']]
+    n_pairs = len(portfolios) * len(roles)
+
+    def run(exact):
+        for skills in portfolios.values():
+            for requirements in roles:
+                score_portfolio(requirements, skills, exact=exact)
+
+    fast = _best_of(lambda: run(False))
+    exact = _best_of(lambda: run(True))
+    print(f"score_portfolio ({n_pairs} pairs, in memory)")
+    print(f"  exact: {exact * 1e6 / n_pairs:8.1f} µs/pair")
+    print(f"  float: {fast * 1e6 / n_pairs:8.1f} µs/pair  ({exact / fast:.2f}x)")
+
+def bench_matrix(session, tile: int) -> None:
+    """Time score_matrices on the cohort tiled `tile` times, fast vs exact."""
+    student_matrix = load_student_skill_matrix(session)
+    role_matrix = load_role_skill_matrix(session, student_matrix['skill_ids'])
+    n = len(student_matrix['student_ids']) * tile
+    tiled = {
+        'student_ids': np.arange(n),
+        'skill_ids': student_matrix['skill_ids'],
+        'proficiency': np.tile(student_matrix['proficiency'], (tile, 1)),
+        'has_skill': np.tile(student_matrix['has_skill'], (tile, 1))
+    }
+
+    fast = _best_of(lambda: score_matrices(tiled, role_matrix))
+    exact = _best_of(lambda: score_matrices(tiled, role_matrix, exact=True))
+    pairs = n * len(role_matrix['role_ids'])
+    print(f"score_matrices ({n:,} students × {len(role_matrix['role_ids'])} roles = {pairs:,} pairs)")
+    print(f"  exact: {exact:8.3f} s  ({pairs / exact:,.0f} pairs/sec)")
+    print(f"  float: {fast:8.3f} s  ({pairs / fast:,.0f} pairs/sec, {exact / fast:.2f}x)")
+
+def bench_sparse(n_students: int, n_roles: int, n_skills: int = 2000) -> None:
+    """Time dense (exact) vs CSR scoring on a synthetic catalog where most pairs share no skills."""
+    from scipy import sparse
+
+    rng = np.random.default_rng(0)
+    # ~15 skills per student and ~12 requirements per role
+    student_csr = {
+        'student_ids': np.arange(n_students),
+        'skill_ids': np.arange(n_skills),
+        'proficiency': sparse.random(n_students, n_skills, density=15 / n_skills, format='csr', random_state=1,
+                                     data_rvs=lambda k: rng.choice([25, 50, 75, 100], size=k)).astype(np.int64)
+    }
+    student_csr['has_skill'] = (student_csr['proficiency'] > 0).astype(np.int64)
+    required = sparse.random(n_roles, n_skills, density=12 / n_skills, format='csr', random_state=2)
+    role_csr = {
+        'role_ids': np.arange(n_roles),
+        'skill_ids': np.arange(n_skills),
+        'required': (required > 0).astype(np.int64),
+        'required_proficiency': required.copy(),
+        'importance_weight': required.copy()
+    }
+    role_csr['required_proficiency'].data = rng.choice([25, 50, 75, 100], size=required.nnz)
+    role_csr['importance_weight'].data = rng.integers(1, 101, size=required.nnz)
+    for key in ('required_proficiency', 'importance_weight'):
+        role_csr[key] = role_csr[key].astype(np.int64)
+
+    to_dense = lambda csr: {key: value.toarray() if sparse.issparse(value) else value for key, value in csr.items()}
+    student_dense, role_dense = to_dense(student_csr), to_dense(role_csr)
+    student_dense['has_skill'] = student_dense['has_skill'].astype(bool)
+    role_dense['required'] = role_dense['required'].astype(bool)
+
+    pairs = n_students * n_roles
+    dense = _best_of(lambda: score_matrices(student_dense, role_dense, exact=True), repeats=1)
+    sparse_time = _best_of(lambda: score_sparse(student_csr, role_csr), repeats=1)
+    print(f"score_sparse ({n_students:,} students × {n_roles} roles × {n_skills} skills = {pairs:,} pairs)")
+    print(f"  dense:  {dense:8.3f} s  ({pairs / dense:,.0f} pairs/sec)")
+    print(f"  sparse: {sparse_time:8.3f} s  ({pairs / sparse_time:,.0f} pairs/sec, {dense / sparse_time:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rule-based scoring engines')
+    parser.add_argument('--pairs', type=int, default=500, help='Pairs for the single-pair benchmark')
+    parser.add_argument('--tile', type=int, default=200, help='Times to tile the cohort for the matrix benchmark')
+    parser.add_argument('--roles', type=int, default=500, help='Roles in the synthetic sparse benchmark')
+    parser.add_argument('--students', type=int, default=10000, help='Students in the synthetic sparse benchmark')
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        bench_single_pair(session, args.pairs)
+        bench_portfolio(session)
+        bench_matrix(session, args.tile)
+        bench_sparse(args.students, args.roles)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Load test for the local prediction service: concurrent keep-alive clients
+send single (student, role) requests, with and without micro-batching
+
+Starts an in-process service per max batch size unless --port points at a
+running one.
+
+Usage:
+    python benchmarks/bench_service.py [--clients 32] [--requests 2000] [--batch-sizes 1 64]
+                                       [--max-wait-ms 5] [--port PORT]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from src.database.connection import get_db_session
+from src.database.models import MarketReadinessScores
+from src.ml_models.prediction_service import DEFAULT_HOST, PredictionService, send_request
+
+async def run_load(host: str, port: int, pairs: list, n_clients: int, n_requests: int) -> None:
+    """Spread n_requests over n_clients connections and print client-side and server-side latency."""
+    latencies = []
+
+    async def client(offset: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in range(offset, n_requests, n_clients):
+                student_id, role_id = pairs[i % len(pairs)]
+                start = time.perf_counter()
+                status, _ = await send_request(reader, writer, 'POST', '/predict',
+                                               {'student_id': student_id, 'role_id': role_id})
+                latencies.append(time.perf_counter() - start)
+                assert status == 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(n_clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await send_request(reader, writer, 'GET', '/stats')
+    writer.close()
+
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(f"  {n_requests} requests, {n_clients} clients: {elapsed:.2f}s ({n_requests / elapsed:,.0f} req/sec), "
+          f"client p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    print(f"  server: {stats['batches']} batches, avg size {stats['avg_batch_size']}, latency_ms {stats['latency_ms']}")
+
+async def bench_in_process(pairs: list, args) -> None:
+    for max_batch_size in args.batch_sizes:
+        print(f"max batch size {max_batch_size}, max wait {args.max_wait_ms} ms")
+        service = PredictionService(DEFAULT_HOST, 0, max_batch_size=max_batch_size, max_wait_ms=args.max_wait_ms)
+        await service.start()
+        try:
+            await run_load(service.host, service.port, pairs, args.clients, args.requests)
+        finally:
+            await service.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the local prediction service')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=2000, help='Total prediction requests')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64],
+                        help='Max batch sizes to compare (in-process service only)')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='Max batch wait (in-process service only)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Host of a running service')
+    parser.add_argument('--port', type=int, help='Port of a running service (default: start one in-process)')
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        pairs = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).all()
+    finally:
+        session.close()
+
+    if args.port:
+        asyncio.run(run_load(args.host, args.port, pairs, args.clients, args.requests))
+    else:
+        asyncio.run(bench_in_process(pairs, args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark for ML predictions: time to the first prediction in a
+fresh process when all four artifacts are loaded up front (load_models)
+versus lazily, loading only the models the requested outputs need
+
+Each scenario runs in its own interpreter, so every run pays the full model
+loading; the sklearn import, which any first unpickle would pay, is timed
+separately before it.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import subprocess
+import time
+import numpy as np
+
+# Scenario -> predict_readiness_ml outputs (None: load_models() first, then all outputs)
+SCENARIOS = {
+    'eager (load_models)': None,
+    'lazy, all outputs': ['score', 'level', 'gradient_boosting'],
+    'lazy, score + level': ['score', 'level'],
+    'lazy, score only': ['score'],
+    'lazy, level only': ['level']
+}
+
+def run_scenario(outputs) -> dict:
+    """Time the first prediction of this process; models must not be loaded yet."""
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    from src.ml_models.model_registry import model_load_stats
+    from src.ml_models.predict import PREDICTION_OUTPUTS, load_models, predict_readiness_ml
+
+    session = get_db_session()
+    try:
+        # Warm the database connection so only model work is timed
+        student_id, role_id = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).first()
+
+        # The first unpickle imports sklearn whatever the model; time it apart
+        start = time.perf_counter()
+        import sklearn.ensemble, sklearn.tree  # noqa: F401
+        import_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if outputs is None:
+            load_models()
+        result = predict_readiness_ml(student_id, role_id, session, outputs=outputs or PREDICTION_OUTPUTS)
+        elapsed = time.perf_counter() - start
+    finally:
+        session.close()
+
+    assert not result.get('error'), result.get('error')
+    return {
+        'sklearn_import_ms': import_seconds * 1000,
+        'first_prediction_ms': elapsed * 1000,
+        'loaded': {name: stats['load_seconds'] * 1000 for name, stats in model_load_stats().items() if stats['loaded']}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold-start time of ML predictions')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per scenario')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario is not None:
+        # Child process: run one scenario and report it as the last stdout line
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return
+
+    print(f"First prediction in a fresh process (median of {args.runs} runs)")
+    for label, outputs in SCENARIOS.items():
+        runs = []
+        for _ in range(args.runs):
+            completed = subprocess.run(
+                [sys.executable, __file__, '--scenario', json.dumps(outputs)],
+                capture_output=True, text=True, check=True, cwd=project_root
+            )
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        import_ms = np.median([run['sklearn_import_ms'] for run in runs])
+        first_ms = np.median([run['first_prediction_ms'] for run in runs])
+        loaded = ', '.join(f"{name} {np.median([run['loaded'][name] for run in runs]):.0f} ms"
+                           for name in runs[0]['loaded'])
+        print(f"  {label}: {first_ms:.0f} ms after a {import_ms:.0f} ms sklearn import (loaded {loaded})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Skill marginal-gain recommender
+For every student at once, computes how much acquiring (or upgrading to the
+required level) each skill of their role would raise the rule-based
+readiness score, and stores the top-k in skill_recommendations
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import time
+import numpy as np
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from src.database.models import *
+from src.core.scoring_matrix import (
+    REQUIRED_PROFICIENCY, CREDIT_SCALE, DEFAULT_BATCH_SIZE,
+    round_scores, load_skill_ids, load_student_skill_matrix, load_role_skill_matrix,
+    score_matrices, iter_student_id_batches
+)
+
+DEFAULT_TOP_K = 3
+
+_LEVEL_NAMES = {hundredths: level for level, hundredths in REQUIRED_PROFICIENCY.items()}
+
+def select_roles(student_matrix: Dict, role_matrix: Dict, target_role_ids: List[Optional[int]]) -> np.ndarray:
+    """
+    Pick the role to recommend for, per student.
+
+    The student's target role is used when it is one of the scored roles;
+    otherwise the role they currently score highest on (the closest to Ready).
+
+    Returns:
+        int64 array of row indices into role_matrix, one per student
+    """
+    n_roles = len(role_matrix['role_ids'])
+    role_index = {int(role_id): j for j, role_id in enumerate(role_matrix['role_ids'])}
+    targets = np.array([role_index.get(role_id, -1) for role_id in target_role_ids], dtype=np.int64)
+
+    if (targets < 0).any():
+        scores = score_matrices(student_matrix, role_matrix)['readiness_score'].reshape(-1, n_roles)
+        best = np.argmax(scores, axis=1)
+        targets = np.where(targets < 0, best, targets)
+
+    return targets
+
+def recommend_skills(student_matrix: Dict, role_matrix: Dict, role_rows: np.ndarray,
+                     top_k: int = DEFAULT_TOP_K) -> Dict:
+    """
+    Rank each student's required skills by the readiness score they would add.
+
+    Bringing skill k up to its required level adds
+    (CREDIT_SCALE - min(prof_k × factor_k, CREDIT_SCALE)) × weight_k
+    to the integer credit used by score_matrices(exact=True), so all
+    students × skills gains for a role are one array expression.
+
+    Args:
+        student_matrix: Output of load_student_skill_matrix
+        role_matrix: Output of load_role_skill_matrix
+        role_rows: Row index into role_matrix per student (see select_roles)
+        top_k: Recommendations per student (skills that add nothing are dropped)
+
+    Returns:
+        Dict of flat arrays, one entry per recommendation:
+        'student_id', 'role_id', 'skill_id', 'rank', 'action', 'current_proficiency'
+        (hundredths, -1 if the skill is not held), 'target_proficiency' (level name),
+        'current_score', 'projected_score', 'score_gain'
+    """
+    proficiency = student_matrix['proficiency']
+    has_skill = student_matrix['has_skill']
+    columns = {name: [] for name in (
+        'student_id', 'role_id', 'skill_id', 'rank', 'action', 'current_proficiency',
+        'target_proficiency', 'current_score', 'projected_score', 'score_gain'
+    )}
+
+    for j, role_id in enumerate(role_matrix['role_ids']):
+        rows = np.flatnonzero(role_rows == j)
+        cols = np.flatnonzero(role_matrix['required'][j])
+        if len(rows) == 0 or len(cols) == 0:
+            continue
+
+        required_prof = role_matrix['required_proficiency'][j, cols]
+        weights = role_matrix['importance_weight'][j, cols]
+        denominator = CREDIT_SCALE * weights.sum()
+
+        skill_credit = np.minimum(proficiency[np.ix_(rows, cols)] * (CREDIT_SCALE // required_prof), CREDIT_SCALE)
+        credit = skill_credit @ weights
+        gain_credit = (CREDIT_SCALE - skill_credit) * weights
+
+        # Largest gain first; equal gains keep requirement (skill_id) order
+        k = min(top_k, len(cols))
+        order = np.argsort(-gain_credit, axis=1, kind='stable')[:, :k]
+        top_gain = np.take_along_axis(gain_credit, order, axis=1)
+        keep = top_gain > 0
+        student_rows, ranks = np.nonzero(keep)
+        skill_cols = order[keep]
+
+        current = credit[student_rows] * 100 / denominator
+        projected = (credit[student_rows] + top_gain[keep]) * 100 / denominator
+        current_rounded = round_scores(current)
+        projected_rounded = round_scores(projected)
+
+        held = has_skill[rows[student_rows], cols[skill_cols]]
+        columns['student_id'].append(student_matrix['student_ids'][rows[student_rows]])
+        columns['role_id'].append(np.full(len(student_rows), role_id, dtype=np.int64))
+        columns['skill_id'].append(student_matrix['skill_ids'][cols[skill_cols]])
+        columns['rank'].append(ranks + 1)
+        columns['action'].append(np.where(held, 'upgrade', 'acquire'))
+        columns['current_proficiency'].append(np.where(held, proficiency[rows[student_rows], cols[skill_cols]], -1))
+        columns['target_proficiency'].append(np.array([_LEVEL_NAMES[int(p)] for p in required_prof])[skill_cols])
+        columns['current_score'].append(current_rounded)
+        columns['projected_score'].append(projected_rounded)
+        columns['score_gain'].append(np.round(projected_rounded - current_rounded, 2))
+
+    if not columns['student_id']:
+        return {name: np.array([]) for name in columns}
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
+
+def calculate_recommendations(session: Session, top_k: int = DEFAULT_TOP_K, student_ids: Optional[list] = None,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Recompute and store the top-k skill recommendations for every student.
+
+    Each batch of students replaces its rows in skill_recommendations and is
+    committed separately.
+
+    Args:
+        session: Database session
+        top_k: Recommendations per student
+        student_ids: List of student IDs (None = all students)
+        batch_size: Students per batch
+
+    Returns:
+        Number of recommendations written
+    """
+    start = time.perf_counter()
+    skill_ids = load_skill_ids(session)
+    role_matrix = load_role_skill_matrix(session, skill_ids)
+    role_ids_by_name = {name: role_id for role_id, name in session.query(JobRole.role_id, JobRole.role_name)}
+
+    print(f"Calculating top-{top_k} skill recommendations...")
+
+    total = 0
+    students = 0
+    for batch in iter_student_id_batches(session, batch_size, student_ids):
+        student_matrix = load_student_skill_matrix(session, batch, skill_ids=skill_ids)
+        target_names = dict(session.query(Student.student_id, Student.target_role).filter(
+            Student.student_id.in_(batch)
+        ))
+        target_role_ids = [
+            role_ids_by_name.get(target_names.get(int(student_id)))
+            for student_id in student_matrix['student_ids']
+        ]
+        role_rows = select_roles(student_matrix, role_matrix, target_role_ids)
+        recommendations = recommend_skills(student_matrix, role_matrix, role_rows, top_k=top_k)
+
+        session.query(SkillRecommendation).filter(
+            SkillRecommendation.student_id.in_(batch)
+        ).delete(synchronize_session=False)
+
+        rows = [
+            {
+                'student_id': int(student_id),
+                'role_id': int(role_id),
+                'skill_id': int(skill_id),
+                'rank': int(rank),
+                'action': str(action),
+                'current_proficiency': current / 100 if current >= 0 else None,
+                'target_proficiency': str(target),
+                'current_score': current_score,
+                'projected_score': projected_score,
+                'score_gain': score_gain
+            }
+            for student_id, role_id, skill_id, rank, action, current, target, current_score, projected_score, score_gain
+            in zip(*(recommendations[name].tolist() for name in (
+                'student_id', 'role_id', 'skill_id', 'rank', 'action', 'current_proficiency',
+                'target_proficiency', 'current_score', 'projected_score', 'score_gain'
+            )))
+        ]
+        if rows:
+            session.execute(insert(SkillRecommendation), rows)
+        session.commit()
+
+        total += len(rows)
+        students += len(student_matrix['student_ids'])
+
+    print(f"✓ {total} recommendations for {students} students in {time.perf_counter() - start:.2f}s")
+    return total
+
+def get_recommendations(session: Session, student_id: int) -> List[Dict]:
+    """
+    Stored recommendations for one student, best first.
+
+    Returns:
+        [{'rank', 'role_name', 'skill_name', 'category', 'action', 'current_proficiency',
+          'target_proficiency', 'current_score', 'projected_score', 'score_gain'}]
+    """
+    rows = session.query(
+        SkillRecommendation, JobRole.role_name, SkillsMaster.skill_name, SkillsMaster.category
+    ).join(
+        JobRole, SkillRecommendation.role_id == JobRole.role_id
+    ).join(
+        SkillsMaster, SkillRecommendation.skill_id == SkillsMaster.skill_id
+    ).filter(
+        SkillRecommendation.student_id == student_id
+    ).order_by(SkillRecommendation.rank).all()
+
+    return [
+        {
+            'rank': rec.rank,
+            'role_name': role_name,
+            'skill_name': skill_name,
+            'category': category,
+            'action': rec.action,
+            'current_proficiency': float(rec.current_proficiency) if rec.current_proficiency is not None else None,
+            'target_proficiency': rec.target_proficiency,
+            'current_score': float(rec.current_score),
+            'projected_score': float(rec.projected_score),
+            'score_gain': float(rec.score_gain)
+        }
+        for rec, role_name, skill_name, category in rows
+    ]
+
+def main():
+    import argparse
+    from src.database.connection import get_db_session
+
+    parser = argparse.ArgumentParser(description='Calculate top-k skill recommendations for every student')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f'Recommendations per student (default: {DEFAULT_TOP_K})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Students per committed batch (default: {DEFAULT_BATCH_SIZE})')
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        calculate_recommendations(session, top_k=args.top_k, batch_size=args.batch_size)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
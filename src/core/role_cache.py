@@ -0,0 +1,164 @@
+"""
+In-process cache of job role skill requirements
+Role requirements are identical for every student, so they are loaded once
+(one join over job_role_skills and skills_master) and shared by the
+rule-based scorer, ML metadata lookups and the dashboard
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import threading
+import time
+from decimal import Decimal
+from typing import Dict
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from src.database.models import JobRole, JobRoleSkills, SkillsMaster, Student, StudentSkills
+from src.core.scoring import PROFICIENCY_MAP
+
+# Edits made by other processes (e.g. psql or a pipeline subprocess) do not
+# fire ORM events here; entries older than this are reloaded.
+CACHE_TTL_SECONDS = 300
+
+_lock = threading.Lock()
+_cache = {
+    'roles': None,
+    'loaded_at': 0.0
+}
+
+def _empty_requirements(role_id: int) -> Dict:
+    return {
+        'role_id': role_id,
+        'skill_ids': (),
+        'skill_names': (),
+        'skill_categories': (),
+        'required_proficiency': (),
+        'importance_weight': (),
+        'total_weight': Decimal('0'),
+        'required_proficiency_array': np.zeros(0, dtype=np.float64),
+        'importance_weight_array': np.zeros(0, dtype=np.float64)
+    }
+
+def _load_all_requirements(session: Session) -> Dict[int, Dict]:
+    """Load requirements for every role with a single join."""
+    roles = {role_id: [] for (role_id,) in session.query(JobRole.role_id)}
+
+    rows = session.query(
+        JobRoleSkills.role_id,
+        JobRoleSkills.skill_id,
+        JobRoleSkills.required_proficiency,
+        JobRoleSkills.importance_weight,
+        SkillsMaster.skill_name,
+        SkillsMaster.category
+    ).join(
+        SkillsMaster, JobRoleSkills.skill_id == SkillsMaster.skill_id
+    ).order_by(JobRoleSkills.role_id, JobRoleSkills.id).all()
+
+    for row in rows:
+        roles.setdefault(row.role_id, []).append(row)
+
+    requirements = {}
+    for role_id, role_rows in roles.items():
+        entry = _empty_requirements(role_id)
+        if role_rows:
+            required_proficiency = tuple(PROFICIENCY_MAP[r.required_proficiency] for r in role_rows)
+            importance_weight = tuple(Decimal(str(r.importance_weight)) for r in role_rows)
+            entry.update({
+                'skill_ids': tuple(r.skill_id for r in role_rows),
+                'skill_names': tuple(r.skill_name for r in role_rows),
+                'skill_categories': tuple(r.category for r in role_rows),
+                'required_proficiency': required_proficiency,
+                'importance_weight': importance_weight,
+                'total_weight': sum(importance_weight, Decimal('0')),
+                'required_proficiency_array': np.array(required_proficiency, dtype=np.float64),
+                'importance_weight_array': np.array(importance_weight, dtype=np.float64)
+            })
+        requirements[role_id] = entry
+
+    return requirements
+
+def get_all_role_requirements(session: Session) -> Dict[int, Dict]:
+    """
+    Get cached requirements for every role, loading them on first use.
+
+    Returns:
+        {role_id: {
+            'role_id': int,
+            'skill_ids': tuple of int,
+            'skill_names': tuple of str,
+            'skill_categories': tuple of str,
+            'required_proficiency': tuple of Decimal (PROFICIENCY_MAP values),
+            'importance_weight': tuple of Decimal,
+            'total_weight': Decimal,
+            'required_proficiency_array': float64 array,
+            'importance_weight_array': float64 array
+        }}
+        Entries are shared and must not be modified.
+    """
+    with _lock:
+        roles = _cache['roles']
+        if roles is None or time.monotonic() - _cache['loaded_at'] > CACHE_TTL_SECONDS:
+            roles = _load_all_requirements(session)
+            _cache['roles'] = roles
+            _cache['loaded_at'] = time.monotonic()
+        return roles
+
+def get_role_requirements(session: Session, role_id: int) -> Dict:
+    """Get cached requirements for one role (empty requirements if the role is unknown)."""
+    roles = get_all_role_requirements(session)
+    if role_id not in roles:
+        return _empty_requirements(role_id)
+    return roles[role_id]
+
+def invalidate_role_cache() -> None:
+    """Drop cached requirements; the next lookup reloads them."""
+    with _lock:
+        _cache['roles'] = None
+        _cache['loaded_at'] = 0.0
+
+def _invalidate_simulation_cache() -> None:
+    # The what-if simulator caches role requirements and portfolios as matrices
+    from src.core.simulation import invalidate_simulation_cache
+    invalidate_simulation_cache()
+
+# Invalidate whenever job_roles / job_role_skills change through the ORM,
+# and the what-if simulation cache also when students / student_skills do.
+# The caches are dropped at flush and again at commit, so a reload that ran
+# in another session between the two cannot keep pre-commit rows.
+ROLE_MODELS = (JobRole, JobRoleSkills)
+PORTFOLIO_MODELS = (Student, StudentSkills)
+
+def _mark_change(session: Session, model) -> None:
+    if model in ROLE_MODELS:
+        invalidate_role_cache()
+    _invalidate_simulation_cache()
+    if session is not None:
+        key = 'role_cache_dirty' if model in ROLE_MODELS else 'simulation_cache_dirty'
+        session.info[key] = True
+
+def _on_change(mapper, connection, target):
+    _mark_change(object_session(target), mapper.class_)
+
+for _model in ROLE_MODELS + PORTFOLIO_MODELS:
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _on_change)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_change(orm_execute_state):
+    # Bulk inserts, query.update()/delete() and update()/delete() statements skip mapper events
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and orm_execute_state.bind_mapper is not None:
+        if orm_execute_state.bind_mapper.class_ in ROLE_MODELS + PORTFOLIO_MODELS:
+            _mark_change(orm_execute_state.session, orm_execute_state.bind_mapper.class_)
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    if session.info.pop('role_cache_dirty', False):
+        invalidate_role_cache()
+        _invalidate_simulation_cache()
+    if session.info.pop('simulation_cache_dirty', False):
+        _invalidate_simulation_cache()
@@ -0,0 +1,153 @@
+"""
+Columnar container for batches of readiness scores
+One NumPy array per column instead of one dict per student-role pair;
+readiness levels are stored as small integer codes and missing skills as a
+CSR pairs × skills matrix, so batch scoring, ML scoring and the dashboard can
+hand results along without building per-row Python objects
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Optional
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# level_code indexes this array (ordered from lowest to highest level)
+LEVEL_NAMES = np.array(['Entry-Level', 'Developing', 'Ready'])
+
+# Columns exposed by ScoreBatch[...] (the market_readiness_scores value columns)
+BATCH_COLUMNS = (
+    'student_id', 'role_id', 'readiness_score', 'readiness_level',
+    'matched_skills_count', 'required_skills_count', 'skill_gap_count'
+)
+
+# float64 scores are rounded to this many decimals before levels and the
+# final rounding are taken, which removes accumulated float error: a score
+# exactly on the 50 / 80 boundary or a .xx5 tie lands where the exact
+# (integer / Decimal) scorer puts it, while scores that are truly different
+# stay far more than 1e-9 apart
+FLOAT_SCORE_DECIMALS = 9
+
+def level_codes_from_scores(scores: np.ndarray) -> np.ndarray:
+    """Map unrounded scores to level codes (Ready >= 80, Developing >= 50)."""
+    scores = np.asarray(scores)
+    return ((scores >= 50).astype(np.int8) + (scores >= 80)).astype(np.int8)
+
+def level_codes_from_names(levels) -> np.ndarray:
+    """Map readiness level names (e.g. classifier output) to level codes."""
+    levels = np.asarray(levels)
+    codes = np.full(len(levels), -1, dtype=np.int8)
+    for code, name in enumerate(LEVEL_NAMES):
+        codes[levels == name] = code
+    if (codes < 0).any():
+        raise ValueError(f"Unknown readiness level: {levels[codes < 0][0]}")
+    return codes
+
+class ScoreBatch(Mapping):
+    """
+    Scores for a batch of student-role pairs, one array per column.
+
+    Reads like a dict of columns (batch['readiness_score'], iteration over
+    the column names), so it can be passed wherever the flat per-pair dicts
+    were used, e.g. upsert_scores. readiness_level is decoded from
+    level_code on access; every other column is returned as stored, without
+    a copy.
+
+    Attributes:
+        student_id, role_id: int64 arrays
+        readiness_score: float64 array, rounded to 2 decimals
+        level_code: int8 array indexing LEVEL_NAMES
+        matched_skills_count, required_skills_count, skill_gap_count: int64 arrays
+        missing_skills: Optional CSR matrix (pairs × skills) of the required
+                        skills each pair is missing; columns follow skill_ids
+        skill_ids: int64 array of missing_skills column IDs (None without missing_skills)
+    """
+
+    __slots__ = (
+        'student_id', 'role_id', 'readiness_score', 'level_code',
+        'matched_skills_count', 'required_skills_count', 'skill_gap_count',
+        'missing_skills', 'skill_ids'
+    )
+
+    def __init__(self, student_id, role_id, readiness_score, level_code, matched_skills_count,
+                 required_skills_count, missing_skills: Optional[sparse.csr_matrix] = None,
+                 skill_ids: Optional[np.ndarray] = None):
+        self.student_id = np.asarray(student_id, dtype=np.int64)
+        self.role_id = np.asarray(role_id, dtype=np.int64)
+        self.readiness_score = np.asarray(readiness_score, dtype=np.float64)
+        self.level_code = np.asarray(level_code, dtype=np.int8)
+        self.matched_skills_count = np.asarray(matched_skills_count, dtype=np.int64)
+        self.required_skills_count = np.asarray(required_skills_count, dtype=np.int64)
+        self.skill_gap_count = self.required_skills_count - self.matched_skills_count
+        self.missing_skills = missing_skills
+        self.skill_ids = skill_ids
+
+    @classmethod
+    def empty(cls) -> 'ScoreBatch':
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def concatenate(cls, batches: Iterable['ScoreBatch']) -> 'ScoreBatch':
+        """Join batches end to end (missing skills are kept only if every batch has them)."""
+        batches = list(batches)
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        missing_skills = None
+        skill_ids = batches[0].skill_ids
+        if all(batch.missing_skills is not None for batch in batches):
+            missing_skills = sparse.vstack([batch.missing_skills for batch in batches], format='csr')
+
+        return cls(
+            *(np.concatenate([getattr(batch, name) for batch in batches]) for name in (
+                'student_id', 'role_id', 'readiness_score', 'level_code',
+                'matched_skills_count', 'required_skills_count'
+            )),
+            missing_skills=missing_skills,
+            skill_ids=skill_ids if missing_skills is not None else None
+        )
+
+    @property
+    def readiness_level(self) -> np.ndarray:
+        return LEVEL_NAMES[self.level_code]
+
+    @property
+    def n_pairs(self) -> int:
+        return len(self.student_id)
+
+    @property
+    def n_students(self) -> int:
+        """Distinct students in the batch."""
+        return len(np.unique(self.student_id))
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in BATCH_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(BATCH_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(BATCH_COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"ScoreBatch({self.n_pairs} pairs)"
+
+    def missing_skill_ids(self, i: int) -> np.ndarray:
+        """Skill IDs pair i is missing (requires missing_skills)."""
+        if self.missing_skills is None:
+            raise ValueError("Batch was scored without missing skills")
+        start, end = self.missing_skills.indptr[i], self.missing_skills.indptr[i + 1]
+        return self.skill_ids[self.missing_skills.indices[start:end]]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per pair with the BATCH_COLUMNS columns."""
+        return pd.DataFrame({name: self[name] for name in BATCH_COLUMNS}, copy=False)
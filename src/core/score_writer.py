@@ -0,0 +1,115 @@
+"""
+Bulk writer for market_readiness_scores
+Upserts score rows in chunks with INSERT ... ON CONFLICT DO UPDATE,
+skipping rows whose stored values are already identical
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import time
+from typing import Dict, Mapping
+from sqlalchemy import func, or_, exists, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from src.database.models import MarketReadinessScores, Student, StudentSkills
+
+SCORE_COLUMNS = [
+    'student_id', 'role_id', 'readiness_score', 'readiness_level',
+    'matched_skills_count', 'required_skills_count', 'skill_gap_count'
+]
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Students per batch when scores are streamed and written batch by batch
+DEFAULT_BATCH_SIZE = 1000
+
+def _column_to_list(values) -> list:
+    """Convert a NumPy array / pandas Series / list column to plain Python values."""
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+def upsert_scores(session: Session, scores: Mapping, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    Upsert score rows into market_readiness_scores against unique_student_role.
+
+    Rows are sent in chunks of `chunk_size`; each chunk is a single
+    multi-row INSERT ... ON CONFLICT DO UPDATE. The update only fires when
+    the score, level or a count differs from the stored row, or when the row
+    is stale (the student or one of their skills is newer than
+    calculated_at, see find_dirty_students). Other pairs produce no new row
+    version (no WAL, index churn or dead tuples) and keep their
+    calculated_at. The caller owns the transaction and commits.
+
+    Args:
+        session: Database session
+        scores: ScoreBatch, or any mapping of equal-length columns keyed
+                by SCORE_COLUMNS
+        chunk_size: Rows per statement
+
+    Returns:
+        {'rows': int, 'inserted': int, 'updated': int, 'unchanged': int,
+         'seconds': float, 'rows_per_sec': float}
+    """
+    columns = {name: _column_to_list(scores[name]) for name in SCORE_COLUMNS}
+    total = len(columns['student_id'])
+
+    stmt = insert(MarketReadinessScores)
+    value_columns = SCORE_COLUMNS[2:]
+    # The conflicting row, referenced by name: SQLAlchemy does not correlate
+    # subqueries in ON CONFLICT ... WHERE with the INSERT target
+    stored_student_id = literal_column(f'{MarketReadinessScores.__tablename__}.student_id')
+    stored_calculated_at = literal_column(f'{MarketReadinessScores.__tablename__}.calculated_at')
+    stmt = stmt.on_conflict_do_update(
+        constraint='unique_student_role',
+        set_={
+            **{name: stmt.excluded[name] for name in value_columns},
+            'calculated_at': func.now()
+        },
+        where=or_(
+            *(getattr(MarketReadinessScores, name).is_distinct_from(stmt.excluded[name])
+              for name in value_columns),
+            # Refresh calculated_at so incremental runs stop seeing the student as dirty
+            exists().where(
+                Student.student_id == stored_student_id,
+                Student.created_at > stored_calculated_at
+            ),
+            exists().where(
+                StudentSkills.student_id == stored_student_id,
+                StudentSkills.created_at > stored_calculated_at
+            )
+        )
+    ).returning(
+        # xmax is 0 for a freshly inserted row; skipped conflicts return nothing
+        literal_column('xmax = 0').label('inserted')
+    )
+
+    inserted = 0
+    updated = 0
+    start = time.perf_counter()
+    for offset in range(0, total, chunk_size):
+        rows = [
+            dict(zip(SCORE_COLUMNS, values))
+            for values in zip(*(columns[name][offset:offset + chunk_size] for name in SCORE_COLUMNS))
+        ]
+        for (was_inserted,) in session.execute(stmt, rows):
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
+    elapsed = time.perf_counter() - start
+
+    unchanged = total - inserted - updated
+    rows_per_sec = total / elapsed if elapsed > 0 else 0.0
+    print(f"  Upserted {total} scores in {elapsed:.2f}s ({rows_per_sec:,.0f} rows/sec): "
+          f"{inserted} inserted, {updated} updated, {unchanged} unchanged")
+
+    return {
+        'rows': total,
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': unchanged,
+        'seconds': elapsed,
+        'rows_per_sec': rows_per_sec
+    }
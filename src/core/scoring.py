@@ -6,9 +6,14 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from src.database.models import *
+from src.core.score_writer import upsert_scores, DEFAULT_CHUNK_SIZE, DEFAULT_BATCH_SIZE
+from src.core.score_batch import FLOAT_SCORE_DECIMALS
+
+# Rule-based scoring implementations accepted by calculate_all_scores
+ENGINES = ('python', 'sparse', 'sql')
 
 PROFICIENCY_MAP = {
     'Beginner': Decimal('0.25'),
@@ -17,7 +22,8 @@ PROFICIENCY_MAP = {
     'Expert': Decimal('1.00')
 }
 
-def calculate_readiness_score(student_id: int, role_id: int, session: Session, use_ml: bool = True) -> Dict:
+def calculate_readiness_score(student_id: int, role_id: int, session: Session, use_ml: bool = True,
+                              exact: bool = False) -> Dict:
     """
     Calculate market readiness score using ML models (default) or rule-based algorithm.
     
@@ -30,6 +36,9 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
     Rule-Based Algorithm (fallback):
     Score = (Σ matched_skill_proficiency × importance_weight) / Σ required_weights × 100
     
+    The rule-based score is computed in float64 by default; exact=True uses
+    Decimal arithmetic instead. Both are rounded to 2 decimals.
+    
     Readiness Levels:
     - 80-100% = Ready
     - 50-79% = Developing
@@ -40,6 +49,7 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
         role_id: Role ID
         session: Database session
         use_ml: If True, use ML models (default). If False, use rule-based.
+        exact: If True, use Decimal arithmetic for the rule-based score.
     
     Returns:
         {
@@ -56,16 +66,17 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
     if use_ml:
         try:
             from src.ml_models.predict import predict_readiness_ml
-            ml_result = predict_readiness_ml(student_id, role_id, session)
+            ml_result = predict_readiness_ml(student_id, role_id, session, outputs=('score', 'level'))
             
             if not ml_result.get('error'):
                 # Get metadata for ML result
-                required_skills = session.query(JobRoleSkills).filter_by(role_id=role_id).all()
-                required_count = len(required_skills)
+                from src.core.role_cache import get_role_requirements
+                required_skill_ids = get_role_requirements(session, role_id)['skill_ids']
+                required_count = len(required_skill_ids)
                 
                 student_skills = session.query(StudentSkills).filter_by(student_id=student_id).all()
                 student_skill_ids = {s.skill_id for s in student_skills}
-                matched_count = sum(1 for req in required_skills if req.skill_id in student_skill_ids)
+                matched_count = sum(1 for skill_id in required_skill_ids if skill_id in student_skill_ids)
                 
                 return {
                     'readiness_score': ml_result['readiness_score_ml'],
@@ -79,10 +90,11 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
         except Exception as e:
             # Fall through to rule-based if ML fails
             pass
-    # Get required skills for role
-    required_skills = session.query(JobRoleSkills).filter_by(role_id=role_id).all()
+    # Get cached requirements for role
+    from src.core.role_cache import get_role_requirements
+    requirements = get_role_requirements(session, role_id)
     
-    if not required_skills:
+    if not requirements['skill_ids']:
         return {
             'readiness_score': 0,
             'readiness_level': 'Entry-Level',
@@ -92,46 +104,80 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
             'missing_skills': []
         }
     
-    required_count = len(required_skills)
-    total_weight = sum(Decimal(str(skill.importance_weight)) for skill in required_skills)
-    
     # Get student's skills
-    student_skills = session.query(StudentSkills).filter_by(student_id=student_id).all()
-    student_skill_map = {
-        skill.skill_id: Decimal(str(skill.proficiency_score)) 
-        for skill in student_skills
-    }
+    student_skills = session.query(
+        StudentSkills.skill_id,
+        StudentSkills.proficiency_score
+    ).filter_by(student_id=student_id).all()
+    
+    return score_portfolio(requirements, student_skills, exact=exact)
+
+def score_portfolio(requirements: Dict, student_skills, exact: bool = False) -> Dict:
+    """
+    Rule-based score of one skill portfolio against one role's requirements.
+    
+    Args:
+        requirements: Role entry from src.core.role_cache.get_role_requirements
+        student_skills: Iterable of (skill_id, proficiency_score) pairs
+        exact: If True, use Decimal arithmetic instead of float64
+    
+    Returns:
+        Same dict as the rule-based calculate_readiness_score
+    """
+    required_count = len(requirements['skill_ids'])
+    
+    # Proficiencies are converted only for skills the role requires
+    student_skill_map = dict(student_skills)
+    
+    if exact:
+        # Decimal arithmetic throughout
+        to_number = lambda value: Decimal(str(value))
+        required_profs = requirements['required_proficiency']
+        importances = requirements['importance_weight']
+        total_weight = requirements['total_weight']
+        matched_score = Decimal('0')
+        full_credit = Decimal('1.0')
+    else:
+        # float64 fast path
+        to_number = float
+        required_profs = requirements['required_proficiency_array'].tolist()
+        importances = requirements['importance_weight_array'].tolist()
+        total_weight = float(requirements['total_weight'])
+        matched_score = 0.0
+        full_credit = 1.0
     
     # Calculate weighted score
-    matched_score = Decimal('0')
     matched_count = 0
     missing_skills = []
     
-    for req_skill in required_skills:
-        skill_id = req_skill.skill_id
-        required_prof = PROFICIENCY_MAP[req_skill.required_proficiency]
-        importance = Decimal(str(req_skill.importance_weight))
-        
+    for skill_id, skill_name, required_prof, importance in zip(
+        requirements['skill_ids'],
+        requirements['skill_names'],
+        required_profs,
+        importances
+    ):
         if skill_id in student_skill_map:
             # Student has this skill
-            student_prof = student_skill_map[skill_id]
+            student_prof = to_number(student_skill_map[skill_id])
             
             # Partial credit if proficiency is lower than required
-            proficiency_factor = min(student_prof / required_prof, Decimal('1.0'))
+            proficiency_factor = min(student_prof / required_prof, full_credit)
             matched_score += proficiency_factor * importance
             matched_count += 1
         else:
             # Student missing this skill
-            skill = session.query(SkillsMaster).filter_by(skill_id=skill_id).first()
             missing_skills.append({
                 'skill_id': skill_id,
-                'skill_name': skill.skill_name if skill else f'Skill {skill_id}',
+                'skill_name': skill_name,
                 'importance_weight': float(importance)
             })
     
     # Calculate final percentage
     if total_weight > 0:
         readiness_score = float((matched_score / total_weight) * 100)
+        if not exact:
+            # Drop accumulated float error before the level and rounding (see FLOAT_SCORE_DECIMALS)
+            readiness_score = round(readiness_score, FLOAT_SCORE_DECIMALS)
     else:
         readiness_score = 0.0
     
@@ -153,82 +199,277 @@ def calculate_readiness_score(student_id: int, role_id: int, session: Session, u
         'model_used': 'Rule-based (weighted skill matching)'
     }
 
-def calculate_all_scores(session: Session, use_ml: bool = True) -> None:
+def find_dirty_students(session: Session) -> List[int]:
+    """
+    Find students whose scores are stale.
+    
+    A student is dirty when any of their student_skills rows, or the student
+    row itself, was created after their oldest market_readiness_scores.calculated_at,
+    or when they are missing a score for any role.
+    
+    Deleted skills, in-place updates of an existing student_skills row
+    (proficiency_level / proficiency_score keep its created_at) and edits
+    to job roles are not tracked by timestamps; run a full rescore after those.
+    
+    Returns:
+        Sorted list of student IDs
+    """
+    from sqlalchemy import func, or_
+    
+    last_scored = session.query(
+        MarketReadinessScores.student_id,
+        func.min(MarketReadinessScores.calculated_at).label('calculated_at'),
+        func.count(MarketReadinessScores.id).label('scored_roles')
+    ).group_by(MarketReadinessScores.student_id).subquery()
+    
+    last_skill_change = session.query(
+        StudentSkills.student_id,
+        func.max(StudentSkills.created_at).label('changed_at')
+    ).group_by(StudentSkills.student_id).subquery()
+    
+    role_count = session.query(JobRole).count()
+    
+    dirty = session.query(Student.student_id).outerjoin(
+        last_scored, Student.student_id == last_scored.c.student_id
+    ).outerjoin(
+        last_skill_change, Student.student_id == last_skill_change.c.student_id
+    ).filter(
+        or_(
+            last_scored.c.calculated_at.is_(None),
+            last_scored.c.scored_roles < role_count,
+            Student.created_at > last_scored.c.calculated_at,
+            last_skill_change.c.changed_at > last_scored.c.calculated_at
+        )
+    ).order_by(Student.student_id)
+    
+    return [student_id for (student_id,) in dirty]
+
+def calculate_all_scores(session: Session, use_ml: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         incremental: bool = False, exact: bool = False,
+                         student_ids: Optional[list] = None, workers: int = 1,
+                         batch_size: int = DEFAULT_BATCH_SIZE, resume: bool = False,
+                         engine: str = 'python', refresh_recommendations: bool = False) -> int:
     """
     Calculate readiness scores for ALL student-role combinations using ML (default) or rule-based.
     Updates market_readiness_scores table.
     
     For 500 students × 5 roles = 2500 score records
     
+    Each batch of students is committed separately. Whole-cohort and
+    incremental runs also record a checkpoint in scoring_runs with every
+    batch, so an interrupted run can be continued with resume=True.
+    With refresh_recommendations, the stored skill recommendations of the
+    scored students are recomputed afterwards (rule-based gains, whichever
+    model wrote the scores); a failure there is reported without undoing
+    the committed scores.
+    
     Args:
         session: Database session
         use_ml: If True (default), use ML models. If False, use rule-based algorithm.
+        chunk_size: Rows per bulk upsert statement
+        incremental: If True, only rescore students returned by find_dirty_students
+        exact: If True, rule-based scores use exact arithmetic instead of float64
+        student_ids: List of student IDs to score (None = all students)
+        workers: Number of worker processes; > 1 shards students across a process pool
+        batch_size: Students scored (and committed) per batch
+        resume: If True, continue the latest unfinished run of the same kind from its checkpoint
+        engine: Rule-based implementation: 'python' (vectorized NumPy, batched),
+                'sparse' (CSR matrices, for large role catalogs) or
+                'sql' (one set-based statement inside PostgreSQL)
+        refresh_recommendations: If True, recompute the scored students' skill recommendations
+    
+    Returns:
+        Number of score records written
+    
+    Raises:
+        ValueError: Unknown engine
     """
-    from sqlalchemy import func
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown scoring engine {engine!r}; expected one of {ENGINES}")
+    
+    # Runs over an explicit student subset (shards, job ranges) are not checkpointed
+    run_scope = None if student_ids is not None else ('incremental' if incremental else 'all')
+    
+    if incremental:
+        dirty = find_dirty_students(session)
+        if student_ids is not None:
+            dirty = sorted(set(dirty) & set(student_ids))
+        student_ids = dirty
+        print(f"Incremental run: {len(student_ids)} students changed since last scoring")
+        if not student_ids:
+            print("✓ All readiness scores are up to date!")
+            return 0
+    
+    if workers > 1:
+        from src.core.scoring_parallel import calculate_all_scores_parallel
+        if resume:
+            print("⚠ --resume is not supported with --workers; scoring all students")
+        if student_ids is None:
+            student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id)]
+        total = calculate_all_scores_parallel(
+            student_ids, workers, use_ml=use_ml, chunk_size=chunk_size, exact=exact,
+            batch_size=batch_size, engine=engine
+        )
+        # Once for the whole run, not per shard
+        if refresh_recommendations:
+            _refresh_recommendations(session, student_ids, batch_size)
+        return total
     
     # If ML requested, use ML batch prediction
     if use_ml:
         try:
             from src.core.scoring_ml import calculate_all_scores_ml
-            calculate_all_scores_ml(session, update_database=True)
-            return
+            total = calculate_all_scores_ml(session, update_database=True, chunk_size=chunk_size,
+                                            student_ids=student_ids, batch_size=batch_size,
+                                            resume=resume, run_scope=run_scope)
         except Exception as e:
             print(f"ML scoring failed, falling back to rule-based: {e}")
+            session.rollback()
             # Fall through to rule-based
+        else:
+            if refresh_recommendations:
+                _refresh_recommendations(session, student_ids, batch_size)
+            return total
     
-    # Rule-based calculation
-    students = session.query(Student).all()
-    roles = session.query(JobRole).all()
+    if engine == 'sql':
+        total = _calculate_all_scores_sql(session, student_ids, run_scope)
+        if refresh_recommendations:
+            _refresh_recommendations(session, student_ids, batch_size)
+        return total
     
-    print(f"Calculating scores for {len(students)} students × {len(roles)} roles...")
+    # Rule-based calculation (vectorized, streamed in batches of students)
+    from src.core.scoring_runs import start_run, checkpoint_run, finish_run, fail_run
+    if engine == 'sparse':
+        # Sparse scoring always uses exact integer arithmetic
+        from src.core.scoring_sparse import iter_readiness_scores_sparse as iter_batches
+    else:
+        from functools import partial
+        from src.core.scoring_matrix import iter_readiness_scores
+        iter_batches = partial(iter_readiness_scores, exact=exact)
     
-    count = 0
-    for student in students:
-        for role in roles:
-            result = calculate_readiness_score(student.student_id, role.role_id, session, use_ml=False)
-            
-            # Check if record exists (upsert logic)
-            existing = session.query(MarketReadinessScores).filter_by(
-                student_id=student.student_id,
-                role_id=role.role_id
-            ).first()
-            
-            if existing:
-                # Update existing record
-                existing.readiness_score = result['readiness_score']
-                existing.readiness_level = result['readiness_level']
-                existing.matched_skills_count = result['matched_skills_count']
-                existing.required_skills_count = result['required_skills_count']
-                existing.skill_gap_count = result['skill_gap_count']
-            else:
-                # Insert new record
-                score_record = MarketReadinessScores(
-                    student_id=student.student_id,
-                    role_id=role.role_id,
-                    readiness_score=result['readiness_score'],
-                    readiness_level=result['readiness_level'],
-                    matched_skills_count=result['matched_skills_count'],
-                    required_skills_count=result['required_skills_count'],
-                    skill_gap_count=result['skill_gap_count']
-                )
-                session.add(score_record)
-            
-            count += 1
-            
-            if count % 100 == 0:
-                print(f"  Processed {count} scores...")
+    run = start_run(session, 'rule-based', run_scope, resume=resume) if run_scope else None
+    after_student_id = run.last_student_id if run else None
+    
+    students_query = session.query(Student)
+    if student_ids is not None:
+        students_query = students_query.filter(Student.student_id.in_(student_ids))
+    if after_student_id is not None:
+        students_query = students_query.filter(Student.student_id > after_student_id)
+    print(f"Calculating scores for {students_query.count()} students × {session.query(JobRole).count()} roles...")
+    
+    total = 0
+    changed = 0
+    try:
+        for scores in iter_batches(session, batch_size=batch_size, student_ids=student_ids,
+                                   after_student_id=after_student_id):
+            if scores.n_pairs == 0:
+                continue
+            stats = upsert_scores(session, scores, chunk_size=chunk_size)
+            batch_changed = stats['inserted'] + stats['updated']
+            checkpoint_run(session, run, int(scores.student_id[-1]), scores.n_students,
+                           stats['rows'], batch_changed)
+            total += stats['rows']
+            changed += batch_changed
+    except Exception as e:
+        fail_run(session, run, e)
+        raise
     
-    session.commit()
-    print(f"✓ All {count} readiness scores calculated!")
+    finish_run(session, run)
+    print(f"✓ All {total} readiness scores calculated! ({changed} changed, {total - changed} unchanged)")
+    if refresh_recommendations:
+        _refresh_recommendations(session, student_ids, batch_size)
+    return total
 
-if __name__ == "__main__":
-    import sys
-    from pathlib import Path
-    # Add project root to Python path
-    project_root = Path(__file__).parent.parent.parent
-    sys.path.insert(0, str(project_root))
+def _refresh_recommendations(session: Session, student_ids: Optional[list], batch_size: int) -> bool:
+    """
+    Recompute the stored skill recommendations of the students just scored (None = all).
     
+    The scores are already committed, so a failure is reported instead of raised.
+    
+    Returns:
+        False if the recommendations could not be refreshed
+    """
+    from src.core.recommendations import calculate_recommendations
+    try:
+        calculate_recommendations(session, student_ids=student_ids, batch_size=batch_size)
+    except Exception as e:
+        session.rollback()
+        print(f"⚠ Scores saved, but skill recommendations were not refreshed: {e}")
+        return False
+    return True
+
+def _calculate_all_scores_sql(session: Session, student_ids: Optional[list], run_scope: Optional[str]) -> int:
+    """
+    Rule-based scoring as one INSERT ... ON CONFLICT inside PostgreSQL.
+    
+    The statement is atomic, so the run is checkpointed once at the end;
+    an interrupted run has written nothing and is simply rerun.
+    """
+    from sqlalchemy import func
+    from src.core.scoring_sql import calculate_scores_sql
+    from src.core.scoring_runs import start_run, checkpoint_run, finish_run, fail_run
+    
+    run = start_run(session, 'rule-based', run_scope) if run_scope else None
+    
+    print("Calculating scores in PostgreSQL...")
+    try:
+        stats = calculate_scores_sql(session, student_ids=student_ids)
+        students_query = session.query(func.count(Student.student_id), func.max(Student.student_id))
+        if student_ids is not None:
+            students_query = students_query.filter(Student.student_id.in_(student_ids))
+        students, last_student_id = students_query.one()
+        changed = stats['inserted'] + stats['updated']
+        checkpoint_run(session, run, last_student_id, students, stats['rows'], changed)
+    except Exception as e:
+        fail_run(session, run, e)
+        raise
+    
+    finish_run(session, run)
+    print(f"✓ All {stats['rows']} readiness scores calculated! ({changed} changed, {stats['rows'] - changed} unchanged)")
+    return stats['rows']
+
+def main():
+    import argparse
     from src.database.connection import get_db_session
+    
+    parser = argparse.ArgumentParser(description='Calculate market readiness scores')
+    parser.add_argument('--rule-based', action='store_true', help='Use the rule-based algorithm instead of ML models')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rescore students whose skills or records changed since their last score')
+    parser.add_argument('--exact', action='store_true',
+                        help='Use exact (Decimal-equivalent) arithmetic for rule-based scores')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes; students are split into shards scored in parallel (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Rows per bulk upsert statement (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Students scored and committed per batch (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--engine', choices=ENGINES, default='python',
+                        help='Rule-based engine: vectorized Python, sparse CSR matrices (large role catalogs) '
+                             'or a single SQL statement (default: python)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the latest interrupted run from its checkpoint instead of starting over')
+    parser.add_argument('--refresh-recommendations', action='store_true',
+                        help='Also recompute the skill recommendations of the students scored')
+    
+    args = parser.parse_args()
+    
     session = get_db_session()
-    calculate_all_scores(session)
-    session.close()
+    try:
+        calculate_all_scores(
+            session,
+            use_ml=not args.rule_based,
+            chunk_size=args.chunk_size,
+            incremental=args.incremental,
+            exact=args.exact,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            resume=args.resume,
+            engine=args.engine,
+            refresh_recommendations=args.refresh_recommendations
+        )
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Distributed cohort scoring through a PostgreSQL job table
+Student-id ranges are enqueued as scoring_jobs rows; workers on any machine
+claim them with SELECT ... FOR UPDATE SKIP LOCKED, score the range with
+calculate_all_scores and mark it done. A claim holds a lease, renewed after
+every batch of students, so a range whose worker crashed is picked up again
+once the lease expires.
+
+Usage:
+    python src/core/scoring_jobs.py enqueue [--range-size 1000]
+    python src/core/scoring_jobs.py work [--batch BATCH_ID] [--worker-id NAME] [--rule-based] [--engine ENGINE]
+    python src/core/scoring_jobs.py status [--batch BATCH_ID]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Dict, Optional
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+from src.database.models import Student, ScoringJob
+from src.core.score_writer import DEFAULT_CHUNK_SIZE, DEFAULT_BATCH_SIZE
+from src.core.scoring import ENGINES
+
+DEFAULT_RANGE_SIZE = 1000
+DEFAULT_LEASE_SECONDS = 300
+# A range that fails (or whose worker dies) this many times is marked failed
+MAX_ATTEMPTS = 3
+
+def default_worker_id() -> str:
+    """hostname:pid, unique across the machines sharing the database."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def latest_batch_id(session: Session) -> Optional[str]:
+    """Batch ID of the most recently enqueued job (None if there are no jobs)."""
+    job = session.query(ScoringJob.batch_id).order_by(ScoringJob.job_id.desc()).first()
+    return job.batch_id if job else None
+
+def enqueue_scoring_jobs(session: Session, range_size: int = DEFAULT_RANGE_SIZE,
+                         batch_id: Optional[str] = None) -> Dict:
+    """
+    Split the current students into contiguous student-id ranges and enqueue one job per range.
+
+    Ranges are cut by position in the student_id order, so each holds at
+    most range_size existing students regardless of gaps in the IDs.
+
+    Args:
+        session: Database session
+        range_size: Students per job
+        batch_id: Identifier shared by this run's jobs (default: new UUID)
+
+    Returns:
+        {'batch_id': str, 'jobs': int, 'students': int}
+    """
+    batch_id = batch_id or str(uuid.uuid4())
+    student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id)]
+
+    jobs = [
+        ScoringJob(
+            batch_id=batch_id,
+            start_student_id=student_ids[i],
+            end_student_id=student_ids[min(i + range_size, len(student_ids)) - 1],
+            status='pending',
+            attempts=0
+        )
+        for i in range(0, len(student_ids), range_size)
+    ]
+    session.add_all(jobs)
+    session.commit()
+
+    print(f"✓ Enqueued {len(jobs)} scoring jobs ({len(student_ids)} students) in batch {batch_id}")
+    return {'batch_id': batch_id, 'jobs': len(jobs), 'students': len(student_ids)}
+
+def claim_job(session: Session, batch_id: str, worker_id: str,
+              lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[ScoringJob]:
+    """
+    Claim the next pending (or lease-expired) job in a batch.
+
+    The row lock is taken with SKIP LOCKED, so concurrent workers never wait
+    on or claim the same job. Lease times use the database clock, so workers
+    on different machines agree on expiry.
+
+    Returns:
+        The claimed ScoringJob (committed as 'running'), or None if no job is available
+    """
+    now = func.now()
+    claimable = or_(
+        ScoringJob.status == 'pending',
+        and_(ScoringJob.status == 'running', ScoringJob.lease_expires_at < now)
+    )
+    job = session.query(ScoringJob).filter(
+        ScoringJob.batch_id == batch_id,
+        ScoringJob.attempts < MAX_ATTEMPTS,
+        claimable
+    ).order_by(ScoringJob.job_id).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        session.rollback()
+        return None
+
+    job.status = 'running'
+    job.worker_id = worker_id
+    job.attempts += 1
+    job.started_at = now
+    job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+    job.error = None
+    session.commit()
+    return job
+
+def _held_job(session: Session, job_id: int, worker_id: str, attempt: int):
+    # The claim made by this worker on this attempt, while it is still running
+    return session.query(ScoringJob).filter(
+        ScoringJob.job_id == job_id,
+        ScoringJob.worker_id == worker_id,
+        ScoringJob.attempts == attempt,
+        ScoringJob.status == 'running'
+    )
+
+def renew_lease(session: Session, job_id: int, worker_id: str, attempt: int,
+                lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+    """
+    Extend a claimed job's lease to lease_seconds from now (database clock).
+
+    Returns:
+        False if this worker no longer holds the job (the lease expired and
+        the range was re-claimed)
+    """
+    updated = _held_job(session, job_id, worker_id, attempt).update(
+        {'lease_expires_at': func.now() + timedelta(seconds=lease_seconds)}, synchronize_session=False
+    )
+    session.commit()
+    return updated == 1
+
+def _finish_job(session: Session, job_id: int, worker_id: str, attempt: int, values: Dict) -> bool:
+    """
+    Update a claimed job if this worker still holds it from the same claim.
+
+    Returns False if the lease expired and another worker has re-claimed the
+    range; the upserted scores are still valid, the other worker simply
+    rewrites them.
+    """
+    updated = _held_job(session, job_id, worker_id, attempt).update(values, synchronize_session=False)
+    session.commit()
+    return updated == 1
+
+def fail_exhausted_jobs(session: Session, batch_id: str) -> int:
+    """Mark jobs that used up MAX_ATTEMPTS and are no longer leased as failed."""
+    failed = session.query(ScoringJob).filter(
+        ScoringJob.batch_id == batch_id,
+        ScoringJob.attempts >= MAX_ATTEMPTS,
+        or_(
+            ScoringJob.status == 'pending',
+            and_(ScoringJob.status == 'running', ScoringJob.lease_expires_at < func.now())
+        )
+    ).update({'status': 'failed', 'finished_at': func.now()}, synchronize_session=False)
+    session.commit()
+    return failed
+
+def score_job(session: Session, job: ScoringJob, use_ml: bool = True,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False,
+              batch_size: int = DEFAULT_BATCH_SIZE, worker_id: Optional[str] = None,
+              attempt: Optional[int] = None, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+              engine: str = 'python') -> int:
+    """
+    Score every student currently in the job's student-id range, one committed batch at a time.
+
+    With worker_id and attempt, the lease is renewed after every batch, and
+    scoring stops early once another worker has re-claimed the range.
+    engine selects the rule-based implementation (see calculate_all_scores).
+
+    Returns:
+        Scores written
+    """
+    from src.core.scoring import calculate_all_scores
+
+    student_ids = [s for (s,) in session.query(Student.student_id).filter(
+        Student.student_id.between(job.start_student_id, job.end_student_id)
+    ).order_by(Student.student_id)]
+
+    scores = 0
+    for i in range(0, len(student_ids), batch_size):
+        scores += calculate_all_scores(session, use_ml=use_ml, chunk_size=chunk_size, exact=exact,
+                                       student_ids=student_ids[i:i + batch_size], batch_size=batch_size,
+                                       engine=engine)
+        if worker_id is not None and not renew_lease(session, job.job_id, worker_id, attempt, lease_seconds):
+            break
+    return scores
+
+def run_worker(session: Session, batch_id: Optional[str] = None, worker_id: Optional[str] = None,
+               use_ml: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False,
+               lease_seconds: int = DEFAULT_LEASE_SECONDS, max_jobs: Optional[int] = None,
+               batch_size: int = DEFAULT_BATCH_SIZE, engine: str = 'python') -> Dict:
+    """
+    Claim, score and complete jobs until the batch has no claimable work left.
+
+    Scores are upserted and committed before the job is marked done, so a
+    crash between the two only causes the range to be rescored after its
+    lease expires. The lease is renewed after every batch of students, so
+    a range may take longer than lease_seconds to score. A range that
+    raises is released for retry (or marked failed after MAX_ATTEMPTS).
+
+    Args:
+        session: Database session
+        batch_id: Batch to work on (default: most recently enqueued batch)
+        worker_id: Worker name recorded on claimed jobs (default: hostname:pid)
+        use_ml: If True, use ML models (rule-based fallback)
+        chunk_size: Rows per bulk upsert statement
+        exact: If True, rule-based scores use exact arithmetic
+        lease_seconds: How long a claim (or its last renewal) is held before other workers may take it over
+        max_jobs: Stop after this many jobs (None = until no work is left)
+        batch_size: Students scored and committed between lease renewals
+        engine: Rule-based engine: 'python', 'sparse' or 'sql'
+
+    Returns:
+        {'worker_id': str, 'jobs': int, 'failed': int, 'scores': int, 'seconds': float}
+    """
+    batch_id = batch_id or latest_batch_id(session)
+    worker_id = worker_id or default_worker_id()
+    stats = {'worker_id': worker_id, 'jobs': 0, 'failed': 0, 'scores': 0, 'seconds': 0.0}
+    if batch_id is None:
+        print("⚠ No scoring jobs enqueued")
+        return stats
+
+    print(f"Worker {worker_id} processing batch {batch_id}...")
+    start = time.perf_counter()
+
+    while max_jobs is None or stats['jobs'] + stats['failed'] < max_jobs:
+        job = claim_job(session, batch_id, worker_id, lease_seconds)
+        if job is None:
+            break
+
+        job_id, attempt = job.job_id, job.attempts
+        job_start = time.perf_counter()
+        try:
+            scores = score_job(session, job, use_ml=use_ml, chunk_size=chunk_size, exact=exact,
+                               batch_size=batch_size, worker_id=worker_id, attempt=attempt,
+                               lease_seconds=lease_seconds, engine=engine)
+        except Exception as e:
+            session.rollback()
+            stats['failed'] += 1
+            status = 'failed' if attempt >= MAX_ATTEMPTS else 'pending'
+            _finish_job(session, job_id, worker_id, attempt, {
+                'status': status, 'error': str(e)[:1000], 'lease_expires_at': None, 'finished_at': func.now()
+            })
+            print(f"  ✗ Job {job_id} (students {job.start_student_id}-{job.end_student_id}) "
+                  f"failed, attempt {attempt}: {e}")
+            continue
+
+        completed = _finish_job(session, job_id, worker_id, attempt, {
+            'status': 'done', 'scores_written': scores, 'lease_expires_at': None, 'finished_at': func.now()
+        })
+        stats['jobs'] += 1
+        stats['scores'] += scores
+        note = "" if completed else " (lease lost, range re-claimed by another worker)"
+        print(f"  ✓ Job {job_id} (students {job.start_student_id}-{job.end_student_id}): "
+              f"{scores} scores in {time.perf_counter() - job_start:.2f}s{note}")
+
+    fail_exhausted_jobs(session, batch_id)
+    stats['seconds'] = time.perf_counter() - start
+    print(f"✓ Worker {worker_id} finished {stats['jobs']} jobs ({stats['scores']} scores) "
+          f"in {stats['seconds']:.2f}s")
+    return stats
+
+def batch_status(session: Session, batch_id: Optional[str] = None) -> Dict[str, int]:
+    """Count a batch's jobs by status, e.g. {'pending': 2, 'running': 1, 'done': 7}."""
+    batch_id = batch_id or latest_batch_id(session)
+    rows = session.query(ScoringJob.status, func.count(ScoringJob.job_id)).filter(
+        ScoringJob.batch_id == batch_id
+    ).group_by(ScoringJob.status).all()
+    return {status: count for status, count in rows}
+
+def main():
+    """CLI entry point: enqueue ranges, run a worker, or report batch status."""
+    from src.database.connection import get_db_session
+
+    parser = argparse.ArgumentParser(description='Distributed readiness scoring via the scoring_jobs table')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Enqueue student-id ranges as scoring jobs')
+    enqueue_parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE,
+                                help=f'Students per job (default: {DEFAULT_RANGE_SIZE})')
+
+    work_parser = subparsers.add_parser('work', help='Claim and score jobs until none are left')
+    work_parser.add_argument('--batch', help='Batch ID (default: latest batch)')
+    work_parser.add_argument('--worker-id', help='Worker name (default: hostname:pid)')
+    work_parser.add_argument('--rule-based', action='store_true', help='Use rule-based scoring only')
+    work_parser.add_argument('--exact', action='store_true', help='Exact (Decimal-equivalent) rule-based scoring')
+    work_parser.add_argument('--engine', choices=ENGINES, default='python',
+                             help='Rule-based engine: python, sparse or sql (default: python)')
+    work_parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS,
+                             help=f'Claim lease before a job can be taken over (default: {DEFAULT_LEASE_SECONDS})')
+    work_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                             help=f'Rows per bulk upsert statement (default: {DEFAULT_CHUNK_SIZE})')
+    work_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                             help=f'Students committed between lease renewals (default: {DEFAULT_BATCH_SIZE})')
+
+    status_parser = subparsers.add_parser('status', help='Show job counts for a batch')
+    status_parser.add_argument('--batch', help='Batch ID (default: latest batch)')
+
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        if args.command == 'enqueue':
+            enqueue_scoring_jobs(session, range_size=args.range_size)
+        elif args.command == 'work':
+            run_worker(
+                session,
+                batch_id=args.batch,
+                worker_id=args.worker_id,
+                use_ml=not args.rule_based,
+                chunk_size=args.chunk_size,
+                exact=args.exact,
+                lease_seconds=args.lease_seconds,
+                batch_size=args.batch_size,
+                engine=args.engine
+            )
+        else:
+            counts = batch_status(session, args.batch)
+            for status in ('pending', 'running', 'done', 'failed'):
+                print(f"  {status:8s} {counts.get(status, 0)}")
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Vectorized rule-based scoring engine
+Scores every student-role pair at once from skill matrices instead of
+calling calculate_readiness_score once per pair
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import math
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database.models import *
+from src.core.scoring import PROFICIENCY_MAP
+from src.core.score_writer import DEFAULT_BATCH_SIZE
+from src.core.score_batch import ScoreBatch, FLOAT_SCORE_DECIMALS, level_codes_from_scores
+
+# Proficiencies and weights are DECIMAL(3, 2) columns, so they are held as
+# integer hundredths. In exact mode the per-skill credit
+# min(student_prof / required_prof, 1) is scaled by the LCM of the required
+# proficiencies, which keeps every intermediate value an exact integer and
+# lets the final score be formed by a single correctly rounded division -
+# the same float the Decimal-based calculate_readiness_score produces.
+REQUIRED_PROFICIENCY = {
+    level: int(value * 100) for level, value in PROFICIENCY_MAP.items()
+}
+CREDIT_SCALE = math.lcm(*REQUIRED_PROFICIENCY.values())
+
+def _to_hundredths(values) -> np.ndarray:
+    """Convert DECIMAL(3, 2) values to int64 hundredths."""
+    return np.rint(np.array(values, dtype=np.float64) * 100).astype(np.int64)
+
+def round_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    Round scores to 2 decimals with the same result as Python's round().
+
+    np.round scales by 100 before rounding, which can land on the other side
+    of a .xx5 tie than round(); the few values near a tie are redone in Python.
+    """
+    rounded = np.round(scores, 2)
+    scaled = scores * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(scores[i]), 2)
+    return rounded
+
+def missing_skills_csr(has_skill: np.ndarray, required: np.ndarray) -> sparse.csr_matrix:
+    """
+    Required skills each student-role pair lacks, as a CSR (pairs × skills) matrix.
+
+    Rows are in score_matrices order (student-major); only missing entries
+    are materialized.
+    """
+    n_students = has_skill.shape[0]
+    n_roles, n_skills = required.shape
+    rows = []
+    cols = []
+    for j in range(n_roles):
+        req_cols = np.flatnonzero(required[j])
+        students, missing = np.nonzero(~has_skill[:, req_cols])
+        rows.append(students * n_roles + j)
+        cols.append(req_cols[missing])
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)), shape=(n_students * n_roles, n_skills)
+    )
+
+def load_skill_ids(session: Session) -> np.ndarray:
+    """All skills_master IDs in ascending order (the matrix column order)."""
+    return np.array(
+        [s for (s,) in session.query(SkillsMaster.skill_id).order_by(SkillsMaster.skill_id)],
+        dtype=np.int64
+    )
+
+def load_student_skill_matrix(session: Session, student_ids: Optional[list] = None,
+                              skill_ids: Optional[np.ndarray] = None) -> Dict:
+    """
+    Load student_skills into a students × skills proficiency matrix.
+
+    Args:
+        session: Database session
+        student_ids: List of student IDs (None = all students)
+        skill_ids: Column order from load_skill_ids (None = load it)
+
+    Returns:
+        {
+            'student_ids': int64 array (rows),
+            'skill_ids': int64 array (columns, all of skills_master),
+            'proficiency': int64 matrix of proficiency_score in hundredths,
+            'has_skill': bool matrix (a skill held at 0.00 still counts as matched)
+        }
+    """
+    if skill_ids is None:
+        skill_ids = load_skill_ids(session)
+
+    students_query = session.query(Student.student_id).order_by(Student.student_id)
+    skills_query = session.query(
+        StudentSkills.student_id,
+        StudentSkills.skill_id,
+        StudentSkills.proficiency_score
+    )
+    if student_ids is not None:
+        students_query = students_query.filter(Student.student_id.in_(student_ids))
+        skills_query = skills_query.filter(StudentSkills.student_id.in_(student_ids))
+
+    row_ids = np.array([s for (s,) in students_query], dtype=np.int64)
+    records = skills_query.all()
+
+    proficiency = np.zeros((len(row_ids), len(skill_ids)), dtype=np.int64)
+    has_skill = np.zeros((len(row_ids), len(skill_ids)), dtype=bool)
+
+    if records:
+        rec_students, rec_skills, rec_scores = zip(*records)
+        rows = np.searchsorted(row_ids, np.array(rec_students, dtype=np.int64))
+        cols = np.searchsorted(skill_ids, np.array(rec_skills, dtype=np.int64))
+        proficiency[rows, cols] = _to_hundredths(rec_scores)
+        has_skill[rows, cols] = True
+
+    return {
+        'student_ids': row_ids,
+        'skill_ids': skill_ids,
+        'proficiency': proficiency,
+        'has_skill': has_skill
+    }
+
+def load_role_skill_matrix(session: Session, skill_ids: np.ndarray, role_ids: Optional[list] = None) -> Dict:
+    """
+    Load job_role_skills into roles × skills requirement matrices.
+
+    Args:
+        session: Database session
+        skill_ids: Skill column order (from load_student_skill_matrix)
+        role_ids: List of role IDs (None = all roles)
+
+    Returns:
+        {
+            'role_ids': int64 array (rows),
+            'skill_ids': int64 array (columns),
+            'required': bool matrix,
+            'required_proficiency': int64 matrix in hundredths (0 if not required),
+            'importance_weight': int64 matrix in hundredths (0 if not required)
+        }
+    """
+    roles_query = session.query(JobRole.role_id).order_by(JobRole.role_id)
+    reqs_query = session.query(
+        JobRoleSkills.role_id,
+        JobRoleSkills.skill_id,
+        JobRoleSkills.required_proficiency,
+        JobRoleSkills.importance_weight
+    )
+    if role_ids is not None:
+        roles_query = roles_query.filter(JobRole.role_id.in_(role_ids))
+        reqs_query = reqs_query.filter(JobRoleSkills.role_id.in_(role_ids))
+
+    row_ids = np.array([r for (r,) in roles_query], dtype=np.int64)
+    records = reqs_query.all()
+
+    shape = (len(row_ids), len(skill_ids))
+    required = np.zeros(shape, dtype=bool)
+    required_proficiency = np.zeros(shape, dtype=np.int64)
+    importance_weight = np.zeros(shape, dtype=np.int64)
+
+    if records:
+        rec_roles, rec_skills, rec_levels, rec_weights = zip(*records)
+        rows = np.searchsorted(row_ids, np.array(rec_roles, dtype=np.int64))
+        cols = np.searchsorted(skill_ids, np.array(rec_skills, dtype=np.int64))
+        required[rows, cols] = True
+        required_proficiency[rows, cols] = [REQUIRED_PROFICIENCY[level] for level in rec_levels]
+        importance_weight[rows, cols] = _to_hundredths(rec_weights)
+
+    return {
+        'role_ids': row_ids,
+        'skill_ids': np.asarray(skill_ids, dtype=np.int64),
+        'required': required,
+        'required_proficiency': required_proficiency,
+        'importance_weight': importance_weight
+    }
+
+def score_matrices(student_matrix: Dict, role_matrix: Dict, exact: bool = False,
+                   missing_skills: bool = False) -> ScoreBatch:
+    """
+    Score every student × role pair from the skill matrices.
+
+    Same formula as the rule-based calculate_readiness_score:
+    Score = (Σ min(student_prof / required_prof, 1) × importance_weight) / Σ required_weights × 100
+
+    By default the credit is computed in float64 (BLAS matrix products).
+    exact=True uses integer arithmetic, which reproduces the Decimal scorer
+    bit for bit. missing_skills=True also records which required skills
+    each pair lacks (ScoreBatch.missing_skills).
+
+    Returns:
+        ScoreBatch, one entry per pair (student-major order)
+    """
+    has_skill = student_matrix['has_skill']
+    required = role_matrix['required']
+    n_students = len(student_matrix['student_ids'])
+    n_roles = len(role_matrix['role_ids'])
+
+    # Counts for all roles in one product: (students × skills) @ (skills × roles)
+    required_count = required.sum(axis=1)
+    matched_count = has_skill.astype(np.int64) @ required.T.astype(np.int64)
+
+    total_weight = role_matrix['importance_weight'].sum(axis=1)
+    scores = np.zeros((n_students, n_roles), dtype=np.float64)
+
+    if exact:
+        proficiency = student_matrix['proficiency']
+        credit = np.zeros((n_students, n_roles), dtype=np.int64)
+        for j in range(n_roles):
+            cols = np.flatnonzero(required[j])
+            if len(cols) == 0:
+                continue
+            factor = CREDIT_SCALE // role_matrix['required_proficiency'][j, cols]
+            weights = role_matrix['importance_weight'][j, cols]
+            credit[:, j] = np.minimum(proficiency[:, cols] * factor, CREDIT_SCALE) @ weights
+
+        # score = credit / (CREDIT_SCALE × total_weight) × 100, as one division
+        denominator = CREDIT_SCALE * total_weight
+        np.divide(credit * 100, denominator, out=scores, where=denominator > 0)
+    else:
+        proficiency = student_matrix['proficiency']
+        credit = np.zeros((n_students, n_roles), dtype=np.float64)
+        for j in range(n_roles):
+            cols = np.flatnonzero(required[j])
+            if len(cols) == 0:
+                continue
+            # Both sides are in hundredths, so the ratio needs no rescaling
+            required_prof = role_matrix['required_proficiency'][j, cols]
+            weights = role_matrix['importance_weight'][j, cols] / 100.0
+            credit[:, j] = np.minimum(proficiency[:, cols] / required_prof, 1.0) @ weights
+
+        weight_sum = total_weight / 100.0
+        np.divide(credit, weight_sum, out=scores, where=weight_sum > 0)
+        scores *= 100
+        # Drop accumulated float error before levels and rounding (see FLOAT_SCORE_DECIMALS)
+        np.round(scores, FLOAT_SCORE_DECIMALS, out=scores)
+
+    scores = scores.ravel()
+
+    return ScoreBatch(
+        student_id=np.repeat(student_matrix['student_ids'], n_roles),
+        role_id=np.tile(role_matrix['role_ids'], n_students),
+        readiness_score=round_scores(scores),
+        level_code=level_codes_from_scores(scores),
+        matched_skills_count=matched_count.ravel(),
+        required_skills_count=np.tile(required_count, n_students),
+        missing_skills=missing_skills_csr(has_skill, required) if missing_skills else None,
+        skill_ids=student_matrix['skill_ids'] if missing_skills else None
+    )
+
+def calculate_scores_matrix(session: Session, student_ids: Optional[list] = None, role_ids: Optional[list] = None,
+                            exact: bool = False, missing_skills: bool = False) -> ScoreBatch:
+    """
+    Load skill matrices and score all requested student-role pairs.
+
+    Args:
+        session: Database session
+        student_ids: List of student IDs (None = all students)
+        role_ids: List of role IDs (None = all roles)
+        exact: If True, use exact integer arithmetic (see score_matrices)
+        missing_skills: If True, record each pair's missing required skills
+
+    Returns:
+        ScoreBatch of all requested pairs (see score_matrices)
+    """
+    student_matrix = load_student_skill_matrix(session, student_ids)
+    role_matrix = load_role_skill_matrix(session, student_matrix['skill_ids'], role_ids)
+    return score_matrices(student_matrix, role_matrix, exact=exact, missing_skills=missing_skills)
+
+def iter_student_id_batches(session: Session, batch_size: int = DEFAULT_BATCH_SIZE,
+                            student_ids: Optional[list] = None,
+                            after_student_id: Optional[int] = None) -> Iterator[List[int]]:
+    """
+    Yield student IDs in ascending order, batch_size at a time.
+
+    Batches are fetched by keyset pagination (student_id > last ID seen), so
+    only one batch of IDs is held in memory and no cursor stays open between
+    batches: the caller may commit after each one.
+
+    Args:
+        session: Database session
+        batch_size: Students per batch
+        student_ids: List of student IDs (None = all students)
+        after_student_id: Start after this student ID (e.g. a run checkpoint)
+    """
+    if student_ids is not None:
+        selected = sorted(set(student_ids))
+        if after_student_id is not None:
+            selected = selected[np.searchsorted(selected, after_student_id, side='right'):]
+        for offset in range(0, len(selected), batch_size):
+            yield selected[offset:offset + batch_size]
+        return
+
+    last_id = after_student_id
+    while True:
+        query = select(Student.student_id).order_by(Student.student_id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Student.student_id > last_id)
+        batch = list(session.execute(query).scalars())
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+def iter_readiness_scores(session: Session, batch_size: int = DEFAULT_BATCH_SIZE,
+                          student_ids: Optional[list] = None, role_ids: Optional[list] = None,
+                          exact: bool = False, after_student_id: Optional[int] = None) -> Iterator[ScoreBatch]:
+    """
+    Stream rule-based scores, one batch of students at a time.
+
+    Only one batch's skill matrix is built at a time, so peak memory depends
+    on batch_size (and the role catalog), not on the cohort size. Nothing is
+    held open between batches, so the caller may commit after each one.
+
+    Args:
+        session: Database session
+        batch_size: Students per yielded batch
+        student_ids: List of student IDs (None = all students)
+        role_ids: List of role IDs (None = all roles)
+        exact: If True, use exact integer arithmetic (see score_matrices)
+        after_student_id: Start after this student ID (e.g. a run checkpoint)
+
+    Yields:
+        ScoreBatch for the batch (see score_matrices)
+    """
+    skill_ids = load_skill_ids(session)
+    role_matrix = load_role_skill_matrix(session, skill_ids, role_ids)
+
+    for batch in iter_student_id_batches(session, batch_size, student_ids, after_student_id):
+        student_matrix = load_student_skill_matrix(session, batch, skill_ids=skill_ids)
+        yield score_matrices(student_matrix, role_matrix, exact=exact)
@@ -8,10 +8,13 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from typing import Dict
+from typing import Dict, Optional
 from sqlalchemy.orm import Session
 from src.database.models import *
-from src.ml_models.predict import predict_readiness_ml, predict_batch_ml
+from src.ml_models.predict import predict_readiness_ml, iter_predictions_ml
+from src.core.score_writer import upsert_scores, DEFAULT_CHUNK_SIZE, DEFAULT_BATCH_SIZE
+from src.core.role_cache import get_role_requirements
+from src.core.score_batch import ScoreBatch, level_codes_from_names
 
 def calculate_readiness_score_ml(student_id: int, role_id: int, session: Session) -> Dict:
     """
@@ -32,7 +35,7 @@ def calculate_readiness_score_ml(student_id: int, role_id: int, session: Session
         }
     """
     # Get ML prediction
-    ml_result = predict_readiness_ml(student_id, role_id, session)
+    ml_result = predict_readiness_ml(student_id, role_id, session, outputs=('score', 'level'))
     
     if ml_result.get('error'):
         # Fallback to rule-based if ML fails
@@ -45,13 +48,13 @@ def calculate_readiness_score_ml(student_id: int, role_id: int, session: Session
         }
     
     # Get required skills count for metadata
-    required_skills = session.query(JobRoleSkills).filter_by(role_id=role_id).all()
-    required_count = len(required_skills)
+    required_skill_ids = get_role_requirements(session, role_id)['skill_ids']
+    required_count = len(required_skill_ids)
     
     # Get student skills for metadata
     student_skills = session.query(StudentSkills).filter_by(student_id=student_id).all()
     student_skill_ids = {s.skill_id for s in student_skills}
-    matched_count = sum(1 for req in required_skills if req.skill_id in student_skill_ids)
+    matched_count = sum(1 for skill_id in required_skill_ids if skill_id in student_skill_ids)
     
     return {
         'readiness_score': ml_result['readiness_score_ml'],
@@ -63,79 +66,89 @@ def calculate_readiness_score_ml(student_id: int, role_id: int, session: Session
         'ml_probabilities': ml_result.get('readiness_score_ml_probabilities')
     }
 
-def calculate_all_scores_ml(session: Session, update_database: bool = True) -> None:
+def calculate_all_scores_ml(session: Session, update_database: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            student_ids: Optional[list] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                            resume: bool = False, run_scope: Optional[str] = None) -> int:
     """
     Calculate readiness scores for ALL student-role combinations using ML.
     
+    Students are predicted and committed one batch at a time, so memory and
+    transaction size do not grow with the cohort. Tracked runs record a
+    checkpoint in scoring_runs with every batch.
+    
     Args:
         session: Database session
         update_database: If True, update market_readiness_scores table
-    """
-    from sqlalchemy import func
+        chunk_size: Rows per bulk upsert statement
+        student_ids: List of student IDs to rescore (None = all students)
+        batch_size: Students predicted (and committed) per batch
+        resume: If True, continue the latest unfinished ML run from its checkpoint
+        run_scope: Checkpoint scope ('all' or 'incremental'); None = 'all' when
+                   student_ids is None, otherwise the run is not tracked
     
-    students = session.query(Student).all()
-    roles = session.query(JobRole).all()
+    Returns:
+        Number of scores calculated
+    """
+    from src.core.scoring_matrix import iter_student_id_batches
+    from src.core.scoring_runs import start_run, checkpoint_run, finish_run, fail_run
     
-    print(f"Calculating ML scores for {len(students)} students × {len(roles)} roles...")
+    if run_scope is None and student_ids is None:
+        run_scope = 'all'
+    run = start_run(session, 'ml', run_scope, resume=resume) if run_scope and update_database else None
+    after_student_id = run.last_student_id if run else None
     
-    # Use batch prediction for efficiency
-    predictions_df = predict_batch_ml(session)
+    students_query = session.query(Student)
+    if student_ids is not None:
+        students_query = students_query.filter(Student.student_id.in_(student_ids))
+    if after_student_id is not None:
+        students_query = students_query.filter(Student.student_id > after_student_id)
     
-    if predictions_df.empty:
-        # If we cannot generate any predictions (e.g., models not trained yet),
-        # raise an error so the caller can gracefully fall back to the
-        # rule-based scoring pipeline.
-        print("ERROR: No predictions generated. Check if models are trained.")
-        raise RuntimeError("ML predictions unavailable (no predictions generated)")
+    print(f"Calculating ML scores for {students_query.count()} students × {session.query(JobRole).count()} roles...")
     
     count = 0
-    for _, row in predictions_df.iterrows():
-        student_id = int(row['student_id'])
-        role_id = int(row['role_id'])
-        
-        # Get metadata (matched skills, etc.)
-        required_skills = session.query(JobRoleSkills).filter_by(role_id=role_id).all()
-        required_count = len(required_skills)
-        
-        student_skills = session.query(StudentSkills).filter_by(student_id=student_id).all()
-        student_skill_ids = {s.skill_id for s in student_skills}
-        matched_count = sum(1 for req in required_skills if req.skill_id in student_skill_ids)
-        
-        if update_database:
-            # Check if record exists (upsert logic)
-            existing = session.query(MarketReadinessScores).filter_by(
-                student_id=student_id,
-                role_id=role_id
-            ).first()
-            
-            if existing:
-                # Update existing record with ML predictions
-                existing.readiness_score = row['readiness_score_ml']
-                existing.readiness_level = row['readiness_level_ml']
-                existing.matched_skills_count = matched_count
-                existing.required_skills_count = required_count
-                existing.skill_gap_count = required_count - matched_count
-            else:
-                # Insert new record
-                score_record = MarketReadinessScores(
-                    student_id=student_id,
-                    role_id=role_id,
-                    readiness_score=row['readiness_score_ml'],
-                    readiness_level=row['readiness_level_ml'],
-                    matched_skills_count=matched_count,
-                    required_skills_count=required_count,
-                    skill_gap_count=required_count - matched_count
+    changed = 0
+    try:
+        for batch_ids in iter_student_id_batches(session, batch_size, student_ids, after_student_id):
+            # Predictions carry the matched/required counts computed during feature extraction
+            predictions = list(iter_predictions_ml(session, student_ids=batch_ids))
+            scores = ScoreBatch.concatenate(
+                ScoreBatch(
+                    student_id=df['student_id'].to_numpy(),
+                    role_id=df['role_id'].to_numpy(),
+                    readiness_score=df['readiness_score_ml'].to_numpy(),
+                    level_code=level_codes_from_names(df['readiness_level_ml'].to_numpy()),
+                    matched_skills_count=df['matched_skills_count'].to_numpy(),
+                    required_skills_count=df['required_skills_count'].to_numpy()
                 )
-                session.add(score_record)
-        
-        count += 1
-        if count % 100 == 0:
+                for df in predictions
+            )
+            count += scores.n_pairs
             print(f"  Processed {count} scores...")
+            
+            if update_database:
+                batch_changed = 0
+                if scores.n_pairs:
+                    stats = upsert_scores(session, scores, chunk_size=chunk_size)
+                    batch_changed = stats['inserted'] + stats['updated']
+                checkpoint_run(session, run, batch_ids[-1], scores.n_students, scores.n_pairs, batch_changed)
+                changed += batch_changed
+        
+        if count == 0 and after_student_id is None:
+            # If we cannot generate any predictions (e.g., models not trained yet),
+            # raise an error so the caller can gracefully fall back to the
+            # rule-based scoring pipeline.
+            print("ERROR: No predictions generated. Check if models are trained.")
+            raise RuntimeError("ML predictions unavailable (no predictions generated)")
+    except Exception as e:
+        fail_run(session, run, e)
+        raise
     
+    finish_run(session, run)
     if update_database:
-        session.commit()
-    
-    print(f"✓ All {count} ML readiness scores calculated!")
+        print(f"✓ All {count} ML readiness scores calculated! ({changed} changed, {count - changed} unchanged)")
+    else:
+        print(f"✓ All {count} ML readiness scores calculated!")
+    return count
 
 if __name__ == "__main__":
     from src.database.connection import get_db_session
@@ -0,0 +1,118 @@
+"""
+Multi-process sharded cohort scoring
+Splits students into shards and scores them in a process pool; each worker
+opens its own engine/connection and upserts its shard's scores
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+import numpy as np
+from src.core.score_writer import DEFAULT_CHUNK_SIZE, DEFAULT_BATCH_SIZE
+
+# Shards per worker, so a slow shard does not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+def split_shards(student_ids: List[int], n_shards: int) -> List[List[int]]:
+    """Split student IDs into at most n_shards contiguous, non-empty shards."""
+    n_shards = max(1, min(n_shards, len(student_ids)))
+    return [shard.tolist() for shard in np.array_split(np.asarray(student_ids, dtype=np.int64), n_shards)]
+
+def _init_worker() -> None:
+    """Silence per-shard output; the parent reports progress."""
+    sys.stdout = open(os.devnull, 'w')
+
+def score_shard(shard_id: int, student_ids: List[int], use_ml: bool, chunk_size: int, exact: bool,
+                batch_size: int = DEFAULT_BATCH_SIZE, engine: str = 'python') -> Dict:
+    """
+    Score one shard in a worker process.
+
+    Runs in a spawned interpreter, so get_db_session() creates a fresh
+    engine and connection pool for this process.
+
+    Returns:
+        {'shard_id': int, 'students': int, 'scores': int, 'seconds': float}
+    """
+    from src.database.connection import get_db_session
+    from src.core.scoring import calculate_all_scores
+
+    start = time.perf_counter()
+    session = get_db_session()
+    try:
+        scores = calculate_all_scores(
+            session, use_ml=use_ml, chunk_size=chunk_size, exact=exact, student_ids=student_ids,
+            batch_size=batch_size, engine=engine
+        )
+    finally:
+        session.close()
+
+    return {
+        'shard_id': shard_id,
+        'students': len(student_ids),
+        'scores': scores,
+        'seconds': time.perf_counter() - start
+    }
+
+def calculate_all_scores_parallel(student_ids: List[int], workers: int, use_ml: bool = True,
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE, exact: bool = False,
+                                  batch_size: int = DEFAULT_BATCH_SIZE, engine: str = 'python') -> int:
+    """
+    Score students across a pool of worker processes.
+
+    Each shard is scored and committed independently by its worker (rows
+    are upserted, so shards can finish in any order). A failing shard
+    raises after the remaining shards complete.
+
+    Args:
+        student_ids: Students to score
+        workers: Number of worker processes
+        use_ml: If True, use ML models (rule-based fallback per shard)
+        chunk_size: Rows per bulk upsert statement
+        exact: If True, rule-based scores use exact arithmetic
+        batch_size: Students scored (and committed) per batch within a shard
+        engine: Rule-based engine each shard uses ('python', 'sparse' or 'sql')
+
+    Returns:
+        Total number of score records written
+    """
+    shards = split_shards(student_ids, workers * SHARDS_PER_WORKER)
+    print(f"Scoring {len(student_ids)} students in {len(shards)} shards across {workers} workers...")
+
+    start = time.perf_counter()
+    total_scores = 0
+    failures = []
+
+    # spawn (not fork) so no worker inherits the parent's pooled connections
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(score_shard, shard_id, shard, use_ml, chunk_size, exact, batch_size, engine): shard_id
+            for shard_id, shard in enumerate(shards, start=1)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            shard_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append((shard_id, e))
+                print(f"  ✗ Shard {shard_id} failed: {e}")
+                continue
+            total_scores += result['scores']
+            print(f"  [{done}/{len(shards)}] Shard {shard_id}: {result['students']} students, "
+                  f"{result['scores']} scores in {result['seconds']:.2f}s")
+
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(shards)} shards failed: "
+                           + ", ".join(f"shard {shard_id} ({e})" for shard_id, e in failures))
+
+    print(f"✓ All {total_scores} readiness scores calculated in {elapsed:.2f}s "
+          f"({total_scores / elapsed:,.0f} scores/sec)")
+    return total_scores
@@ -0,0 +1,91 @@
+"""
+Checkpoints for cohort scoring runs
+Each batch of scores is committed together with the run's checkpoint (the
+last student_id scored), so a crashed run loses at most one batch and can
+resume from where it stopped instead of starting over
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.database.models import ScoringRun
+
+def start_run(session: Session, mode: str, scope: str = 'all', resume: bool = False) -> ScoringRun:
+    """
+    Start a scoring run, or pick up the latest unfinished one.
+
+    Args:
+        session: Database session
+        mode: 'ml' or 'rule-based'
+        scope: 'all' (whole cohort) or 'incremental' (changed students only)
+        resume: If True, continue the most recent running/failed run with the
+                same mode and scope (a new run is started if there is none)
+
+    Returns:
+        The committed ScoringRun; last_student_id is where scoring resumes
+        (None = from the first student)
+    """
+    run = None
+    if resume:
+        run = session.query(ScoringRun).filter(
+            ScoringRun.mode == mode,
+            ScoringRun.scope == scope,
+            ScoringRun.status.in_(['running', 'failed'])
+        ).order_by(ScoringRun.run_id.desc()).first()
+
+    if run is None:
+        if resume:
+            print(f"No unfinished {mode} run to resume; starting a new run")
+        run = ScoringRun(mode=mode, scope=scope, status='running', students_processed=0,
+                         scores_written=0, scores_changed=0)
+        session.add(run)
+    else:
+        print(f"Resuming {mode} run {run.run_id} after student {run.last_student_id} "
+              f"({run.scores_written} scores already written)")
+        run.status = 'running'
+        run.error = None
+
+    session.commit()
+    return run
+
+def checkpoint_run(session: Session, run: Optional[ScoringRun], last_student_id: int,
+                   students: int, scores: int, changed: int) -> None:
+    """
+    Record a finished batch and commit it together with its scores.
+
+    Args:
+        session: Database session holding the batch's uncommitted upserts
+        run: Run being checkpointed (None = commit without a checkpoint)
+        last_student_id: Highest student_id in the batch
+        students: Students scored in the batch
+        scores: Score rows written in the batch
+        changed: Rows inserted or updated (the rest already held the same values)
+    """
+    if run is not None:
+        run.last_student_id = last_student_id
+        run.students_processed += students
+        run.scores_written += scores
+        run.scores_changed += changed
+    session.commit()
+
+def finish_run(session: Session, run: Optional[ScoringRun]) -> None:
+    """Mark a run completed so it is never resumed."""
+    if run is None:
+        return
+    run.status = 'completed'
+    run.finished_at = func.now()
+    session.commit()
+
+def fail_run(session: Session, run: Optional[ScoringRun], error: Exception) -> None:
+    """Roll back the current batch and mark the run failed; its checkpoint is kept for --resume."""
+    session.rollback()
+    if run is None:
+        return
+    run.status = 'failed'
+    run.error = str(error)[:1000]
+    session.commit()
@@ -0,0 +1,210 @@
+"""
+Sparse rule-based scoring for large role catalogs
+Student × skill and role × skill matrices are held in CSR form, so work is
+proportional to the skills students and roles actually share: a pair with
+no overlap costs nothing beyond its (zero) output row
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterator, Optional
+from sqlalchemy.orm import Session
+from src.database.models import *
+from src.core.scoring_matrix import (
+    REQUIRED_PROFICIENCY, CREDIT_SCALE, DEFAULT_BATCH_SIZE,
+    _to_hundredths, round_scores, load_skill_ids, iter_student_id_batches
+)
+from src.core.score_batch import ScoreBatch, level_codes_from_scores
+
+def _csr(rows: np.ndarray, cols: np.ndarray, data, shape: tuple) -> sparse.csr_matrix:
+    return sparse.csr_matrix((np.asarray(data, dtype=np.int64), (rows, cols)), shape=shape)
+
+def load_student_skill_csr(session: Session, student_ids: Optional[list] = None,
+                           skill_ids: Optional[np.ndarray] = None) -> Dict:
+    """
+    Load student_skills into sparse students × skills matrices.
+
+    Args:
+        session: Database session
+        student_ids: List of student IDs (None = all students)
+        skill_ids: Column order from load_skill_ids (None = load it)
+
+    Returns:
+        {
+            'student_ids': int64 array (rows),
+            'skill_ids': int64 array (columns),
+            'proficiency': int64 CSR of proficiency_score in hundredths,
+            'has_skill': int64 CSR of ones (a skill held at 0.00 still counts as matched)
+        }
+    """
+    if skill_ids is None:
+        skill_ids = load_skill_ids(session)
+
+    students_query = session.query(Student.student_id).order_by(Student.student_id)
+    skills_query = session.query(
+        StudentSkills.student_id,
+        StudentSkills.skill_id,
+        StudentSkills.proficiency_score
+    )
+    if student_ids is not None:
+        students_query = students_query.filter(Student.student_id.in_(student_ids))
+        skills_query = skills_query.filter(StudentSkills.student_id.in_(student_ids))
+
+    row_ids = np.array([s for (s,) in students_query], dtype=np.int64)
+    records = skills_query.all()
+    shape = (len(row_ids), len(skill_ids))
+
+    if records:
+        rec_students, rec_skills, rec_scores = zip(*records)
+        rows = np.searchsorted(row_ids, np.array(rec_students, dtype=np.int64))
+        cols = np.searchsorted(skill_ids, np.array(rec_skills, dtype=np.int64))
+        proficiency = _csr(rows, cols, _to_hundredths(rec_scores), shape)
+        has_skill = _csr(rows, cols, np.ones(len(rows)), shape)
+    else:
+        proficiency = sparse.csr_matrix(shape, dtype=np.int64)
+        has_skill = sparse.csr_matrix(shape, dtype=np.int64)
+
+    return {
+        'student_ids': row_ids,
+        'skill_ids': skill_ids,
+        'proficiency': proficiency,
+        'has_skill': has_skill
+    }
+
+def load_role_skill_csr(session: Session, skill_ids: np.ndarray, role_ids: Optional[list] = None) -> Dict:
+    """
+    Load job_role_skills into sparse roles × skills matrices.
+
+    Args:
+        session: Database session
+        skill_ids: Skill column order (from load_skill_ids)
+        role_ids: List of role IDs (None = all roles)
+
+    Returns:
+        {
+            'role_ids': int64 array (rows),
+            'skill_ids': int64 array (columns),
+            'required': int64 CSR of ones,
+            'required_proficiency': int64 CSR in hundredths,
+            'importance_weight': int64 CSR in hundredths
+        }
+        All three matrices share one sparsity structure.
+    """
+    roles_query = session.query(JobRole.role_id).order_by(JobRole.role_id)
+    reqs_query = session.query(
+        JobRoleSkills.role_id,
+        JobRoleSkills.skill_id,
+        JobRoleSkills.required_proficiency,
+        JobRoleSkills.importance_weight
+    )
+    if role_ids is not None:
+        roles_query = roles_query.filter(JobRole.role_id.in_(role_ids))
+        reqs_query = reqs_query.filter(JobRoleSkills.role_id.in_(role_ids))
+
+    row_ids = np.array([r for (r,) in roles_query], dtype=np.int64)
+    records = reqs_query.all()
+    shape = (len(row_ids), len(skill_ids))
+
+    if records:
+        rec_roles, rec_skills, rec_levels, rec_weights = zip(*records)
+        rows = np.searchsorted(row_ids, np.array(rec_roles, dtype=np.int64))
+        cols = np.searchsorted(skill_ids, np.array(rec_skills, dtype=np.int64))
+        required = _csr(rows, cols, np.ones(len(rows)), shape)
+        required_proficiency = _csr(rows, cols, [REQUIRED_PROFICIENCY[level] for level in rec_levels], shape)
+        importance_weight = _csr(rows, cols, _to_hundredths(rec_weights), shape)
+    else:
+        required = sparse.csr_matrix(shape, dtype=np.int64)
+        required_proficiency = sparse.csr_matrix(shape, dtype=np.int64)
+        importance_weight = sparse.csr_matrix(shape, dtype=np.int64)
+
+    return {
+        'role_ids': row_ids,
+        'skill_ids': np.asarray(skill_ids, dtype=np.int64),
+        'required': required,
+        'required_proficiency': required_proficiency,
+        'importance_weight': importance_weight
+    }
+
+def score_sparse(student_csr: Dict, role_csr: Dict) -> ScoreBatch:
+    """
+    Score every student × role pair from the sparse skill matrices.
+
+    Same formula and exact integer arithmetic as score_matrices(exact=True).
+    min(prof × CREDIT_SCALE / required, CREDIT_SCALE) depends on the required
+    level, so the credit is one sparse product per distinct level:
+    Σ_level min(P × factor, CREDIT_SCALE) @ W_levelᵀ. Only overlapping pairs
+    appear in the products; every other pair keeps a zero score.
+
+    Returns:
+        ScoreBatch, one entry per pair (student-major order), as score_matrices
+    """
+    n_students = len(student_csr['student_ids'])
+    n_roles = len(role_csr['role_ids'])
+    proficiency = student_csr['proficiency']
+    required = role_csr['required']
+    weights = role_csr['importance_weight']
+    required_proficiency = role_csr['required_proficiency']
+
+    required_count = np.diff(required.indptr)
+    total_weight = np.asarray(weights.sum(axis=1), dtype=np.int64).ravel()
+
+    matched = (student_csr['has_skill'] @ required.T).tocoo()
+    credit = sparse.csr_matrix((n_students, n_roles), dtype=np.int64)
+    for level_value in np.unique(required_proficiency.data):
+        at_level = required_proficiency.copy()
+        at_level.data = (at_level.data == level_value).astype(np.int64)
+        level_weights = weights.multiply(at_level).tocsr()
+        level_weights.eliminate_zeros()
+
+        level_credit = proficiency.copy()
+        level_credit.data = np.minimum(level_credit.data * (CREDIT_SCALE // level_value), CREDIT_SCALE)
+        credit = credit + level_credit @ level_weights.T
+    credit = credit.tocoo()
+
+    matched_flat = np.zeros(n_students * n_roles, dtype=np.int64)
+    matched_flat[matched.row * n_roles + matched.col] = matched.data
+
+    # score = credit / (CREDIT_SCALE × total_weight) × 100, as one division
+    scores = np.zeros(n_students * n_roles, dtype=np.float64)
+    scores[credit.row * n_roles + credit.col] = (credit.data * 100) / (CREDIT_SCALE * total_weight[credit.col])
+
+    return ScoreBatch(
+        student_id=np.repeat(student_csr['student_ids'], n_roles),
+        role_id=np.tile(role_csr['role_ids'], n_students),
+        readiness_score=round_scores(scores),
+        level_code=level_codes_from_scores(scores),
+        matched_skills_count=matched_flat,
+        required_skills_count=np.tile(required_count, n_students)
+    )
+
+def iter_readiness_scores_sparse(session: Session, batch_size: int = DEFAULT_BATCH_SIZE,
+                                 student_ids: Optional[list] = None, role_ids: Optional[list] = None,
+                                 after_student_id: Optional[int] = None) -> Iterator[ScoreBatch]:
+    """
+    Stream sparse rule-based scores, one batch of students at a time.
+
+    The role catalog is loaded once as CSR; each batch holds only its
+    students' skills plus its batch × roles output, so memory is bounded by
+    batch_size × roles regardless of the cohort size.
+
+    Args:
+        session: Database session
+        batch_size: Students per yielded batch
+        student_ids: List of student IDs (None = all students)
+        role_ids: List of role IDs (None = all roles)
+        after_student_id: Start after this student ID (e.g. a run checkpoint)
+
+    Yields:
+        ScoreBatch for the batch (see score_matrices)
+    """
+    skill_ids = load_skill_ids(session)
+    role_csr = load_role_skill_csr(session, skill_ids, role_ids)
+
+    for batch in iter_student_id_batches(session, batch_size, student_ids, after_student_id):
+        student_csr = load_student_skill_csr(session, batch, skill_ids=skill_ids)
+        yield score_sparse(student_csr, role_csr)
@@ -0,0 +1,196 @@
+"""
+Set-based rule-based scoring inside PostgreSQL
+Computes every student-role score, level, matched count and gap with one
+CTE-based INSERT ... ON CONFLICT statement; no rows travel through Python
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import time
+from typing import Dict, Optional
+from sqlalchemy import text, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Integer
+from sqlalchemy.orm import Session
+from src.database.models import Student, JobRole
+from src.core.scoring_matrix import REQUIRED_PROFICIENCY, CREDIT_SCALE
+
+# Same integer formulation as score_matrices(exact=True): proficiencies and
+# weights in hundredths, per-skill credit min(prof × CREDIT_SCALE / required,
+# CREDIT_SCALE) × weight, and score = credit × 100 / (CREDIT_SCALE × Σ weight).
+_CREDIT_FACTOR_SQL = "CASE jrs.required_proficiency {} END".format(
+    " ".join(f"WHEN '{level}' THEN {CREDIT_SCALE // value}" for level, value in REQUIRED_PROFICIENCY.items())
+)
+
+def round_score_sql(numerator: str, denominator: str) -> str:
+    """
+    SQL expression rounding numerator / denominator (bigints) to 2 decimals
+    with the same result as Python's round(numerator / denominator, 2).
+
+    Python rounds the float quotient, so an exact .xx5 tie goes to the side
+    the float landed on: half-to-even when the tie is exactly representable
+    in binary, otherwise the direction of the float's rounding error (taken
+    from the 53-bit significand). Non-ties are far enough from the midpoint
+    that rounding the exact quotient gives the same answer.
+    """
+    # k = floor(score × 100), rem = remainder of score × 100 in units of 1/denominator
+    k = f"div(({numerator}) * 100, {denominator})"
+    rem = f"mod(({numerator}) * 100, {denominator})"
+    # Tie value T = a / 200 with a = 2k + 1; T is a binary fraction iff 25 divides a
+    a = f"(2 * {k} + 1)"
+    exponent = f"floor(log(2.0, {a} / 200.0))::int"
+    float_rounds_up = f"mod({a} * power(2::numeric, 52 - {exponent}), 200) > 100"
+    return (
+        f"(CASE WHEN ({denominator}) = 0 THEN 0"
+        f" WHEN 2 * {rem} < {denominator} THEN {k}"
+        f" WHEN 2 * {rem} > {denominator} THEN {k} + 1"
+        f" WHEN mod({a}, 25) = 0 THEN {k} + mod({k}, 2)"
+        f" WHEN {float_rounds_up} THEN {k} + 1"
+        f" ELSE {k} END / 100.0)"
+    )
+
+def build_scoring_sql(filter_students: bool = False, filter_roles: bool = False) -> str:
+    """
+    Build the scoring upsert.
+
+    Args:
+        filter_students: Restrict to :student_ids (an integer array parameter)
+        filter_roles: Restrict to :role_ids (an integer array parameter)
+
+    Returns:
+        SQL text; RETURNING yields one (inserted) row per inserted or updated pair
+    """
+    student_filter = "WHERE s.student_id = ANY(:student_ids)" if filter_students else ""
+    role_filter = "WHERE r.role_id = ANY(:role_ids)" if filter_roles else ""
+
+    return f"""
+WITH selected_students AS (
+    SELECT s.student_id FROM students s {student_filter}
+),
+selected_roles AS (
+    SELECT r.role_id FROM job_roles r {role_filter}
+),
+requirements AS (
+    SELECT jrs.role_id, jrs.skill_id,
+           round(jrs.importance_weight * 100)::bigint AS weight,
+           {_CREDIT_FACTOR_SQL} AS credit_factor
+    FROM job_role_skills jrs
+    JOIN selected_roles r ON r.role_id = jrs.role_id
+),
+role_totals AS (
+    SELECT r.role_id,
+           count(req.skill_id) AS required_count,
+           coalesce(sum(req.weight), 0) AS total_weight
+    FROM selected_roles r
+    LEFT JOIN requirements req ON req.role_id = r.role_id
+    GROUP BY r.role_id
+),
+overlap AS (
+    SELECT ss.student_id, req.role_id,
+           count(*) AS matched_count,
+           sum(least(round(ss.proficiency_score * 100)::bigint * req.credit_factor, {CREDIT_SCALE})
+               * req.weight) AS credit
+    FROM student_skills ss
+    JOIN selected_students s ON s.student_id = ss.student_id
+    JOIN requirements req ON req.skill_id = ss.skill_id
+    GROUP BY ss.student_id, req.role_id
+),
+pairs AS (
+    SELECT s.student_id, t.role_id, t.required_count,
+           coalesce(o.matched_count, 0) AS matched_count,
+           coalesce(o.credit, 0) * 100 AS numerator,
+           {CREDIT_SCALE} * t.total_weight AS denominator
+    FROM selected_students s
+    CROSS JOIN role_totals t
+    LEFT JOIN overlap o ON o.student_id = s.student_id AND o.role_id = t.role_id
+)
+INSERT INTO market_readiness_scores AS mrs (
+    student_id, role_id, readiness_score, readiness_level,
+    matched_skills_count, required_skills_count, skill_gap_count, calculated_at
+)
+SELECT p.student_id, p.role_id,
+       {round_score_sql('p.numerator', 'p.denominator')},
+       CASE WHEN p.denominator > 0 AND p.numerator >= 80 * p.denominator THEN 'Ready'
+            WHEN p.denominator > 0 AND p.numerator >= 50 * p.denominator THEN 'Developing'
+            ELSE 'Entry-Level' END,
+       p.matched_count, p.required_count, p.required_count - p.matched_count, now()
+FROM pairs p
+ON CONFLICT ON CONSTRAINT unique_student_role DO UPDATE SET
+    readiness_score = excluded.readiness_score,
+    readiness_level = excluded.readiness_level,
+    matched_skills_count = excluded.matched_skills_count,
+    required_skills_count = excluded.required_skills_count,
+    skill_gap_count = excluded.skill_gap_count,
+    calculated_at = now()
+WHERE mrs.readiness_score IS DISTINCT FROM excluded.readiness_score
+   OR mrs.readiness_level IS DISTINCT FROM excluded.readiness_level
+   OR mrs.matched_skills_count IS DISTINCT FROM excluded.matched_skills_count
+   OR mrs.required_skills_count IS DISTINCT FROM excluded.required_skills_count
+   OR mrs.skill_gap_count IS DISTINCT FROM excluded.skill_gap_count
+   OR EXISTS (SELECT 1 FROM students st
+              WHERE st.student_id = mrs.student_id AND st.created_at > mrs.calculated_at)
+   OR EXISTS (SELECT 1 FROM student_skills sk
+              WHERE sk.student_id = mrs.student_id AND sk.created_at > mrs.calculated_at)
+RETURNING (xmax = 0) AS inserted
+"""
+
+def calculate_scores_sql(session: Session, student_ids: Optional[list] = None,
+                         role_ids: Optional[list] = None) -> Dict:
+    """
+    Score and upsert every requested student-role pair inside PostgreSQL.
+
+    Produces the same rows as the rule-based calculate_readiness_score
+    (and skips unchanged rows like upsert_scores). The caller owns the
+    transaction and commits.
+
+    Args:
+        session: Database session
+        student_ids: List of student IDs (None = all students)
+        role_ids: List of role IDs (None = all roles)
+
+    Returns:
+        {'rows': int, 'inserted': int, 'updated': int, 'unchanged': int,
+         'seconds': float, 'rows_per_sec': float}
+    """
+    students_query = session.query(Student)
+    roles_query = session.query(JobRole)
+    params = {}
+    bind_types = []
+    if student_ids is not None:
+        students_query = students_query.filter(Student.student_id.in_(student_ids))
+        params['student_ids'] = list(student_ids)
+        bind_types.append(bindparam('student_ids', type_=ARRAY(Integer)))
+    if role_ids is not None:
+        roles_query = roles_query.filter(JobRole.role_id.in_(role_ids))
+        params['role_ids'] = list(role_ids)
+        bind_types.append(bindparam('role_ids', type_=ARRAY(Integer)))
+    total = students_query.count() * roles_query.count()
+
+    stmt = text(build_scoring_sql(student_ids is not None, role_ids is not None)).bindparams(*bind_types)
+
+    start = time.perf_counter()
+    inserted = 0
+    updated = 0
+    for (was_inserted,) in session.execute(stmt, params):
+        if was_inserted:
+            inserted += 1
+        else:
+            updated += 1
+    elapsed = time.perf_counter() - start
+
+    unchanged = total - inserted - updated
+    rows_per_sec = total / elapsed if elapsed > 0 else 0.0
+    print(f"  Scored {total} pairs in PostgreSQL in {elapsed:.2f}s ({rows_per_sec:,.0f} rows/sec): "
+          f"{inserted} inserted, {updated} updated, {unchanged} unchanged")
+
+    return {
+        'rows': total,
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': unchanged,
+        'seconds': elapsed,
+        'rows_per_sec': rows_per_sec
+    }
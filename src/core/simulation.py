@@ -0,0 +1,198 @@
+"""
+What-if simulation of job role requirement changes
+Proposed edits to importance_weight / required_proficiency are applied to an
+in-memory copy of the role matrix and the cohort is rescored against cached
+skill matrices; nothing is written to the database
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import threading
+import time
+import numpy as np
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from src.database.models import JobRole
+from src.core.role_cache import CACHE_TTL_SECONDS
+from src.core.score_batch import LEVEL_NAMES
+from src.core.scoring_matrix import (
+    REQUIRED_PROFICIENCY, _to_hundredths, load_student_skill_matrix, load_role_skill_matrix, score_matrices
+)
+
+_lock = threading.Lock()
+_cache = {
+    'base': None,
+    'loaded_at': 0.0
+}
+
+def _load_simulation_base(session: Session) -> Dict:
+    student_matrix = load_student_skill_matrix(session)
+    role_matrix = load_role_skill_matrix(session, student_matrix['skill_ids'])
+    baseline = score_matrices(student_matrix, role_matrix)
+    n_roles = len(role_matrix['role_ids'])
+
+    return {
+        'student_matrix': student_matrix,
+        'role_matrix': role_matrix,
+        'role_names': dict(session.query(JobRole.role_id, JobRole.role_name)),
+        'scores': baseline['readiness_score'].reshape(-1, n_roles),
+        'level_codes': baseline.level_code.reshape(-1, n_roles)
+    }
+
+def get_simulation_base(session: Session) -> Dict:
+    """
+    Get the cached skill matrices and baseline rule-based scores, loading them on first use.
+
+    Returns:
+        {
+            'student_matrix': Output of load_student_skill_matrix (all students),
+            'role_matrix': Output of load_role_skill_matrix (all roles),
+            'role_names': {role_id: role_name},
+            'scores': students × roles float64 matrix of rounded scores,
+            'level_codes': students × roles int8 matrix of level codes (see LEVEL_NAMES)
+        }
+        Shared between callers and must not be modified.
+
+    ORM writes to job roles, students and their skills in this process drop the
+    cache (see role_cache); edits made elsewhere are picked up after CACHE_TTL_SECONDS.
+    """
+    with _lock:
+        base = _cache['base']
+        if base is None or time.monotonic() - _cache['loaded_at'] > CACHE_TTL_SECONDS:
+            base = _load_simulation_base(session)
+            _cache['base'] = base
+            _cache['loaded_at'] = time.monotonic()
+        return base
+
+def invalidate_simulation_cache() -> None:
+    """Drop the cached matrices; the next simulation reloads them."""
+    with _lock:
+        _cache['base'] = None
+        _cache['loaded_at'] = 0.0
+
+def apply_requirement_edits(role_matrix: Dict, edits: List[Dict]) -> Dict:
+    """
+    Apply proposed requirement edits to a copy of the roles touched by them.
+
+    Args:
+        role_matrix: Output of load_role_skill_matrix
+        edits: [{'role_id': int, 'skill_id': int,
+                 'importance_weight': float (optional, 0-1),
+                 'required_proficiency': 'Beginner' | 'Intermediate' | 'Advanced' | 'Expert' (optional)}]
+               A skill the role does not require yet is added, which needs both values.
+
+    Returns:
+        role_matrix-shaped dict holding only the edited roles
+
+    Raises:
+        ValueError: Unknown role or skill, weight out of range, unknown
+                    proficiency level, or a new requirement missing a value
+    """
+    role_index = {int(role_id): j for j, role_id in enumerate(role_matrix['role_ids'])}
+    skill_index = {int(skill_id): k for k, skill_id in enumerate(role_matrix['skill_ids'])}
+
+    edited_rows = sorted({role_index.get(edit['role_id'], -1) for edit in edits})
+    if edited_rows and edited_rows[0] < 0:
+        unknown = [edit['role_id'] for edit in edits if edit['role_id'] not in role_index]
+        raise ValueError(f"Unknown role_id: {unknown[0]}")
+
+    rows = np.array(edited_rows, dtype=np.int64)
+    edited = {
+        'role_ids': role_matrix['role_ids'][rows],
+        'skill_ids': role_matrix['skill_ids'],
+        'required': role_matrix['required'][rows].copy(),
+        'required_proficiency': role_matrix['required_proficiency'][rows].copy(),
+        'importance_weight': role_matrix['importance_weight'][rows].copy()
+    }
+    row_of = {int(role_id): i for i, role_id in enumerate(edited['role_ids'])}
+
+    for edit in edits:
+        if edit['skill_id'] not in skill_index:
+            raise ValueError(f"Unknown skill_id: {edit['skill_id']}")
+        i = row_of[edit['role_id']]
+        k = skill_index[edit['skill_id']]
+        weight = edit.get('importance_weight')
+        level = edit.get('required_proficiency')
+
+        if not edited['required'][i, k] and (weight is None or level is None):
+            raise ValueError(f"Skill {edit['skill_id']} is not required by role {edit['role_id']}; "
+                             f"adding it needs both importance_weight and required_proficiency")
+        if weight is not None:
+            if not 0 <= weight <= 1:
+                raise ValueError(f"importance_weight must be between 0 and 1, got {weight}")
+            edited['importance_weight'][i, k] = _to_hundredths([weight])[0]
+        if level is not None:
+            if level not in REQUIRED_PROFICIENCY:
+                raise ValueError(f"Unknown proficiency level: {level}")
+            edited['required_proficiency'][i, k] = REQUIRED_PROFICIENCY[level]
+        edited['required'][i, k] = True
+
+    return edited
+
+def _level_summary(scores: np.ndarray, level_codes: np.ndarray) -> Dict:
+    summary = {'avg_score': round(float(scores.mean()), 2) if len(scores) else 0.0}
+    counts = np.bincount(level_codes, minlength=len(LEVEL_NAMES))
+    for code in reversed(range(len(LEVEL_NAMES))):
+        summary[str(LEVEL_NAMES[code])] = int(counts[code])
+    return summary
+
+def simulate_requirement_changes(session: Session, edits: List[Dict]) -> Dict:
+    """
+    Rescore the cohort in memory under proposed requirement edits.
+
+    Only the edited roles are rescored, in float64 like the stored
+    rule-based scores (calculate_all_scores without exact), so the baseline
+    matches the scores shown elsewhere; every other role keeps its cached
+    baseline.
+
+    Args:
+        session: Database session (used only to load the cache)
+        edits: Requirement edits (see apply_requirement_edits)
+
+    Returns:
+        {
+            'roles': [{'role_id', 'role_name', 'baseline': summary, 'simulated': summary}]
+                     for every role, where summary = {'avg_score', 'Ready', 'Developing', 'Entry-Level'},
+            'cohort': {'baseline': summary, 'simulated': summary} over all student-role pairs,
+            'promoted': pairs moving to a higher level,
+            'demoted': pairs moving to a lower level,
+            'seconds': simulation time excluding the cache load
+        }
+    """
+    base = get_simulation_base(session)
+    start = time.perf_counter()
+
+    scores = base['scores']
+    level_codes = base['level_codes']
+    if edits:
+        edited = apply_requirement_edits(base['role_matrix'], edits)
+        rescored = score_matrices(base['student_matrix'], edited)
+        columns = np.searchsorted(base['role_matrix']['role_ids'], edited['role_ids'])
+        scores = scores.copy()
+        level_codes = level_codes.copy()
+        scores[:, columns] = rescored.readiness_score.reshape(-1, len(columns))
+        level_codes[:, columns] = rescored.level_code.reshape(-1, len(columns))
+
+    roles = [
+        {
+            'role_id': int(role_id),
+            'role_name': base['role_names'].get(int(role_id)),
+            'baseline': _level_summary(base['scores'][:, j], base['level_codes'][:, j]),
+            'simulated': _level_summary(scores[:, j], level_codes[:, j])
+        }
+        for j, role_id in enumerate(base['role_matrix']['role_ids'])
+    ]
+
+    return {
+        'roles': roles,
+        'cohort': {
+            'baseline': _level_summary(base['scores'].ravel(), base['level_codes'].ravel()),
+            'simulated': _level_summary(scores.ravel(), level_codes.ravel())
+        },
+        'promoted': int((level_codes > base['level_codes']).sum()),
+        'demoted': int((level_codes < base['level_codes']).sum()),
+        'seconds': time.perf_counter() - start
+    }
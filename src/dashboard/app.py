@@ -9,6 +9,7 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import time
 from datetime import datetime
 from sqlalchemy import func, distinct, and_, or_
 from src.database.connection import get_db_session
@@ -327,12 +328,24 @@ def load_skill_gap_data():
     """Load skill gap analysis data - shows current student numbers lacking each skill."""
     session = get_db_session()
     try:
-        # Get all required skills from job roles
-        required_skills = session.query(
-            JobRoleSkills.skill_id,
-            func.count(func.distinct(JobRoleSkills.role_id)).label('role_count'),
-            func.avg(JobRoleSkills.importance_weight).label('avg_weight')
-        ).group_by(JobRoleSkills.skill_id).all()
+        # Get all required skills from the shared role requirements cache
+        from src.core.role_cache import get_all_role_requirements
+        required_skills = {}
+        for requirements in get_all_role_requirements(session).values():
+            for skill_id, skill_name, category, weight in zip(
+                requirements['skill_ids'],
+                requirements['skill_names'],
+                requirements['skill_categories'],
+                requirements['importance_weight']
+            ):
+                entry = required_skills.setdefault(skill_id, {
+                    'name': skill_name,
+                    'category': category,
+                    'role_count': 0,
+                    'weights': []
+                })
+                entry['role_count'] += 1
+                entry['weights'].append(weight)
         
         # Get skills that students have
         student_skills = session.query(
@@ -345,18 +358,16 @@ def load_skill_gap_data():
         
         # Calculate missing counts
         gaps = []
-        for skill_id, role_count, avg_weight in required_skills:
-            skill = session.query(SkillsMaster).filter_by(skill_id=skill_id).first()
-            if skill:
-                students_with_skill = student_skill_dict.get(skill_id, 0)
-                missing_count = total_students - students_with_skill
-                gaps.append({
-                    'Skill': skill.skill_name,
-                    'Category': skill.category or 'Other',
-                    'Missing Count': missing_count,
-                    'Role Count': role_count,
-                    'Importance': float(avg_weight) if avg_weight else 0.5
-                })
+        for skill_id, entry in required_skills.items():
+            students_with_skill = student_skill_dict.get(skill_id, 0)
+            missing_count = total_students - students_with_skill
+            gaps.append({
+                'Skill': entry['name'],
+                'Category': entry['category'] or 'Other',
+                'Missing Count': missing_count,
+                'Role Count': entry['role_count'],
+                'Importance': float(sum(entry['weights']) / len(entry['weights']))
+            })
         
         # Sort by missing count
         gaps.sort(key=lambda x: x['Missing Count'], reverse=True)
@@ -365,6 +376,67 @@ def load_skill_gap_data():
     finally:
         session.close()
 
+@st.cache_data(ttl=0)  # No cache - always fetch fresh data
+def load_skill_recommendations():
+    """Load the stored top-k skill recommendations (see src/core/recommendations.py)."""
+    session = get_db_session()
+    try:
+        data = session.query(
+            SkillRecommendation.student_id,
+            Student.name,
+            JobRole.role_name,
+            SkillRecommendation.rank,
+            SkillsMaster.skill_name,
+            SkillRecommendation.action,
+            SkillRecommendation.target_proficiency,
+            SkillRecommendation.current_score,
+            SkillRecommendation.projected_score,
+            SkillRecommendation.score_gain,
+            SkillRecommendation.calculated_at
+        ).join(
+            Student, SkillRecommendation.student_id == Student.student_id
+        ).join(
+            JobRole, SkillRecommendation.role_id == JobRole.role_id
+        ).join(
+            SkillsMaster, SkillRecommendation.skill_id == SkillsMaster.skill_id
+        ).order_by(SkillRecommendation.student_id, SkillRecommendation.rank).all()
+        
+        df = pd.DataFrame(data, columns=[
+            'Student ID', 'Name', 'Role', 'Rank', 'Skill', 'Action',
+            'Target Level', 'Current Score', 'Projected Score', 'Score Gain', 'Computed At'
+        ])
+        for col in ['Current Score', 'Projected Score', 'Score Gain']:
+            df[col] = df[col].astype(float)
+        return df
+    finally:
+        session.close()
+
+@st.cache_data(ttl=0)  # No cache - always fetch fresh data
+def load_role_requirement_table():
+    """Load every role's current skill requirements for the what-if simulator."""
+    session = get_db_session()
+    try:
+        data = session.query(
+            JobRole.role_id,
+            JobRole.role_name,
+            JobRoleSkills.skill_id,
+            SkillsMaster.skill_name,
+            JobRoleSkills.required_proficiency,
+            JobRoleSkills.importance_weight
+        ).join(
+            JobRoleSkills, JobRole.role_id == JobRoleSkills.role_id
+        ).join(
+            SkillsMaster, JobRoleSkills.skill_id == SkillsMaster.skill_id
+        ).order_by(JobRole.role_id, JobRoleSkills.id).all()
+        
+        df = pd.DataFrame(data, columns=[
+            'Role ID', 'Role', 'Skill ID', 'Skill', 'Required Proficiency', 'Importance Weight'
+        ])
+        df['Importance Weight'] = df['Importance Weight'].astype(float)
+        return df
+    finally:
+        session.close()
+
 @st.cache_data(ttl=0)  # No cache - always fetch fresh data
 def load_student_table_data():
     """Load student table data for drill-down - one record per student showing best score."""
@@ -775,6 +847,163 @@ def render_skill_gap_section():
         """, unsafe_allow_html=True)
     else:
         st.info("Skill gap analysis data is being processed. Please check back shortly.")
+    
+    render_skill_recommendations()
+
+def render_skill_recommendations():
+    """Render per-student next-skill recommendations ranked by readiness score gain."""
+    st.markdown('<div class="section-header">Recommended Next Skills</div>', unsafe_allow_html=True)
+    
+    df_recs = load_skill_recommendations()
+    if df_recs.empty:
+        st.info("No recommendations yet. Run: python src/core/recommendations.py")
+        return
+    
+    st.caption(f"Computed between {df_recs['Computed At'].min():%Y-%m-%d %H:%M} and "
+               f"{df_recs['Computed At'].max():%Y-%m-%d %H:%M}. Refresh them after rescoring with "
+               "python src/core/recommendations.py or scoring.py --refresh-recommendations.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Skills that appear most often as a student's top recommendation
+        top_picks = df_recs[df_recs['Rank'] == 1].groupby('Skill').agg(
+            Students=('Student ID', 'count'),
+            Avg_Gain=('Score Gain', 'mean')
+        ).reset_index().sort_values('Students', ascending=True).tail(10)
+        
+        fig = px.bar(
+            top_picks,
+            x='Students',
+            y='Skill',
+            orientation='h',
+            color='Avg_Gain',
+            color_continuous_scale='Blues',
+            labels={'Avg_Gain': 'Avg Gain'},
+            title='Most Common Top Recommendation'
+        )
+        fig.update_layout(height=400, margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        students = df_recs[['Student ID', 'Name']].drop_duplicates()
+        selected = st.selectbox(
+            "Student",
+            options=students['Student ID'].tolist(),
+            format_func=lambda sid: f"{sid} - {students.loc[students['Student ID'] == sid, 'Name'].iloc[0]}"
+        )
+        student_recs = df_recs[df_recs['Student ID'] == selected]
+        st.markdown(f"**Role:** {student_recs['Role'].iloc[0]} &nbsp; "
+                    f"**Current Score:** {student_recs['Current Score'].iloc[0]:.2f}")
+        st.dataframe(
+            student_recs[['Rank', 'Skill', 'Action', 'Target Level', 'Projected Score', 'Score Gain']],
+            hide_index=True,
+            use_container_width=True
+        )
+
+def render_requirement_simulator():
+    """Render the what-if simulator for proposed job role requirement changes."""
+    from src.core.simulation import simulate_requirement_changes
+    from src.core.scoring import PROFICIENCY_MAP
+    
+    st.markdown('<div class="section-header">Role Requirement What-If Simulator</div>', unsafe_allow_html=True)
+    st.caption("Edit required proficiencies and importance weights to preview the cohort's rule-based "
+               "readiness. Nothing is saved to the database.")
+    
+    df_requirements = load_role_requirement_table()
+    if df_requirements.empty:
+        st.info("No job role requirements found. Please run the data pipeline first.")
+        return
+    
+    selected_roles = st.multiselect(
+        "Roles to edit",
+        options=df_requirements['Role'].unique().tolist(),
+        default=df_requirements['Role'].iloc[:1].tolist()
+    )
+    
+    edits = []
+    for role_name in selected_roles:
+        current = df_requirements[df_requirements['Role'] == role_name].reset_index(drop=True)
+        st.markdown(f"**{role_name}**")
+        proposed = st.data_editor(
+            current[['Skill', 'Required Proficiency', 'Importance Weight']],
+            column_config={
+                'Skill': st.column_config.TextColumn(disabled=True),
+                'Required Proficiency': st.column_config.SelectboxColumn(
+                    options=list(PROFICIENCY_MAP.keys()), required=True
+                ),
+                'Importance Weight': st.column_config.NumberColumn(
+                    min_value=0.0, max_value=1.0, step=0.05, format="%.2f", required=True
+                )
+            },
+            hide_index=True,
+            use_container_width=True,
+            key=f"simulator_{role_name}"
+        )
+        for i, row in current.iterrows():
+            edit = {}
+            if proposed.at[i, 'Required Proficiency'] != row['Required Proficiency']:
+                edit['required_proficiency'] = proposed.at[i, 'Required Proficiency']
+            if round(float(proposed.at[i, 'Importance Weight']), 2) != round(row['Importance Weight'], 2):
+                edit['importance_weight'] = round(float(proposed.at[i, 'Importance Weight']), 2)
+            if edit:
+                edits.append({'role_id': int(row['Role ID']), 'skill_id': int(row['Skill ID']), **edit})
+    
+    session = get_db_session()
+    try:
+        result = simulate_requirement_changes(session, edits)
+    except ValueError as e:
+        st.error(f"Invalid edit: {e}")
+        return
+    finally:
+        session.close()
+    
+    baseline = result['cohort']['baseline']
+    simulated = result['cohort']['simulated']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Avg Score", f"{simulated['avg_score']:.2f}%",
+                  f"{simulated['avg_score'] - baseline['avg_score']:+.2f}")
+    with col2:
+        st.metric("Ready Pairs", simulated['Ready'], simulated['Ready'] - baseline['Ready'])
+    with col3:
+        st.metric("Promoted Pairs", result['promoted'])
+    with col4:
+        st.metric("Demoted Pairs", result['demoted'], delta_color="inverse")
+    
+    rows = []
+    for role in result['roles']:
+        for scenario in ('baseline', 'simulated'):
+            for level in ('Ready', 'Developing', 'Entry-Level'):
+                rows.append({
+                    'Role': role['role_name'],
+                    'Scenario': scenario.title(),
+                    'Level': level,
+                    'Students': role[scenario][level]
+                })
+    df_impact = pd.DataFrame(rows)
+    
+    fig = px.bar(
+        df_impact,
+        x='Scenario',
+        y='Students',
+        color='Level',
+        facet_col='Role',
+        color_discrete_map={
+            'Ready': '#059669',
+            'Developing': '#d97706',
+            'Entry-Level': '#dc2626'
+        }
+    )
+    fig.update_layout(
+        height=420,
+        font=dict(family="Arial, sans-serif", size=11),
+        margin=dict(l=20, r=20, t=60, b=20)
+    )
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.caption(f"Simulated {len(edits)} requirement change(s) in {result['seconds'] * 1000:.1f} ms")
 
 def render_data_table():
     """Render filterable student data table - showing unique students only."""
@@ -1168,33 +1397,39 @@ def render_ml_section():
     session = get_db_session()
     try:
         # Get sample predictions for comparison
-        from src.core.scoring import calculate_readiness_score
+        from src.core.scoring_matrix import calculate_scores_matrix
         from src.ml_models.predict import predict_readiness_ml
         
         # Get a few students for comparison
-        students = session.query(Student).limit(10).all()
-        roles = session.query(JobRole).all()
+        students = session.query(Student).order_by(Student.student_id).limit(5).all()  # Compare first 5 students
+        roles = session.query(JobRole).order_by(JobRole.role_id).limit(2).all()  # Compare first 2 roles
+        
+        # Rule-based scores for all sample pairs at once (student-major ScoreBatch)
+        rule_scores = calculate_scores_matrix(
+            session,
+            student_ids=[student.student_id for student in students],
+            role_ids=[role.role_id for role in roles]
+        )
+        rule_levels = rule_scores.readiness_level
         
         comparison_data = []
-        for student in students[:5]:  # Compare first 5 students
-            for role in roles[:2]:  # Compare first 2 roles
-                # Rule-based prediction (explicitly request rule-based)
-                rule_result = calculate_readiness_score(student.student_id, role.role_id, session, use_ml=False)
-                
-                # ML prediction
-                ml_result = predict_readiness_ml(student.student_id, role.role_id, session)
-                
-                if not ml_result.get('error'):
-                    comparison_data.append({
-                        'Student': student.name,
-                        'Program': student.program,
-                        'Role': role.role_name,
-                        'Rule-Based Score': f"{rule_result['readiness_score']:.1f}%",
-                        'ML Score': f"{ml_result['readiness_score_ml']:.1f}%",
-                        'Rule-Based Level': rule_result['readiness_level'],
-                        'ML Level': ml_result['readiness_level_ml'],
-                        'Difference': f"{abs(rule_result['readiness_score'] - ml_result['readiness_score_ml']):.1f}%"
-                    })
+        for i, (student, role) in enumerate((student, role) for student in students for role in roles):
+            rule_score = float(rule_scores.readiness_score[i])
+            
+            # ML prediction
+            ml_result = predict_readiness_ml(student.student_id, role.role_id, session, outputs=('score', 'level'))
+            
+            if not ml_result.get('error'):
+                comparison_data.append({
+                    'Student': student.name,
+                    'Program': student.program,
+                    'Role': role.role_name,
+                    'Rule-Based Score': f"{rule_score:.1f}%",
+                    'ML Score': f"{ml_result['readiness_score_ml']:.1f}%",
+                    'Rule-Based Level': rule_levels[i],
+                    'ML Level': ml_result['readiness_level_ml'],
+                    'Difference': f"{abs(rule_score - ml_result['readiness_score_ml']):.1f}%"
+                })
         
         if comparison_data:
             df_comparison = pd.DataFrame(comparison_data)
@@ -1598,44 +1833,28 @@ def render_prediction_form():
                                 st.error("Invalid role selected.")
                                 return
                             
-                            # Create temporary student record
-                            from src.database.models import Student, StudentSkills
-                            from datetime import date
+                            # Predict straight from the submitted portfolio (nothing is written)
+                            from src.ml_models.predict import predict_readiness_from_portfolio
                             
-                            temp_student = Student(
-                                name=student_name,
-                                email=f"temp_{student_name.lower().replace(' ', '_')}@temp.com",
-                                program=program,
-                                year_of_study=year_of_study,
-                                enrollment_year=enrollment_year,
-                                target_role=target_role
-                            )
-                            session.add(temp_student)
-                            session.flush()
-                            
-                            # Add skills
-                            for skill_id, skill_data in selected_skills.items():
-                                temp_skill = StudentSkills(
-                                    student_id=temp_student.student_id,
-                                    skill_id=skill_id,
-                                    proficiency_level=skill_data['proficiency'],
-                                    proficiency_score=skill_data['proficiency_score'],
-                                    acquisition_date=date.today(),
-                                    source="Manual Entry"
-                                )
-                                session.add(temp_skill)
-                            
-                            session.commit()
-                            
-                            # Get predictions from all models
-                            from src.ml_models.predict import predict_readiness_ml
-                            
-                            predictions = predict_readiness_ml(temp_student.student_id, role.role_id, session)
+                            portfolio = {
+                                'program': program,
+                                'year_of_study': year_of_study,
+                                'enrollment_year': enrollment_year,
+                                'role_id': role.role_id,
+                                'skills': [
+                                    {'skill_id': skill_id, 'proficiency_level': skill_data['proficiency'],
+                                     'proficiency_score': skill_data['proficiency_score']}
+                                    for skill_id, skill_data in selected_skills.items()
+                                ]
+                            }
+                            start = time.perf_counter()
+                            predictions = predict_readiness_from_portfolio(portfolio, session)
+                            elapsed_ms = (time.perf_counter() - start) * 1000
                             
                             if predictions.get('error'):
                                 st.error(f"Prediction error: {predictions['error']}")
                             else:
-                                st.success("✓ Predictions generated successfully!")
+                                st.success(f"✓ Predictions generated in {elapsed_ms:.0f} ms")
                                 
                                 # Display predictions
                                 st.markdown("### Prediction Results")
@@ -1681,17 +1900,58 @@ def render_prediction_form():
                                     ])
                                     st.dataframe(prob_df, use_container_width=True)
                                 
-                                # Cleanup temporary student
-                                session.query(StudentSkills).filter_by(student_id=temp_student.student_id).delete()
-                                session.delete(temp_student)
-                                session.commit()
-                                
                         except Exception as e:
-                            session.rollback()
                             st.error(f"Error generating predictions: {str(e)}")
     finally:
         session.close()
 
+def render_bulk_prediction():
+    """Render CSV upload for what-if predictions over a list of hypothetical students."""
+    from src.etl.csv_loader import load_portfolios_csv, get_csv_format_requirements
+    from src.ml_models.bulk_prediction import predict_portfolio_table
+    
+    st.markdown('<div class="section-header">Bulk What-If Prediction</div>', unsafe_allow_html=True)
+    st.caption("Upload an intake list of prospective students to predict their readiness in one batch. "
+               "Nothing is saved to the database.")
+    
+    requirements = get_csv_format_requirements()['portfolios']
+    with st.expander("CSV format"):
+        st.markdown(f"{requirements['layout']}. Required columns: `{'`, `'.join(requirements['required_columns'])}`; "
+                    f"optional: `{'`, `'.join(requirements['optional_columns'])}`. Students whose target role is "
+                    f"blank or not a scored role are predicted for every role.")
+        st.dataframe(pd.DataFrame([requirements['example']]), hide_index=True, use_container_width=True)
+    
+    uploaded = st.file_uploader("Portfolio CSV", type=['csv'], key="bulk_prediction_csv")
+    all_roles = st.checkbox("Predict every role for every student", value=False)
+    if uploaded is None:
+        return
+    
+    portfolio_df, error = load_portfolios_csv(uploaded)
+    if error:
+        st.error(error)
+        return
+    
+    session = get_db_session()
+    try:
+        with st.spinner("Calculating predictions..."):
+            start = time.perf_counter()
+            result = predict_portfolio_table(session, portfolio_df, all_roles=all_roles)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+    except ValueError as e:
+        st.error(str(e))
+        return
+    finally:
+        session.close()
+    
+    st.success(f"✓ {len(result)} predictions for {portfolio_df['name'].nunique()} students in {elapsed_ms:.0f} ms")
+    st.dataframe(result, hide_index=True, use_container_width=True)
+    st.download_button(
+        "Download predictions (CSV)",
+        data=result.to_csv(index=False).encode('utf-8'),
+        file_name="readiness_predictions.csv",
+        mime="text/csv"
+    )
+
 def render_about_section():
     """Render about section with data information."""
     st.markdown('<div class="section-header">About the System</div>', unsafe_allow_html=True)
@@ -1789,6 +2049,7 @@ def main():
                 "Skill Gap Analysis",
                 "ML Predictions",
                 "New Prediction",
+                "What-If Simulator",
                 "Data Explorer"
             ],
             label_visibility="collapsed"
@@ -1818,6 +2079,10 @@ def main():
         render_ml_section()
     elif page == "New Prediction":
         render_prediction_form()
+        st.markdown("<br>", unsafe_allow_html=True)
+        render_bulk_prediction()
+    elif page == "What-If Simulator":
+        render_requirement_simulator()
     elif page == "Data Explorer":
         render_data_table()
 
@@ -5,14 +5,24 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from sqlalchemy import text
 from src.database.connection import Base, get_engine
 from src.database.models import *
 
+# Columns added to existing tables after they were first created;
+# create_all() only creates missing tables, so these are added in place
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE scoring_runs ADD COLUMN IF NOT EXISTS scores_changed INTEGER NOT NULL DEFAULT 0",
+]
+
 def create_tables():
-    """Create all database tables."""
+    """Create all database tables and add columns missing from existing ones."""
     print("Creating database tables...")
     engine = get_engine()
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for ddl in COLUMN_MIGRATIONS:
+            conn.execute(text(ddl))
     print("✓ Tables created successfully!")
 
 if __name__ == "__main__":
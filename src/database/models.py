@@ -123,3 +123,77 @@ class MarketReadinessScores(Base):
         Index('idx_readiness_score', 'readiness_score'),
     )
 
+
+
+class ScoringJob(Base):
+    """Distributed scoring work queue: one row per student_id range"""
+    __tablename__ = 'scoring_jobs'
+    
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(String(36), nullable=False)
+    start_student_id = Column(Integer, nullable=False)
+    end_student_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100))
+    lease_expires_at = Column(TIMESTAMP)
+    scores_written = Column(Integer, default=0)
+    error = Column(String)
+    created_at = Column(TIMESTAMP, default=func.now())
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
+    
+    __table_args__ = (
+        CheckConstraint('status IN (\'pending\', \'running\', \'done\', \'failed\')', name='check_job_status'),
+        CheckConstraint('start_student_id <= end_student_id', name='check_job_range'),
+        Index('idx_scoring_jobs_claim', 'batch_id', 'status', 'job_id'),
+    )
+
+
+class ScoringRun(Base):
+    """Checkpoint of a cohort scoring run, so an interrupted run can resume"""
+    __tablename__ = 'scoring_runs'
+    
+    run_id = Column(Integer, primary_key=True, autoincrement=True)
+    mode = Column(String(20), nullable=False)
+    scope = Column(String(20), nullable=False, default='all')
+    status = Column(String(20), nullable=False, default='running')
+    last_student_id = Column(Integer)
+    students_processed = Column(Integer, nullable=False, default=0)
+    scores_written = Column(Integer, nullable=False, default=0)
+    scores_changed = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    started_at = Column(TIMESTAMP, default=func.now())
+    updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
+    finished_at = Column(TIMESTAMP)
+    
+    __table_args__ = (
+        CheckConstraint('mode IN (\'ml\', \'rule-based\')', name='check_run_mode'),
+        CheckConstraint('scope IN (\'all\', \'incremental\')', name='check_run_scope'),
+        CheckConstraint('status IN (\'running\', \'completed\', \'failed\')', name='check_run_status'),
+        Index('idx_scoring_runs_resume', 'mode', 'scope', 'status'),
+    )
+
+
+class SkillRecommendation(Base):
+    """Top-k next skills per student, ranked by readiness score gain"""
+    __tablename__ = 'skill_recommendations'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id = Column(Integer, ForeignKey('students.student_id', ondelete='CASCADE'), nullable=False)
+    role_id = Column(Integer, ForeignKey('job_roles.role_id', ondelete='CASCADE'), nullable=False)
+    skill_id = Column(Integer, ForeignKey('skills_master.skill_id', ondelete='CASCADE'), nullable=False)
+    rank = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)
+    current_proficiency = Column(DECIMAL(3, 2))
+    target_proficiency = Column(String(20), nullable=False)
+    current_score = Column(DECIMAL(5, 2), nullable=False)
+    projected_score = Column(DECIMAL(5, 2), nullable=False)
+    score_gain = Column(DECIMAL(5, 2), nullable=False)
+    calculated_at = Column(TIMESTAMP, default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('student_id', 'rank', name='unique_student_rank'),
+        CheckConstraint('action IN (\'acquire\', \'upgrade\')', name='check_recommendation_action'),
+        Index('idx_recommendations_student', 'student_id'),
+    )
@@ -10,8 +10,8 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.etl.data_validator import (
-    validate_student_data, validate_skills_data,
-    clean_student_data, clean_skills_data
+    validate_student_data, validate_skills_data, validate_portfolio_data,
+    clean_student_data, clean_skills_data, clean_portfolio_data
 )
 
 def load_students_csv(csv_path: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
@@ -82,6 +82,40 @@ def load_skills_csv(csv_path: str) -> Tuple[Optional[pd.DataFrame], Optional[str
     except Exception as e:
         return None, f"Error loading CSV: {str(e)}"
 
+def load_portfolios_csv(csv_path) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Load and validate hypothetical student portfolios from a CSV file.
+    
+    Args:
+        csv_path: Path to CSV file (or a file-like object, e.g. a dashboard upload)
+    
+    Returns:
+        Tuple of (DataFrame, error_message)
+        Returns (None, error_message) if loading fails
+    """
+    try:
+        # Load CSV
+        df = pd.read_csv(csv_path, dtype={'name': str, 'skill_name': str})
+        
+        # Clean data
+        df_clean = clean_portfolio_data(df)
+        
+        # Validate data
+        is_valid, errors = validate_portfolio_data(df_clean)
+        
+        if not is_valid:
+            error_msg = "Validation errors:\n" + "\n".join(f"  - {e}" for e in errors)
+            return None, error_msg
+        
+        return df_clean, None
+    
+    except FileNotFoundError:
+        return None, f"CSV file not found: {csv_path}"
+    except pd.errors.EmptyDataError:
+        return None, "CSV file is empty"
+    except Exception as e:
+        return None, f"Error loading CSV: {str(e)}"
+
 def get_csv_format_requirements() -> dict:
     """
     Get CSV format requirements for documentation.
@@ -116,6 +150,23 @@ def get_csv_format_requirements() -> dict:
                 'acquisition_date': '2023-01-15',
                 'source': 'Course'
             }
+        },
+        'portfolios': {
+            'required_columns': ['name', 'program', 'year_of_study', 'enrollment_year', 'skill_name', 'proficiency_level'],
+            'optional_columns': ['target_role', 'source'],
+            'layout': 'One row per student skill; a row with an empty skill_name is a student without skills',
+            'proficiency_levels': ['Beginner', 'Intermediate', 'Advanced', 'Expert'],
+            'sources': ['Course', 'Certification', 'Project', 'Workshop'],
+            'example': {
+                'name': 'Jane Doe',
+                'program': 'BBA',
+                'year_of_study': 1,
+                'enrollment_year': 2025,
+                'target_role': 'Business Analyst',
+                'skill_name': 'Excel',
+                'proficiency_level': 'Intermediate',
+                'source': 'Course'
+            }
         }
     }
 
@@ -160,3 +160,94 @@ def clean_skills_data(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_clean
 
+
+def validate_portfolio_data(df: pd.DataFrame) -> Tuple[bool, List[str]]:
+    """
+    Validate a hypothetical-portfolio DataFrame (one row per student skill).
+    
+    Args:
+        df: Cleaned DataFrame (see clean_portfolio_data)
+    
+    Returns:
+        Tuple of (is_valid, list_of_errors)
+    """
+    errors = []
+    required_columns = ['name', 'program', 'year_of_study', 'enrollment_year', 'skill_name', 'proficiency_level']
+    
+    # Check required columns
+    missing_cols = set(required_columns) - set(df.columns)
+    if missing_cols:
+        errors.append(f"Missing required columns: {missing_cols}")
+    
+    if errors:
+        return False, errors
+    
+    # Student columns must be present on every row
+    for col in ['name', 'program', 'year_of_study', 'enrollment_year']:
+        null_count = df[col].isnull().sum()
+        if null_count > 0:
+            errors.append(f"Column '{col}' has {null_count} null values")
+    
+    invalid_programs = df[df['program'].notna() & ~df['program'].isin(VALID_PROGRAMS)]
+    if not invalid_programs.empty:
+        errors.append(f"Invalid program values: {invalid_programs['program'].unique().tolist()}")
+    
+    invalid_years = df[(df['year_of_study'] < 1) | (df['year_of_study'] > 4)]
+    if not invalid_years.empty:
+        errors.append(f"Invalid year_of_study values (must be 1-4): {invalid_years['year_of_study'].unique().tolist()}")
+    
+    invalid_enrollment = df[(df['enrollment_year'] < 2020) | (df['enrollment_year'] > 2030)]
+    if not invalid_enrollment.empty:
+        errors.append(f"Invalid enrollment_year values (must be 2020-2030): {invalid_enrollment['enrollment_year'].unique().tolist()}")
+    
+    # A student without skills is one row with an empty skill_name
+    has_skill = df['skill_name'].notna()
+    invalid_proficiency = df[has_skill & ~df['proficiency_level'].isin(VALID_PROFICIENCY_LEVELS)]
+    if not invalid_proficiency.empty:
+        errors.append(f"Invalid proficiency_level values: {invalid_proficiency['proficiency_level'].unique().tolist()}")
+    
+    if 'source' in df.columns:
+        invalid_sources = df[has_skill & df['source'].notna() & ~df['source'].isin(VALID_SOURCES)]
+        if not invalid_sources.empty:
+            errors.append(f"Invalid source values: {invalid_sources['source'].unique().tolist()}")
+    
+    duplicates = df[has_skill & df.duplicated(['name', 'skill_name'])]
+    if not duplicates.empty:
+        errors.append(f"Skills listed more than once for: {duplicates['name'].unique().tolist()}")
+    
+    student_columns = [c for c in ['program', 'year_of_study', 'enrollment_year', 'target_role'] if c in df.columns]
+    conflicting = df.groupby('name')[student_columns].nunique(dropna=False).max(axis=1) > 1
+    if conflicting.any():
+        errors.append(f"Conflicting student details across rows for: {conflicting[conflicting].index.tolist()}")
+    
+    return len(errors) == 0, errors
+
+def clean_portfolio_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean and normalize hypothetical-portfolio data.
+    
+    Unlike clean_student_data, empty cells stay null (a blank skill_name
+    marks a student without skills, a blank source counts in no source).
+    
+    Args:
+        df: Raw portfolio DataFrame
+    
+    Returns:
+        Cleaned DataFrame
+    """
+    df_clean = df.copy()
+    
+    # Normalize column names to lowercase
+    df_clean.columns = df_clean.columns.str.lower().str.strip()
+    
+    # Strip whitespace from string columns, keeping empty cells null
+    string_cols = df_clean.select_dtypes(include=['object']).columns
+    for col in string_cols:
+        df_clean[col] = df_clean[col].str.strip().replace('', None)
+    
+    # Ensure proper data types
+    for col in ['year_of_study', 'enrollment_year']:
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').astype('Int64')
+    
+    return df_clean
@@ -0,0 +1,163 @@
+"""
+Bulk what-if predictions for hypothetical students
+Reads an intake list of prospective students and their skills (see
+load_portfolios_csv), builds the whole feature matrix in memory and
+predicts it with one call per model; nothing is written to the database
+
+Usage:
+    python src/ml_models/bulk_prediction.py intake.csv [--output predictions.csv] [--all-roles]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import time
+import pandas as pd
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+
+from src.ml_models.feature_extraction import get_feature_catalog, extract_features_for_portfolios
+from src.ml_models.predict import FEATURE_COLUMNS, COUNT_COLUMNS, load_models, predict_features
+
+# Student columns repeated on every output row
+STUDENT_COLUMNS = ['name', 'program', 'year_of_study', 'enrollment_year']
+
+def build_portfolios(session: Session, portfolio_df: pd.DataFrame, all_roles: bool = False) -> Tuple[List[Dict], pd.DataFrame]:
+    """
+    Group portfolio CSV rows into one portfolio per student and role.
+
+    Args:
+        session: Database session (only read, to fill the feature catalog)
+        portfolio_df: Output of load_portfolios_csv
+        all_roles: Predict every role for every student; otherwise only a student's
+                   target_role, or every role if it is blank or not a scored role
+
+    Returns:
+        (portfolios for extract_features_for_portfolios,
+         DataFrame with STUDENT_COLUMNS and role_name per portfolio)
+
+    Raises:
+        ValueError: Unknown skill names
+    """
+    catalog = get_feature_catalog(session)
+    role_ids = {name: role_id for role_id, name in catalog['role_names'].items()}
+
+    skill_names = portfolio_df['skill_name'].dropna()
+    unknown_skills = sorted(set(skill_names) - set(catalog['skill_ids']))
+    if unknown_skills:
+        raise ValueError(f"Unknown skills: {unknown_skills}")
+
+    every_role = sorted(role_ids.items(), key=lambda item: item[1])
+    has_target = 'target_role' in portfolio_df.columns
+
+    # One pass over the rows, in file order (a student's rows need not be adjacent)
+    students = {}
+    for record in portfolio_df.to_dict('records'):
+        student = students.setdefault(record['name'], {'first': record, 'skills': []})
+        if pd.notna(record['skill_name']):
+            source = record.get('source')
+            student['skills'].append({
+                'skill_id': catalog['skill_ids'][record['skill_name']],
+                'proficiency_level': record['proficiency_level'],
+                'source': source if pd.notna(source) else None
+            })
+
+    portfolios, rows = [], []
+    for student in students.values():
+        first, skills = student['first'], student['skills']
+        target = first['target_role'] if has_target else None
+        if all_roles or target not in role_ids:
+            student_roles = every_role
+        else:
+            student_roles = [(target, role_ids[target])]
+
+        for role_name, role_id in student_roles:
+            portfolios.append({
+                'program': first['program'],
+                'year_of_study': int(first['year_of_study']),
+                'enrollment_year': int(first['enrollment_year']),
+                'role_id': role_id,
+                'skills': skills
+            })
+            rows.append({**{col: first[col] for col in STUDENT_COLUMNS}, 'role_name': role_name})
+
+    return portfolios, pd.DataFrame(rows, columns=STUDENT_COLUMNS + ['role_name'])
+
+def predict_portfolio_table(session: Session, portfolio_df: pd.DataFrame, all_roles: bool = False) -> pd.DataFrame:
+    """
+    Predict readiness for every hypothetical student in a portfolio table.
+
+    The feature matrix is built in memory (extract_features_for_portfolios)
+    and each model is called once on all rows.
+
+    Args:
+        session: Database session (only read)
+        portfolio_df: Output of load_portfolios_csv
+        all_roles: Predict every role instead of each student's target_role (see build_portfolios)
+
+    Returns:
+        DataFrame with STUDENT_COLUMNS, role_name, the COUNT_COLUMNS,
+        readiness_score_ml (Random Forest), readiness_level_ml and
+        probability_<level> (Decision Tree) and gb_readiness_level_ml
+        (Gradient Boosting, if trained)
+
+    Raises:
+        ValueError: Invalid portfolios (see build_portfolios) or models not trained
+    """
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        raise ValueError("Models not trained. Please run train_models.py first.")
+
+    portfolios, result = build_portfolios(session, portfolio_df, all_roles=all_roles)
+    if not portfolios:
+        return result
+
+    features_df = extract_features_for_portfolios(session, portfolios)
+    predictions = predict_features(features_df, classifier, regressor, label_encoder, chunk_size=len(features_df))
+    result = pd.concat([result, features_df[COUNT_COLUMNS], predictions], axis=1)
+
+    if gb_classifier is not None:
+        X = features_df.reindex(columns=FEATURE_COLUMNS, fill_value=0)
+        result['gb_readiness_level_ml'] = label_encoder.inverse_transform(gb_classifier.predict(X))
+    return result
+
+def main():
+    import argparse
+    from src.database.connection import get_db_session
+    from src.etl.csv_loader import load_portfolios_csv
+
+    parser = argparse.ArgumentParser(description='Predict readiness for hypothetical students from a CSV')
+    parser.add_argument('csv_path', help='Portfolio CSV (one row per student skill)')
+    parser.add_argument('--output', help='Write the predictions to this CSV (default: print them)')
+    parser.add_argument('--all-roles', action='store_true', help="Predict every role, not only each student's target_role")
+    args = parser.parse_args()
+
+    portfolio_df, error = load_portfolios_csv(args.csv_path)
+    if error:
+        print(f"✗ {error}")
+        sys.exit(1)
+
+    load_models()
+    session = get_db_session()
+    try:
+        start = time.perf_counter()
+        try:
+            result = predict_portfolio_table(session, portfolio_df, all_roles=args.all_roles)
+        except ValueError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        print(f"✓ {len(result)} predictions for {portfolio_df['name'].nunique()} students "
+              f"in {time.perf_counter() - start:.2f}s")
+    finally:
+        session.close()
+
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"✓ Wrote {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
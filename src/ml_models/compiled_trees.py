@@ -0,0 +1,225 @@
+"""
+Flat-array inference for the trained tree models
+The Decision Tree classifier, Gradient Boosting classifier and Random Forest
+regressor are exported once into concatenated NumPy node arrays and evaluated
+by walking every tree level by level for all rows at once. This skips
+sklearn's per-call input validation and joblib dispatch, which dominate the
+cost of predicting a single row, and reproduces sklearn's arithmetic exactly
+(float32 features, float64 thresholds, the same summation order)
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from src.ml_models.model_registry import get_model
+
+# sklearn marks leaves with this child index
+TREE_LEAF = -1
+
+_lock = threading.Lock()
+_compiled: Dict[str, tuple] = {}
+
+def compile_trees(trees: List[Any], value_scale: float = 1.0) -> Dict:
+    """
+    Concatenate fitted sklearn trees into flat node arrays.
+
+    Child indices are made absolute, and leaves point to themselves so a
+    traversal can run a fixed number of steps without checking for leaves.
+
+    Args:
+        trees: Fitted sklearn tree estimators (anything with a tree_)
+        value_scale: Factor applied to leaf values (the boosting learning rate)
+
+    Returns:
+        {
+            'roots': int64 array, root node of each tree,
+            'feature': int64 array per node (0 at leaves),
+            'threshold': float64 array per node,
+            'left', 'right': int64 arrays of absolute child nodes,
+            'missing_left': bool array per node, or None if no node sends NaN left,
+            'value': float64 nodes × outputs array of (scaled) leaf values,
+            'depth': deepest tree's depth
+        }
+    """
+    roots, feature, threshold, left, right, missing_left, value = [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        tree = tree.tree_
+        is_leaf = tree.children_left == TREE_LEAF
+        nodes = np.arange(tree.node_count) + offset
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+        right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+        missing_left.append(np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)), dtype=bool))
+        value.append(tree.value[:, 0, :] * value_scale if value_scale != 1.0 else tree.value[:, 0, :])
+        offset += tree.node_count
+
+    missing_left = np.concatenate(missing_left)
+    return {
+        'roots': np.array(roots, dtype=np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'left': np.concatenate(left).astype(np.int64),
+        'right': np.concatenate(right).astype(np.int64),
+        'missing_left': missing_left if missing_left.any() else None,
+        'value': np.concatenate(value).astype(np.float64),
+        'depth': max(tree.tree_.max_depth for tree in trees)
+    }
+
+def apply_trees(compiled: Dict, X: np.ndarray) -> np.ndarray:
+    """
+    Leaf reached by every row in every tree.
+
+    Args:
+        compiled: Output of compile_trees
+        X: rows × features float64 array holding float32-representable values
+
+    Returns:
+        int64 rows × trees array of node indices
+    """
+    n_features = X.shape[1]
+    flat = X.ravel()
+    row_offset = (np.arange(X.shape[0], dtype=np.int64) * n_features)[:, None]
+    nodes = np.broadcast_to(compiled['roots'], (X.shape[0], len(compiled['roots'])))
+
+    for _ in range(compiled['depth']):
+        x = flat.take(row_offset + compiled['feature'].take(nodes))
+        go_left = x <= compiled['threshold'].take(nodes)
+        if compiled['missing_left'] is not None:
+            go_left |= np.isnan(x) & compiled['missing_left'].take(nodes)
+        nodes = np.where(go_left, compiled['left'].take(nodes), compiled['right'].take(nodes))
+    return nodes
+
+def _as_float32_rows(X) -> np.ndarray:
+    # sklearn casts inputs to float32 before comparing them with float64 thresholds
+    return np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64).reshape(-1, np.shape(X)[-1])
+
+class CompiledTreeModel:
+    """
+    Flat-array replacement for a fitted DecisionTreeClassifier,
+    GradientBoostingClassifier or RandomForestRegressor.
+
+    Exposes the parts of the sklearn API the prediction code uses
+    (predict, predict_proba for classifiers, classes_, n_features_in_),
+    so it can be passed wherever the original model is.
+
+    Attributes:
+        kind: 'decision_tree', 'gradient_boosting' or 'random_forest'
+        classes_: The model's classes_ (classifiers only)
+        n_features_in_: Number of input features
+        trees: Output of compile_trees
+    """
+
+    def __init__(self, model):
+        from sklearn.ensemble import GradientBoostingClassifier, RandomForestRegressor
+        from sklearn.tree import DecisionTreeClassifier
+
+        self.n_features_in_ = model.n_features_in_
+        self.classes_ = getattr(model, 'classes_', None)
+        self.init_raw = None
+
+        if isinstance(model, DecisionTreeClassifier):
+            if model.n_outputs_ != 1:
+                raise ValueError("Only single-output decision trees can be compiled")
+            self.kind = 'decision_tree'
+            self.trees = compile_trees([model])
+        elif isinstance(model, GradientBoostingClassifier):
+            self.kind = 'gradient_boosting'
+            self.n_trees_per_iteration = model.n_trees_per_iteration_
+            self.trees = compile_trees(model.estimators_.ravel(), value_scale=model.learning_rate)
+            # The init estimator's raw prediction is the same for every row
+            self.init_raw = model._raw_predict_init(np.zeros((1, self.n_features_in_), dtype=np.float32))[0]
+        elif isinstance(model, RandomForestRegressor):
+            if model.n_outputs_ != 1:
+                raise ValueError("Only single-output random forests can be compiled")
+            self.kind = 'random_forest'
+            self.trees = compile_trees(model.estimators_)
+        else:
+            raise ValueError(f"Cannot compile {type(model).__name__}")
+
+    def _leaf_values(self, X) -> np.ndarray:
+        X = _as_float32_rows(X)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+        return self.trees['value'][apply_trees(self.trees, X)]
+
+    def _raw_predict(self, X) -> np.ndarray:
+        # Stage by stage, in the order sklearn's predict_stages adds them
+        values = self._leaf_values(X)[:, :, 0].reshape(-1, len(self.trees['roots']) // self.n_trees_per_iteration,
+                                                       self.n_trees_per_iteration)
+        init = np.broadcast_to(self.init_raw, (len(values), 1, self.n_trees_per_iteration))
+        return np.cumsum(np.concatenate([init, values], axis=1), axis=1)[:, -1]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, columns ordered as classes_ (classifiers only)."""
+        if self.kind == 'decision_tree':
+            return self._leaf_values(X)[:, 0, :len(self.classes_)]
+        if self.kind == 'gradient_boosting':
+            raw = self._raw_predict(X)
+            if self.n_trees_per_iteration == 1:
+                from scipy.special import expit
+                positive = expit(raw[:, 0])
+                return np.column_stack([1 - positive, positive])
+            raw = raw - raw.max(axis=1, keepdims=True)
+            np.exp(raw, out=raw)
+            raw /= raw.sum(axis=1, keepdims=True)
+            return raw
+        raise AttributeError("Random Forest regressor has no predict_proba")
+
+    def predict(self, X) -> np.ndarray:
+        """Predicted class (classifiers) or value (regressor) per row."""
+        if self.kind == 'decision_tree':
+            return self.classes_.take(np.argmax(self._leaf_values(X)[:, 0, :], axis=1))
+        if self.kind == 'gradient_boosting':
+            raw = self._raw_predict(X)
+            if self.n_trees_per_iteration == 1:
+                return self.classes_[(raw[:, 0] >= 0).astype(int)]
+            return self.classes_[np.argmax(raw, axis=1)]
+        # Trees are added one by one in estimator order, then averaged
+        values = self._leaf_values(X)[:, :, 0]
+        return np.cumsum(values, axis=1)[:, -1] / values.shape[1]
+
+    def __repr__(self) -> str:
+        return (f"CompiledTreeModel({self.kind}, {len(self.trees['roots'])} trees, "
+                f"{len(self.trees['feature'])} nodes)")
+
+def compile_model(model) -> CompiledTreeModel:
+    """Compile a fitted DT / GB classifier or RF regressor (see CompiledTreeModel)."""
+    return CompiledTreeModel(model)
+
+def get_compiled_model(name: str) -> Optional[CompiledTreeModel]:
+    """
+    Compiled form of a registry model, compiled on first use.
+
+    Recompiled whenever the registry hands out a different object, i.e.
+    after the pickle was reloaded because the model was retrained.
+
+    Args:
+        name: 'classifier', 'gb_classifier' or 'regressor' (see MODEL_ARTIFACTS)
+
+    Returns:
+        CompiledTreeModel, or None if the model file does not exist
+    """
+    model = get_model(name)
+    if model is None:
+        return None
+    with _lock:
+        entry = _compiled.get(name)
+        if entry is None or entry[0] is not model:
+            entry = (model, compile_model(model))
+            _compiled[name] = entry
+        return entry[1]
+
+def clear_compiled_models() -> None:
+    """Drop every compiled model; the next lookup compiles again."""
+    with _lock:
+        _compiled.clear()
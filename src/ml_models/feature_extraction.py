@@ -8,8 +8,11 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+import threading
+import time
 import pandas as pd
 import numpy as np
+from typing import Dict, List
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from src.database.models import *
@@ -168,124 +171,315 @@ def extract_features_for_training(session: Session = None) -> pd.DataFrame:
         if close_session:
             session.close()
 
-def extract_features_for_prediction(student_id: int, role_id: int, session: Session) -> pd.DataFrame:
+# Categorical values with their own count / one-hot feature columns
+SKILL_CATEGORIES = ['Technical', 'Business', 'Design', 'Soft Skills']
+PROFICIENCY_LEVELS = ['Beginner', 'Intermediate', 'Advanced', 'Expert']
+SKILL_SOURCES = ['Course', 'Certification', 'Project', 'Workshop']
+PROGRAMS = ['BBA', 'Btech', 'B.Com']
+ROLE_NAMES = ['Data Analyst', 'Full-Stack Developer', 'Digital Marketer', 'Business Analyst', 'UX/UI Designer']
+
+_catalog_lock = threading.Lock()
+_catalog = {
+    'catalog': None,
+    'loaded_at': 0.0
+}
+
+def get_feature_catalog(session: Session) -> Dict:
     """
-    Extract features for a single student-role pair for prediction.
+    Get the cached skill categories / IDs and role names, loading them on first use.
+    
+    Reloaded after role_cache.CACHE_TTL_SECONDS, like the role requirements.
     
     Returns:
-        DataFrame with single row of features (without target variables)
+        {'skill_categories': {skill_id: category}, 'skill_ids': {skill_name: skill_id},
+         'role_names': {role_id: role_name}}
+        Shared between callers and must not be modified.
+    """
+    from src.core.role_cache import CACHE_TTL_SECONDS
+    
+    with _catalog_lock:
+        catalog = _catalog['catalog']
+        if catalog is None or time.monotonic() - _catalog['loaded_at'] > CACHE_TTL_SECONDS:
+            skills = session.query(SkillsMaster.skill_id, SkillsMaster.skill_name, SkillsMaster.category).all()
+            catalog = {
+                'skill_categories': {skill_id: category for skill_id, _, category in skills},
+                'skill_ids': {skill_name: skill_id for skill_id, skill_name, _ in skills},
+                'role_names': dict(session.query(JobRole.role_id, JobRole.role_name))
+            }
+            _catalog['catalog'] = catalog
+            _catalog['loaded_at'] = time.monotonic()
+        return catalog
+
+def invalidate_feature_catalog() -> None:
+    """Drop the cached catalog; the next lookup reloads it."""
+    with _catalog_lock:
+        _catalog['catalog'] = None
+        _catalog['loaded_at'] = 0.0
+
+def _count_by(owner_index: np.ndarray, values: np.ndarray, labels: list, n_owners: int) -> np.ndarray:
+    """n_owners × len(labels) matrix counting each owner's rows per label."""
+    counts = np.zeros((n_owners, len(labels)), dtype=np.int64)
+    for j, label in enumerate(labels):
+        np.add.at(counts[:, j], owner_index[values == label], 1)
+    return counts
+
+def extract_features_for_pairs(session: Session, student_ids, role_ids) -> pd.DataFrame:
+    """
+    Extract prediction features for many student-role pairs at once.
+    
+    Uses a fixed number of queries (students, their skills with categories,
+    roles and role requirements) regardless of the number of pairs; every
+    feature is then computed with array operations.
+    
+    Args:
+        session: Database session
+        student_ids: Student ID per pair
+        role_ids: Role ID per pair (same length as student_ids)
+    
+    Returns:
+        DataFrame with one row of features per pair, in input order
+        (same columns as extract_features_for_prediction)
+    
+    Raises:
+        ValueError: If a student or role does not exist
     """
-    # Get student info
-    student = session.query(Student).filter_by(student_id=student_id).first()
-    if not student:
-        raise ValueError(f"Student {student_id} not found")
-    
-    # Get role info
-    role = session.query(JobRole).filter_by(role_id=role_id).first()
-    if not role:
-        raise ValueError(f"Role {role_id} not found")
-    
-    # Get required skills for role
-    required_skills = session.query(JobRoleSkills).filter_by(role_id=role_id).all()
-    required_count = len(required_skills)
-    
-    # Get student skills
-    student_skills = session.query(StudentSkills).filter_by(student_id=student_id).all()
-    
-    # Calculate skill portfolio features
-    total_skills = len(student_skills)
-    if total_skills > 0:
-        avg_proficiency = float(sum(float(s.proficiency_score) for s in student_skills) / total_skills)
-        max_proficiency = float(max(float(s.proficiency_score) for s in student_skills))
-        min_proficiency = float(min(float(s.proficiency_score) for s in student_skills))
+    pair_students = np.asarray(student_ids, dtype=np.int64)
+    pair_roles = np.asarray(role_ids, dtype=np.int64)
+    unique_students = np.unique(pair_students)
+    unique_roles = np.unique(pair_roles)
+    
+    # Students
+    students = session.query(
+        Student.student_id, Student.year_of_study, Student.enrollment_year, Student.program
+    ).filter(Student.student_id.in_(unique_students.tolist())).order_by(Student.student_id).all()
+    if len(students) < len(unique_students):
+        found = {row.student_id for row in students}
+        missing = next(s for s in unique_students.tolist() if s not in found)
+        raise ValueError(f"Student {missing} not found")
+    
+    # Roles
+    roles = session.query(JobRole.role_id, JobRole.role_name).filter(
+        JobRole.role_id.in_(unique_roles.tolist())
+    ).order_by(JobRole.role_id).all()
+    if len(roles) < len(unique_roles):
+        found = {row.role_id for row in roles}
+        missing = next(r for r in unique_roles.tolist() if r not in found)
+        raise ValueError(f"Role {missing} not found")
+    
+    # Student skills (with category) and role requirements
+    skills = session.query(
+        StudentSkills.student_id,
+        StudentSkills.skill_id,
+        StudentSkills.proficiency_score,
+        StudentSkills.proficiency_level,
+        StudentSkills.source,
+        SkillsMaster.category
+    ).outerjoin(
+        SkillsMaster, StudentSkills.skill_id == SkillsMaster.skill_id
+    ).filter(
+        StudentSkills.student_id.in_(unique_students.tolist())
+    ).order_by(StudentSkills.student_id, StudentSkills.id).all()
+    
+    requirements = session.query(JobRoleSkills.role_id, JobRoleSkills.skill_id).filter(
+        JobRoleSkills.role_id.in_(unique_roles.tolist())
+    ).all()
+    
+    n_students = len(unique_students)
+    student_rows = np.searchsorted(unique_students, pair_students)
+    role_rows = np.searchsorted(unique_roles, pair_roles)
+    
+    if skills:
+        skill_students, skill_ids, scores, levels, sources, categories = (np.array(col, dtype=object) for col in zip(*skills))
+        owner = np.searchsorted(unique_students, skill_students.astype(np.int64))
+        portfolio = (owner, skill_ids.astype(np.int64), scores.astype(np.float64), levels, sources, categories)
     else:
-        avg_proficiency = 0.0
-        max_proficiency = 0.0
-        min_proficiency = 0.0
-    
-    # Count skills by category
-    skill_categories = {}
-    for skill_record in student_skills:
-        skill = session.query(SkillsMaster).filter_by(skill_id=skill_record.skill_id).first()
-        if skill:
-            category = skill.category
-            skill_categories[category] = skill_categories.get(category, 0) + 1
-    
-    # Count skills by proficiency level
-    proficiency_counts = {'Beginner': 0, 'Intermediate': 0, 'Advanced': 0, 'Expert': 0}
-    for skill_record in student_skills:
-        proficiency_counts[skill_record.proficiency_level] = proficiency_counts.get(
-            skill_record.proficiency_level, 0
-        ) + 1
-    
-    # Count skills by source
-    source_counts = {'Course': 0, 'Certification': 0, 'Project': 0, 'Workshop': 0}
-    for skill_record in student_skills:
-        source_counts[skill_record.source] = source_counts.get(skill_record.source, 0) + 1
-    
-    # Calculate matched skills
-    student_skill_ids = {s.skill_id for s in student_skills}
-    matched_count = sum(1 for req in required_skills if req.skill_id in student_skill_ids)
-    skill_gap_count = required_count - matched_count
-    
-    # Program encoding
-    program_encoded = {
-        'program_BBA': 1 if student.program == 'BBA' else 0,
-        'program_Btech': 1 if student.program == 'Btech' else 0,
-        'program_B.Com': 1 if student.program == 'B.Com' else 0
-    }
+        portfolio = None
     
-    # Role encoding
-    role_encoded = {
-        'role_Data Analyst': 1 if role.role_name == 'Data Analyst' else 0,
-        'role_Full-Stack Developer': 1 if role.role_name == 'Full-Stack Developer' else 0,
-        'role_Digital Marketer': 1 if role.role_name == 'Digital Marketer' else 0,
-        'role_Business Analyst': 1 if role.role_name == 'Business Analyst' else 0,
-        'role_UX/UI Designer': 1 if role.role_name == 'UX/UI Designer' else 0
-    }
+    role_required = [[] for _ in unique_roles]
+    for role_id, skill_id in requirements:
+        role_required[np.searchsorted(unique_roles, role_id)].append(skill_id)
+    
+    return _feature_frame(
+        student_rows, role_rows, portfolio, role_required,
+        year_of_study=[row.year_of_study for row in students],
+        enrollment_year=[row.enrollment_year for row in students],
+        programs=[row.program for row in students],
+        role_names=[row.role_name for row in roles]
+    )
+
+def _feature_frame(student_rows: np.ndarray, role_rows: np.ndarray, portfolio, role_required: list,
+                   year_of_study: list, enrollment_year: list, programs: list, role_names: list) -> pd.DataFrame:
+    """
+    Assemble prediction features for (student, role) rows with array operations.
+    
+    Args:
+        student_rows, role_rows: Student and role index per output row
+        portfolio: (owner, skill_id, proficiency_score, proficiency_level, source, category) arrays,
+                   one entry per held skill with owner = student index, or None if no skills
+        role_required: Required skill IDs per role index
+        year_of_study, enrollment_year, programs: Per student index
+        role_names: Per role index
+    """
+    n_students = len(programs)
+    if portfolio is not None:
+        owner, skill_ids, scores, levels, sources, categories = portfolio
+    else:
+        owner = np.zeros(0, dtype=np.int64)
+        skill_ids = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+        levels = sources = categories = np.zeros(0, dtype=object)
+    
+    # Per-student portfolio aggregates
+    total_skills = np.bincount(owner, minlength=n_students)
+    has_skills = total_skills > 0
+    score_sum = np.zeros(n_students, dtype=np.float64)
+    max_score = np.full(n_students, -np.inf)
+    min_score = np.full(n_students, np.inf)
+    np.add.at(score_sum, owner, scores)
+    np.maximum.at(max_score, owner, scores)
+    np.minimum.at(min_score, owner, scores)
+    avg_score = np.divide(score_sum, total_skills, out=np.zeros(n_students), where=has_skills)
+    max_score = np.where(has_skills, max_score, 0.0)
+    min_score = np.where(has_skills, min_score, 0.0)
+    
+    category_counts = _count_by(owner, categories, SKILL_CATEGORIES, n_students)
+    level_counts = _count_by(owner, levels, PROFICIENCY_LEVELS, n_students)
+    source_counts = _count_by(owner, sources, SKILL_SOURCES, n_students)
+    
+    # Required / matched counts per row over the skills the selected roles require
+    required_skill_ids = np.unique(np.array([s for skills in role_required for s in skills], dtype=np.int64))
+    required = np.zeros((len(role_required), len(required_skill_ids)), dtype=bool)
+    for j, skills in enumerate(role_required):
+        required[j, np.searchsorted(required_skill_ids, np.array(skills, dtype=np.int64))] = True
+    held = np.zeros((n_students, len(required_skill_ids)), dtype=bool)
+    is_required = np.isin(skill_ids, required_skill_ids)
+    held[owner[is_required], np.searchsorted(required_skill_ids, skill_ids[is_required])] = True
+    
+    required_count = required.sum(axis=1)[role_rows]
+    matched_count = (held[student_rows] & required[role_rows]).sum(axis=1)
+    
+    programs = np.array(programs, dtype=object)[student_rows]
+    role_names = np.array(role_names, dtype=object)[role_rows]
     
-    # Build feature vector
     # NOTE: We intentionally exclude 'match_ratio' from ML features to avoid
     # an overly dominant shortcut feature. The models learn from underlying
     # portfolio and role features instead.
     features = {
         # Student demographics
-        'year_of_study': student.year_of_study,
-        'enrollment_year': student.enrollment_year,
-        **program_encoded,
+        'year_of_study': np.array(year_of_study, dtype=object)[student_rows],
+        'enrollment_year': np.array(enrollment_year, dtype=object)[student_rows],
+        **{f'program_{program}': (programs == program).astype(np.int64) for program in PROGRAMS},
         
         # Skill portfolio
-        'total_skills': total_skills,
-        'avg_proficiency': avg_proficiency,
-        'max_proficiency': max_proficiency,
-        'min_proficiency': min_proficiency,
-        
-        # Skills by category
-        'skills_Technical': skill_categories.get('Technical', 0),
-        'skills_Business': skill_categories.get('Business', 0),
-        'skills_Design': skill_categories.get('Design', 0),
-        'skills_Soft Skills': skill_categories.get('Soft Skills', 0),
+        'total_skills': total_skills[student_rows],
+        'avg_proficiency': avg_score[student_rows],
+        'max_proficiency': max_score[student_rows],
+        'min_proficiency': min_score[student_rows],
         
-        # Skills by proficiency
-        'proficiency_Beginner': proficiency_counts['Beginner'],
-        'proficiency_Intermediate': proficiency_counts['Intermediate'],
-        'proficiency_Advanced': proficiency_counts['Advanced'],
-        'proficiency_Expert': proficiency_counts['Expert'],
-        
-        # Skills by source
-        'source_Course': source_counts['Course'],
-        'source_Certification': source_counts['Certification'],
-        'source_Project': source_counts['Project'],
-        'source_Workshop': source_counts['Workshop'],
+        # Skills by category / proficiency / source
+        **{f'skills_{category}': category_counts[student_rows, j] for j, category in enumerate(SKILL_CATEGORIES)},
+        **{f'proficiency_{level}': level_counts[student_rows, j] for j, level in enumerate(PROFICIENCY_LEVELS)},
+        **{f'source_{source}': source_counts[student_rows, j] for j, source in enumerate(SKILL_SOURCES)},
         
         # Role-specific features (without direct match_ratio shortcut)
         'required_skills_count': required_count,
         'matched_skills_count': matched_count,
-        'skill_gap_count': skill_gap_count,
+        'skill_gap_count': required_count - matched_count,
         
         # Role encoding
-        **role_encoded
+        **{f'role_{name}': (role_names == name).astype(np.int64) for name in ROLE_NAMES}
     }
     
-    return pd.DataFrame([features])
+    df = pd.DataFrame(features)
+    df['year_of_study'] = pd.to_numeric(df['year_of_study'])
+    df['enrollment_year'] = pd.to_numeric(df['enrollment_year'])
+    return df
+
+def extract_features_for_portfolios(session: Session, portfolios: List[Dict]) -> pd.DataFrame:
+    """
+    Extract prediction features for hypothetical students, without storing them.
+    
+    Produces the same features extract_features_for_pairs would for the
+    portfolio saved as a student, using the cached skill catalog and role
+    requirements instead of student rows.
+    
+    Args:
+        session: Database session (only read, to fill the caches)
+        portfolios: [{'program': 'BBA' | 'Btech' | 'B.Com', 'year_of_study': int,
+                      'enrollment_year': int, 'role_id': int,
+                      'skills': [{'skill_id': int, 'proficiency_level': str,
+                                  'proficiency_score': float (optional, from the level by default),
+                                  'source': str (optional)}]}]
+    
+    Returns:
+        DataFrame with one row of features per portfolio, in input order
+    
+    Raises:
+        ValueError: Unknown program, role, skill, proficiency level or source,
+                    or a skill listed twice in one portfolio
+    """
+    from src.core.role_cache import get_all_role_requirements
+    from src.core.scoring import PROFICIENCY_MAP
+    
+    catalog = get_feature_catalog(session)
+    role_ids = [portfolio['role_id'] for portfolio in portfolios]
+    if any(role_id not in catalog['role_names'] for role_id in role_ids):
+        # Possibly a role added since the catalog was loaded
+        invalidate_feature_catalog()
+        catalog = get_feature_catalog(session)
+    requirements = get_all_role_requirements(session)
+    
+    owner, skill_ids, scores, levels, sources, categories = [], [], [], [], [], []
+    for i, portfolio in enumerate(portfolios):
+        if portfolio['program'] not in PROGRAMS:
+            raise ValueError(f"Unknown program: {portfolio['program']}")
+        if portfolio['role_id'] not in catalog['role_names']:
+            raise ValueError(f"Role {portfolio['role_id']} not found")
+        
+        seen = set()
+        for skill in portfolio['skills']:
+            skill_id = skill['skill_id']
+            level = skill['proficiency_level']
+            source = skill.get('source')
+            if skill_id not in catalog['skill_categories']:
+                raise ValueError(f"Skill {skill_id} not found")
+            if skill_id in seen:
+                raise ValueError(f"Skill {skill_id} listed more than once")
+            if level not in PROFICIENCY_LEVELS:
+                raise ValueError(f"Unknown proficiency level: {level}")
+            if source is not None and source not in SKILL_SOURCES:
+                raise ValueError(f"Unknown skill source: {source}")
+            seen.add(skill_id)
+            
+            owner.append(i)
+            skill_ids.append(skill_id)
+            scores.append(float(skill.get('proficiency_score', PROFICIENCY_MAP[level])))
+            levels.append(level)
+            sources.append(source)
+            categories.append(catalog['skill_categories'][skill_id])
+    
+    unique_roles = sorted(set(role_ids))
+    portfolio_arrays = None
+    if owner:
+        portfolio_arrays = (
+            np.array(owner, dtype=np.int64), np.array(skill_ids, dtype=np.int64), np.array(scores, dtype=np.float64),
+            np.array(levels, dtype=object), np.array(sources, dtype=object), np.array(categories, dtype=object)
+        )
+    
+    return _feature_frame(
+        np.arange(len(portfolios)), np.searchsorted(unique_roles, role_ids), portfolio_arrays,
+        [list(requirements[role_id]['skill_ids']) if role_id in requirements else [] for role_id in unique_roles],
+        year_of_study=[portfolio['year_of_study'] for portfolio in portfolios],
+        enrollment_year=[portfolio['enrollment_year'] for portfolio in portfolios],
+        programs=[portfolio['program'] for portfolio in portfolios],
+        role_names=[catalog['role_names'][role_id] for role_id in unique_roles]
+    )
 
+def extract_features_for_prediction(student_id: int, role_id: int, session: Session) -> pd.DataFrame:
+    """
+    Extract features for a single student-role pair for prediction.
+    
+    Returns:
+        DataFrame with single row of features (without target variables)
+    """
+    return extract_features_for_pairs(session, [student_id], [role_id])
@@ -3,7 +3,6 @@ Model information and feature importance utilities
 """
 import sys
 from pathlib import Path
-import joblib
 import pandas as pd
 import json
 
@@ -19,10 +18,7 @@ def get_model_feature_importance():
     Returns:
         dict with 'classifier', 'gradient_boosting', and 'regressor' feature importance DataFrames
     """
-    models_dir = project_root / 'models'
-    classifier_path = models_dir / 'readiness_classifier.pkl'
-    gb_classifier_path = models_dir / 'readiness_gradient_boosting.pkl'
-    regressor_path = models_dir / 'readiness_regressor.pkl'
+    from src.ml_models.model_registry import CLASSIFIER_PATH, GB_CLASSIFIER_PATH, REGRESSOR_PATH, get_model
     
     result = {
         'classifier': None,
@@ -31,11 +27,11 @@ def get_model_feature_importance():
         'models_exist': False
     }
     
-    if classifier_path.exists() and regressor_path.exists():
+    if CLASSIFIER_PATH.exists() and REGRESSOR_PATH.exists():
         result['models_exist'] = True
         
         # Load Decision Tree classifier
-        classifier = joblib.load(classifier_path)
+        classifier = get_model('classifier')
         classifier_importance = pd.DataFrame({
             'Feature': FEATURE_COLUMNS,
             'Importance': classifier.feature_importances_
@@ -43,8 +39,8 @@ def get_model_feature_importance():
         result['classifier'] = classifier_importance
         
         # Load Gradient Boosting classifier if exists
-        if gb_classifier_path.exists():
-            gb_classifier = joblib.load(gb_classifier_path)
+        if GB_CLASSIFIER_PATH.exists():
+            gb_classifier = get_model('gb_classifier')
             gb_importance = pd.DataFrame({
                 'Feature': FEATURE_COLUMNS,
                 'Importance': gb_classifier.feature_importances_
@@ -52,7 +48,7 @@ def get_model_feature_importance():
             result['gradient_boosting'] = gb_importance
         
         # Load regressor
-        regressor = joblib.load(regressor_path)
+        regressor = get_model('regressor')
         regressor_importance = pd.DataFrame({
             'Feature': FEATURE_COLUMNS,
             'Importance': regressor.feature_importances_
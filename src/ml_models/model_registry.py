@@ -0,0 +1,183 @@
+"""
+Process-wide registry of trained model artifacts
+Each pickle is loaded once and shared by every caller in the process; it is
+reloaded only when the file on disk changes (new mtime/size and a different
+SHA-256), e.g. after train_models.py rewrites it
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import hashlib
+import os
+import threading
+import time
+import joblib
+from typing import Any, Dict, Optional, Tuple
+
+# Model paths
+MODELS_DIR = project_root / 'models'
+CLASSIFIER_PATH = MODELS_DIR / 'readiness_classifier.pkl'
+GB_CLASSIFIER_PATH = MODELS_DIR / 'readiness_gradient_boosting.pkl'
+REGRESSOR_PATH = MODELS_DIR / 'readiness_regressor.pkl'
+LABEL_ENCODER_PATH = MODELS_DIR / 'readiness_classifier_label_encoder.pkl'
+
+# Registry name -> (path, display name), in load_models() order
+MODEL_ARTIFACTS = {
+    'classifier': (CLASSIFIER_PATH, 'Decision Tree classifier'),
+    'gb_classifier': (GB_CLASSIFIER_PATH, 'Gradient Boosting classifier'),
+    'regressor': (REGRESSOR_PATH, 'regressor'),
+    'label_encoder': (LABEL_ENCODER_PATH, 'label encoder')
+}
+
+# Re-entrant so get_models() can hold it across its get_model() calls
+_lock = threading.RLock()
+_entries: Dict[str, Dict] = {}
+# SHA-256 of artifacts not loaded yet: name -> (signature, sha256)
+_file_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_model(name: str) -> Optional[Any]:
+    """
+    Get a loaded model artifact, loading or reloading it if needed.
+
+    Each call costs one stat() of the file. The artifact is unpickled only
+    on first use or when the file changed: a new mtime/size triggers a
+    SHA-256 check, and the pickle is reloaded only if the content differs.
+
+    Args:
+        name: Key of MODEL_ARTIFACTS ('classifier', 'gb_classifier', 'regressor', 'label_encoder')
+
+    Returns:
+        The artifact, or None if its file does not exist
+    """
+    path, label = MODEL_ARTIFACTS[name]
+    with _lock:
+        entry = _entries.get(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if entry is None or entry['model'] is not None:
+                print(f"⚠ {label[0].upper() + label[1:]} not found at {path}")
+            _entries[name] = {'model': None, 'signature': None, 'sha256': None,
+                              'load_seconds': 0.0, 'loaded_at': None, 'loads': entry['loads'] if entry else 0}
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry['model'] is not None and entry['signature'] == signature:
+            return entry['model']
+
+        sha256 = _file_hash(path)
+        if entry is not None and entry['model'] is not None and entry['sha256'] == sha256:
+            # Touched or rewritten with identical content
+            entry['signature'] = signature
+            return entry['model']
+
+        start = time.perf_counter()
+        model = joblib.load(path)
+        load_seconds = time.perf_counter() - start
+        _entries[name] = {
+            'model': model,
+            'signature': signature,
+            'sha256': sha256,
+            'load_seconds': load_seconds,
+            'loaded_at': time.time(),
+            'loads': (entry['loads'] if entry else 0) + 1
+        }
+        action = "Reloaded" if entry is not None and entry['model'] is not None else "Loaded"
+        print(f"✓ {action} {label} from {path} in {load_seconds * 1000:.1f} ms")
+        return model
+
+def get_models() -> Tuple[Any, Any, Any, Any]:
+    """
+    Get (classifier, gb_classifier, regressor, label_encoder) as one consistent set.
+
+    The lock is held across all four lookups, so a concurrent reload cannot
+    hand out a classifier from one training run and a label encoder from another.
+    """
+    with _lock:
+        return tuple(get_model(name) for name in MODEL_ARTIFACTS)
+
+def model_load_stats() -> Dict[str, Dict]:
+    """
+    Load timing per artifact.
+
+    Returns:
+        {name: {'path': str, 'loaded': bool, 'load_seconds': float,
+                'loaded_at': float (epoch seconds) or None, 'loads': int, 'sha256': str or None}}
+        Artifacts that were never requested are reported as not loaded.
+    """
+    with _lock:
+        stats = {}
+        for name, (path, _) in MODEL_ARTIFACTS.items():
+            entry = _entries.get(name, {})
+            stats[name] = {
+                'path': str(path),
+                'loaded': entry.get('model') is not None,
+                'load_seconds': entry.get('load_seconds', 0.0),
+                'loaded_at': entry.get('loaded_at'),
+                'loads': entry.get('loads', 0),
+                'sha256': entry.get('sha256')
+            }
+        return stats
+
+def artifact_sha256(name: str) -> Optional[str]:
+    """
+    SHA-256 of an artifact file on disk, without loading it.
+
+    Reuses the hash of the loaded artifact, or of an earlier call, while the
+    file's mtime and size are unchanged, so each call normally costs one stat().
+
+    Returns:
+        Hex digest, or None if the file does not exist
+    """
+    path, _ = MODEL_ARTIFACTS[name]
+    with _lock:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        entry = _entries.get(name)
+        if entry is not None and entry['model'] is not None and entry['signature'] == signature:
+            return entry['sha256']
+        cached = _file_hashes.get(name)
+        if cached is None or cached[0] != signature:
+            cached = (signature, _file_hash(path))
+            _file_hashes[name] = cached
+        return cached[1]
+
+def model_version(names=None) -> str:
+    """
+    Identifier of the trained model set on disk.
+
+    Derived from the SHA-256 of the artifact files (see artifact_sha256),
+    so it changes exactly when retraining rewrites one of them with new
+    content, not when another model is loaded for the first time. Missing
+    artifacts contribute 'none'.
+
+    Args:
+        names: Keys of MODEL_ARTIFACTS to cover (default: all); artifacts
+               outside them are neither stat()ed nor hashed
+    """
+    with _lock:
+        digest = hashlib.sha256()
+        for name in MODEL_ARTIFACTS:
+            if names is None or name in names:
+                digest.update(f"{name}:{artifact_sha256(name) or 'none'};".encode())
+        return digest.hexdigest()[:16]
+
+def clear_model_registry() -> None:
+    """Drop every loaded artifact; the next lookup loads from disk."""
+    with _lock:
+        _entries.clear()
+        _file_hashes.clear()
@@ -8,20 +8,34 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 from sqlalchemy.orm import Session
 
-from src.ml_models.feature_extraction import extract_features_for_prediction
+from src.ml_models.feature_extraction import (
+    extract_features_for_prediction, extract_features_for_pairs, extract_features_for_portfolios
+)
+from src.ml_models.compiled_trees import get_compiled_model
+from src.ml_models.prediction_cache import feature_key, get_cached_prediction, store_prediction
 
-# Model paths
-MODELS_DIR = project_root / 'models'
-CLASSIFIER_PATH = MODELS_DIR / 'readiness_classifier.pkl'
-GB_CLASSIFIER_PATH = MODELS_DIR / 'readiness_gradient_boosting.pkl'
-REGRESSOR_PATH = MODELS_DIR / 'readiness_regressor.pkl'
-LABEL_ENCODER_PATH = MODELS_DIR / 'readiness_classifier_label_encoder.pkl'
+from src.ml_models.model_registry import (
+    MODELS_DIR, CLASSIFIER_PATH, GB_CLASSIFIER_PATH, REGRESSOR_PATH, LABEL_ENCODER_PATH, get_model, get_models, model_version
+)
+
+# Single-row prediction outputs, in result order, and the registry artifacts each one needs
+PREDICTION_OUTPUTS = ('score', 'level', 'gradient_boosting')
+OUTPUT_MODELS = {
+    'score': ('regressor',),
+    'level': ('classifier', 'label_encoder'),
+    'gradient_boosting': ('gb_classifier', 'label_encoder')
+}
+
+# Rows per model call in batched prediction
+DEFAULT_PREDICT_CHUNK_SIZE = 1000
+
+# Skill-count features that are also stored with every score
+COUNT_COLUMNS = ['required_skills_count', 'matched_skills_count', 'skill_gap_count']
 
 # Feature columns (must match training)
 # NOTE: Keep in sync with FEATURE_COLUMNS in train_models.py
@@ -38,83 +52,121 @@ FEATURE_COLUMNS = [
 ]
 
 def load_models():
-    """Load trained models and label encoder"""
-    classifier = None
-    gb_classifier = None
-    regressor = None
-    label_encoder = None
-    
-    if CLASSIFIER_PATH.exists():
-        classifier = joblib.load(CLASSIFIER_PATH)
-        print(f"✓ Loaded Decision Tree classifier from {CLASSIFIER_PATH}")
-    else:
-        print(f"⚠ Decision Tree classifier not found at {CLASSIFIER_PATH}")
-    
-    if GB_CLASSIFIER_PATH.exists():
-        gb_classifier = joblib.load(GB_CLASSIFIER_PATH)
-        print(f"✓ Loaded Gradient Boosting classifier from {GB_CLASSIFIER_PATH}")
-    else:
-        print(f"⚠ Gradient Boosting classifier not found at {GB_CLASSIFIER_PATH}")
-    
-    if REGRESSOR_PATH.exists():
-        regressor = joblib.load(REGRESSOR_PATH)
-        print(f"✓ Loaded regressor from {REGRESSOR_PATH}")
-    else:
-        print(f"⚠ Regressor not found at {REGRESSOR_PATH}")
-    
-    if LABEL_ENCODER_PATH.exists():
-        label_encoder = joblib.load(LABEL_ENCODER_PATH)
-        print(f"✓ Loaded label encoder from {LABEL_ENCODER_PATH}")
-    else:
-        print(f"⚠ Label encoder not found at {LABEL_ENCODER_PATH}")
-    
-    return classifier, gb_classifier, regressor, label_encoder
-
-def predict_readiness_ml(student_id: int, role_id: int, session: Session) -> Dict:
     """
-    Predict readiness using ML models (all 3 models).
+    Get all trained models and the label encoder from the process-wide registry.
+    
+    Loads every artifact that is not loaded yet. The prediction functions
+    below do not call this: they load only the models their outputs need
+    (see PREDICTION_OUTPUTS), so use it only where all four are wanted.
+    Artifacts are unpickled once per process and reloaded only when their
+    files change (see src/ml_models/model_registry.py).
+    
+    Returns:
+        (classifier, gb_classifier, regressor, label_encoder); missing artifacts are None
+    """
+    return get_models()
+
+def _check_outputs(outputs) -> tuple:
+    outputs = tuple(output for output in PREDICTION_OUTPUTS if output in outputs)
+    if not outputs:
+        raise ValueError(f"outputs must include one of {PREDICTION_OUTPUTS}")
+    return outputs
+
+def _required_models_available(outputs: tuple) -> bool:
+    # Loads the required models; Gradient Boosting is optional next to another output
+    required = [output for output in outputs if output != 'gradient_boosting'] or outputs
+    return all(get_model(name) is not None for output in required for name in OUTPUT_MODELS[output])
+
+def predict_readiness_ml(student_id: int, role_id: int, session: Session,
+                         outputs=PREDICTION_OUTPUTS) -> Dict:
+    """
+    Predict readiness using ML models (all 3 models by default).
+    
+    Only the models behind the requested outputs are loaded, on first use
+    (see OUTPUT_MODELS): a caller that needs just the score never loads
+    the classifiers.
+    
+    Results are cached by feature vector, outputs and model version
+    (see prediction_cache.py), so pairs with identical features are
+    predicted once per trained model set.
     
     Args:
         student_id: Student ID
         role_id: Role ID
         session: Database session
+        outputs: Any of PREDICTION_OUTPUTS: 'score' (Random Forest),
+                 'level' (Decision Tree), 'gradient_boosting'
     
     Returns:
-        Dictionary with ML predictions from all models:
+        Dictionary with ML predictions from the requested models:
         {
-            'readiness_score_ml': float (0-100),
-            'readiness_level_ml': str,
-            'readiness_score_ml_probabilities': dict,
+            'readiness_score_ml': float (0-100), None without 'score',
+            'readiness_level_ml': str, None without 'level',
+            'readiness_score_ml_probabilities': dict, None without 'level',
             'model_used': str,
-            'decision_tree': dict,
-            'gradient_boosting': dict,
-            'random_forest': dict
+            'decision_tree': dict (with 'level'),
+            'gradient_boosting': dict (with 'gradient_boosting', if trained),
+            'random_forest': dict (with 'score')
         }
-    """
-    # Load models
-    classifier, gb_classifier, regressor, label_encoder = load_models()
     
-    if classifier is None or regressor is None:
-        return {
-            'readiness_score_ml': None,
-            'readiness_level_ml': None,
-            'readiness_score_ml_probabilities': None,
-            'model_used': None,
-            'error': 'Models not trained. Please run train_models.py first.'
-        }
+    Raises:
+        ValueError: outputs names none of PREDICTION_OUTPUTS
+    """
+    outputs = _check_outputs(outputs)
+    if not _required_models_available(outputs):
+        return _prediction_error('Models not trained. Please run train_models.py first.')
     
     # Extract features
     try:
         features_df = extract_features_for_prediction(student_id, role_id, session)
     except Exception as e:
-        return {
-            'readiness_score_ml': None,
-            'readiness_level_ml': None,
-            'readiness_score_ml_probabilities': None,
-            'model_used': None,
-            'error': str(e)
-        }
+        return _prediction_error(str(e))
     
+    return _predict_feature_row(features_df, outputs)
+
+def predict_readiness_from_portfolio(portfolio: Dict, session: Session,
+                                     outputs=PREDICTION_OUTPUTS) -> Dict:
+    """
+    Predict readiness for a hypothetical student without storing anything.
+    
+    The feature vector is built in memory from the submitted portfolio and
+    the cached skill catalog and role requirements
+    (extract_features_for_portfolios), so no student rows are written.
+    
+    Args:
+        portfolio: {'program', 'year_of_study', 'enrollment_year', 'role_id',
+                    'skills': [{'skill_id', 'proficiency_level', 'source' (optional)}]}
+        session: Database session (read only, to fill the caches)
+        outputs: Any of PREDICTION_OUTPUTS (see predict_readiness_ml)
+    
+    Returns:
+        Same dictionary as predict_readiness_ml
+    
+    Raises:
+        ValueError: outputs names none of PREDICTION_OUTPUTS
+    """
+    outputs = _check_outputs(outputs)
+    if not _required_models_available(outputs):
+        return _prediction_error('Models not trained. Please run train_models.py first.')
+    
+    try:
+        features_df = extract_features_for_portfolios(session, [portfolio])
+    except ValueError as e:
+        return _prediction_error(str(e))
+    
+    return _predict_feature_row(features_df, outputs)
+
+def _prediction_error(message: str) -> Dict:
+    return {
+        'readiness_score_ml': None,
+        'readiness_level_ml': None,
+        'readiness_score_ml_probabilities': None,
+        'model_used': None,
+        'error': message
+    }
+
+def _predict_feature_row(features_df: pd.DataFrame, outputs: tuple = PREDICTION_OUTPUTS) -> Dict:
+    """Predictions of the requested outputs for a one-row feature DataFrame (see predict_readiness_ml)."""
     # Ensure all feature columns are present
     for col in FEATURE_COLUMNS:
         if col not in features_df.columns:
@@ -122,35 +174,55 @@ def predict_readiness_ml(student_id: int, role_id: int, session: Session) -> Dic
     
     X = features_df[FEATURE_COLUMNS]
     
-    # Predict score using regressor
-    score_prediction = regressor.predict(X)[0]
-    score_prediction = max(0, min(100, score_prediction))  # Clamp to 0-100
+    # Pairs with the same feature vector get the same prediction from the same
+    # models; the version covers only the artifacts behind the requested outputs
+    version = model_version({name for output in outputs for name in OUTPUT_MODELS[output]})
+    cache_key = f"{','.join(outputs)}:{feature_key(X.to_numpy(dtype=np.float64)[0])}"
+    cached = get_cached_prediction(cache_key, version)
+    if cached is not None:
+        return cached
     
-    # Predict level using Decision Tree classifier (primary)
-    level_encoded = classifier.predict(X)[0]
-    level_prediction = label_encoder.inverse_transform([level_encoded])[0]
-    
-    # Get prediction probabilities from Decision Tree
-    probabilities = classifier.predict_proba(X)[0]
-    prob_dict = {
-        label: float(prob) 
-        for label, prob in zip(label_encoder.classes_, probabilities)
-    }
+    # One row: use the flat-array trees, which give sklearn's exact output
+    # without its fixed per-call overhead (see compiled_trees.py).
+    # Only the models behind the requested outputs are loaded and compiled
+    regressor = get_compiled_model('regressor') if 'score' in outputs else None
+    classifier = get_compiled_model('classifier') if 'level' in outputs else None
+    gb_classifier = get_compiled_model('gb_classifier') if 'gradient_boosting' in outputs else None
+    label_encoder = get_model('label_encoder') if classifier is not None or gb_classifier is not None else None
     
-    # Get predictions from all models
     result = {
-        'readiness_score_ml': round(float(score_prediction), 2),
-        'readiness_level_ml': level_prediction,
-        'readiness_score_ml_probabilities': prob_dict,
-        'model_used': 'ML (Random Forest + Decision Tree + Gradient Boosting)',
-        'decision_tree': {
+        'readiness_score_ml': None,
+        'readiness_level_ml': None,
+        'readiness_score_ml_probabilities': None
+    }
+    models_used = []
+    
+    # Predict score using regressor
+    if regressor is not None:
+        score_prediction = regressor.predict(X)[0]
+        score_prediction = round(float(max(0, min(100, score_prediction))), 2)  # Clamp to 0-100
+        result['readiness_score_ml'] = score_prediction
+        result['random_forest'] = {'score': score_prediction}
+        models_used.append('Random Forest')
+    
+    # Predict level using Decision Tree classifier (primary)
+    if classifier is not None:
+        level_encoded = classifier.predict(X)[0]
+        level_prediction = label_encoder.inverse_transform([level_encoded])[0]
+        
+        # Get prediction probabilities from Decision Tree
+        probabilities = classifier.predict_proba(X)[0]
+        prob_dict = {
+            label: float(prob) 
+            for label, prob in zip(label_encoder.classes_, probabilities)
+        }
+        result['readiness_level_ml'] = level_prediction
+        result['readiness_score_ml_probabilities'] = prob_dict
+        result['decision_tree'] = {
             'level': level_prediction,
             'probabilities': prob_dict
-        },
-        'random_forest': {
-            'score': round(float(score_prediction), 2)
         }
-    }
+        models_used.append('Decision Tree')
     
     # Add Gradient Boosting predictions if available
     if gb_classifier is not None:
@@ -165,73 +237,125 @@ def predict_readiness_ml(student_id: int, role_id: int, session: Session) -> Dic
             'level': gb_level,
             'probabilities': gb_prob_dict
         }
+        models_used.append('Gradient Boosting')
     
+    result['model_used'] = f"ML ({' + '.join(models_used)})"
+    
+    store_prediction(cache_key, version, result)
     return result
 
-def predict_batch_ml(session: Session, student_ids: Optional[list] = None, role_ids: Optional[list] = None) -> pd.DataFrame:
+def predict_features(features_df: pd.DataFrame, classifier, regressor, label_encoder,
+                     chunk_size: int = DEFAULT_PREDICT_CHUNK_SIZE) -> pd.DataFrame:
     """
-    Predict readiness for multiple student-role combinations using ML.
+    Predict scores and levels for a feature matrix, one model call per chunk.
+    
+    The matrix is converted once; each chunk of rows costs a single
+    regressor.predict and a single classifier.predict_proba (the level is
+    the most probable class, exactly as classifier.predict picks it).
+    
+    Args:
+        features_df: Rows of features (missing FEATURE_COLUMNS are filled with 0)
+        classifier: Decision Tree classifier
+        regressor: Random Forest regressor
+        label_encoder: Label encoder of the classifier
+        chunk_size: Rows per model call
+    
+    Returns:
+        DataFrame (same index as features_df) with readiness_score_ml,
+        readiness_level_ml and one probability_<level> column per class
+    """
+    X = features_df.reindex(columns=FEATURE_COLUMNS, fill_value=0)
+    n = len(X)
+    scores = np.empty(n, dtype=np.float64)
+    probabilities = np.empty((n, len(classifier.classes_)), dtype=np.float64)
+    
+    for start in range(0, n, chunk_size):
+        chunk = X.iloc[start:start + chunk_size]
+        scores[start:start + chunk_size] = regressor.predict(chunk)
+        probabilities[start:start + chunk_size] = classifier.predict_proba(chunk)
+    
+    level_encoded = classifier.classes_.take(np.argmax(probabilities, axis=1))
+    levels = label_encoder.inverse_transform(level_encoded) if n else np.array([], dtype=object)
+    
+    result = pd.DataFrame({
+        'readiness_score_ml': np.round(np.clip(scores, 0, 100), 2),
+        'readiness_level_ml': levels
+    }, index=features_df.index)
+    for j, encoded in enumerate(classifier.classes_):
+        result[f"probability_{label_encoder.inverse_transform([encoded])[0]}"] = probabilities[:, j]
+    return result
+
+def iter_predictions_ml(session: Session, student_ids: Optional[list] = None, role_ids: Optional[list] = None,
+                        batch_size: int = 1000, chunk_size: int = DEFAULT_PREDICT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream ML predictions for student-role combinations in batches.
+    
+    Combinations (students × job roles, whether or not they have a stored
+    score yet) are read through a server-side cursor (yield_per), so only
+    one batch of combinations and predictions is held in memory at a time.
+    Each batch's features are extracted together (extract_features_for_pairs)
+    and predicted with one model call per chunk (predict_features).
+    The caller must not commit until the iterator is exhausted.
     
     Args:
         session: Database session
         student_ids: List of student IDs (None = all students)
         role_ids: List of role IDs (None = all roles)
+        batch_size: Combinations per yielded DataFrame
+        chunk_size: Rows per model call
     
-    Returns:
-        DataFrame with predictions
+    Yields:
+        DataFrame with columns student_id, role_id, readiness_score_ml,
+        readiness_level_ml, probability_<level> (Decision Tree class probabilities)
+        and the pair's COUNT_COLUMNS taken from its features
     """
-    from src.database.models import Student, JobRole, MarketReadinessScores
+    from sqlalchemy import select, true
+    from src.database.models import Student, JobRole
     
-    # Load models
-    classifier, gb_classifier, regressor, label_encoder = load_models()
+    # Load models (batch predictions do not use Gradient Boosting)
+    classifier, regressor, label_encoder = (get_model(name) for name in ('classifier', 'regressor', 'label_encoder'))
     
     if classifier is None or regressor is None:
         print("ERROR: Models not trained. Please run train_models.py first.")
-        return pd.DataFrame()
+        return
+    
+    # Every student-role combination, including students that have no scores yet
+    query = select(
+        Student.student_id,
+        JobRole.role_id
+    ).join(JobRole, true()).order_by(Student.student_id, JobRole.role_id)
+    
+    if student_ids is not None:
+        query = query.where(Student.student_id.in_(student_ids))
+    if role_ids is not None:
+        query = query.where(JobRole.role_id.in_(role_ids))
     
-    # Get all student-role combinations
-    query = session.query(
-        MarketReadinessScores.student_id,
-        MarketReadinessScores.role_id
-    )
-    
-    if student_ids:
-        query = query.filter(MarketReadinessScores.student_id.in_(student_ids))
-    if role_ids:
-        query = query.filter(MarketReadinessScores.role_id.in_(role_ids))
-    
-    combinations = query.distinct().all()
-    
-    predictions = []
-    
-    for student_id, role_id in combinations:
-        try:
-            # Extract features
-            features_df = extract_features_for_prediction(student_id, role_id, session)
-            
-            # Ensure all feature columns are present
-            for col in FEATURE_COLUMNS:
-                if col not in features_df.columns:
-                    features_df[col] = 0
-            
-            X = features_df[FEATURE_COLUMNS]
-            
-            # Predict
-            score_pred = regressor.predict(X)[0]
-            score_pred = max(0, min(100, score_pred))
-            
-            level_encoded = classifier.predict(X)[0]
-            level_pred = label_encoder.inverse_transform([level_encoded])[0]
-            
-            predictions.append({
-                'student_id': student_id,
-                'role_id': role_id,
-                'readiness_score_ml': round(float(score_pred), 2),
-                'readiness_level_ml': level_pred
-            })
-        except Exception as e:
-            print(f"Error predicting for student {student_id}, role {role_id}: {e}")
-            continue
-    
-    return pd.DataFrame(predictions)
+    result = session.execute(query.execution_options(yield_per=batch_size))
+    
+    for combinations in result.partitions():
+        pairs = pd.DataFrame(combinations, columns=['student_id', 'role_id'])
+        features_df = extract_features_for_pairs(session, pairs['student_id'], pairs['role_id'])
+        predictions = predict_features(features_df, classifier, regressor, label_encoder, chunk_size=chunk_size)
+        yield pd.concat([pairs, predictions, features_df[COUNT_COLUMNS]], axis=1)
 
+def predict_batch_ml(session: Session, student_ids: Optional[list] = None, role_ids: Optional[list] = None,
+                     chunk_size: int = DEFAULT_PREDICT_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Predict readiness for multiple student-role combinations using ML.
+    
+    Collects iter_predictions_ml into one DataFrame; use the iterator
+    directly when the result does not need to be held in memory at once.
+    
+    Args:
+        session: Database session
+        student_ids: List of student IDs (None = all students)
+        role_ids: List of role IDs (None = all roles)
+        chunk_size: Rows per model call
+    
+    Returns:
+        DataFrame with predictions
+    """
+    batches = list(iter_predictions_ml(session, student_ids=student_ids, role_ids=role_ids, chunk_size=chunk_size))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,107 @@
+"""
+LRU cache of single-pair ML predictions
+Many students share the same feature vector (program, year and portfolio
+counts), and the dashboard asks for the same predictions repeatedly, so
+predict_readiness_ml results are cached by a hash of the FEATURE_COLUMNS
+values and stored with the model version of the artifacts behind them. An
+entry whose version no longer matches (after retraining) is dropped
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+
+# Most recently used predictions kept
+PREDICTION_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_cache = {
+    # key -> (model version, prediction)
+    'entries': OrderedDict(),
+    # Version of the latest lookup or store, for prediction_cache_stats
+    'version': None,
+    'hits': 0,
+    'misses': 0,
+    'invalidations': 0
+}
+
+def feature_key(features) -> str:
+    """
+    Hash of one feature vector.
+
+    Args:
+        features: One row of FEATURE_COLUMNS values, in FEATURE_COLUMNS order
+
+    Returns:
+        Hex digest of the values as float64
+    """
+    return hashlib.sha256(np.ascontiguousarray(features, dtype=np.float64).tobytes()).hexdigest()
+
+def get_cached_prediction(key: str, version: str) -> Optional[Dict]:
+    """
+    Look up a prediction, counting a hit or miss.
+
+    Args:
+        key: feature_key of the pair's features
+        version: Current model_version() of the artifacts behind the
+                 prediction; an entry stored under another version is dropped
+
+    Returns:
+        A copy of the cached prediction, or None
+    """
+    with _lock:
+        _cache['version'] = version
+        entry = _cache['entries'].get(key)
+        if entry is not None and entry[0] != version:
+            del _cache['entries'][key]
+            _cache['invalidations'] += 1
+            entry = None
+        if entry is None:
+            _cache['misses'] += 1
+            return None
+        result = entry[1]
+        _cache['entries'].move_to_end(key)
+        _cache['hits'] += 1
+    return copy.deepcopy(result)
+
+def store_prediction(key: str, version: str, result: Dict) -> None:
+    """Cache a prediction, evicting the least recently used beyond PREDICTION_CACHE_SIZE."""
+    result = copy.deepcopy(result)
+    with _lock:
+        _cache['version'] = version
+        _cache['entries'][key] = (version, result)
+        _cache['entries'].move_to_end(key)
+        while len(_cache['entries']) > PREDICTION_CACHE_SIZE:
+            _cache['entries'].popitem(last=False)
+
+def prediction_cache_stats() -> Dict:
+    """
+    Returns:
+        {'size', 'max_size', 'hits', 'misses', 'hit_rate', 'invalidations', 'model_version'}
+    """
+    with _lock:
+        lookups = _cache['hits'] + _cache['misses']
+        return {
+            'size': len(_cache['entries']),
+            'max_size': PREDICTION_CACHE_SIZE,
+            'hits': _cache['hits'],
+            'misses': _cache['misses'],
+            'hit_rate': _cache['hits'] / lookups if lookups else 0.0,
+            'invalidations': _cache['invalidations'],
+            'model_version': _cache['version']
+        }
+
+def clear_prediction_cache() -> None:
+    """Drop every cached prediction and reset the counters."""
+    with _lock:
+        _cache['entries'].clear()
+        _cache['version'] = None
+        _cache['hits'] = _cache['misses'] = _cache['invalidations'] = 0
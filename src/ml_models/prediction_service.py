@@ -0,0 +1,422 @@
+"""
+Local HTTP prediction service
+An asyncio server (standard library only) that answers readiness
+predictions over JSON. Concurrent requests are coalesced into micro-batches
+(up to max_batch_size requests, waiting at most max_wait_ms for more) that
+are predicted with one feature extraction and one vectorized model call;
+the models stay loaded between requests
+
+Endpoints:
+    POST /predict  {"student_id": 1, "role_id": 2} or {"features": {<FEATURE_COLUMNS name>: value, ...}}
+    GET  /health   Liveness and whether the models are loaded
+    GET  /stats    Request, batch and latency percentile counters
+
+Usage:
+    python src/ml_models/prediction_service.py [--host 127.0.0.1] [--port 8765]
+                                               [--max-batch-size 64] [--max-wait-ms 5]
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from src.ml_models.predict import FEATURE_COLUMNS, predict_features
+from src.ml_models.compiled_trees import get_compiled_model
+from src.ml_models.model_registry import get_model
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+
+# Requests whose latency is kept for the percentiles in /stats
+LATENCY_WINDOW = 10000
+MAX_BODY_BYTES = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class RequestError(Exception):
+    """A request the service rejects, with the HTTP status to answer it with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def parse_prediction_request(body: bytes) -> Dict:
+    """
+    Validate a POST /predict body.
+
+    Returns:
+        {'student_id': int, 'role_id': int} or {'features': {name: float}}
+
+    Raises:
+        RequestError: (400) Malformed JSON, missing IDs or unknown/non-numeric features
+    """
+    try:
+        payload = json.loads(body or b'null')
+    except ValueError:
+        raise RequestError(400, "Body must be JSON")
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Body must be a JSON object")
+
+    if 'features' in payload:
+        features = payload['features']
+        if not isinstance(features, dict):
+            raise RequestError(400, "'features' must be an object")
+        unknown = sorted(set(features) - set(FEATURE_COLUMNS))
+        if unknown:
+            raise RequestError(400, f"Unknown feature: {unknown[0]}")
+        for name, value in features.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise RequestError(400, f"Feature {name} must be a number")
+        return {'features': {name: float(value) for name, value in features.items()}}
+
+    for key in ('student_id', 'role_id'):
+        if isinstance(payload.get(key), bool) or not isinstance(payload.get(key), int):
+            raise RequestError(400, f"'{key}' must be an integer (or send 'features')")
+    return {'student_id': payload['student_id'], 'role_id': payload['role_id']}
+
+def predict_requests(requests: List[Dict]) -> List:
+    """
+    Predict a micro-batch of parsed requests with one model call.
+
+    Pair requests share one extract_features_for_pairs call; feature
+    requests are used as given (missing features are 0). All rows then go
+    through predict_features on the compiled tree models.
+
+    Args:
+        requests: Outputs of parse_prediction_request
+
+    Returns:
+        One entry per request: {'readiness_score_ml', 'readiness_level_ml', 'probabilities'},
+        or a RequestError for a request that could not be predicted
+    """
+    from src.database.connection import get_db_session
+    from src.ml_models.feature_extraction import extract_features_for_pairs
+
+    classifier = get_compiled_model('classifier')
+    regressor = get_compiled_model('regressor')
+    label_encoder = get_model('label_encoder')
+    if classifier is None or regressor is None or label_encoder is None:
+        error = RequestError(503, "Models not trained. Please run train_models.py first.")
+        return [error] * len(requests)
+
+    results: List = [None] * len(requests)
+    rows = []
+    pair_positions = [i for i, request in enumerate(requests) if 'features' not in request]
+    feature_positions = [i for i, request in enumerate(requests) if 'features' in request]
+
+    if pair_positions:
+        session = get_db_session()
+        try:
+            pairs = [requests[i] for i in pair_positions]
+            try:
+                pair_features = extract_features_for_pairs(
+                    session, [p['student_id'] for p in pairs], [p['role_id'] for p in pairs]
+                )
+                rows.append(pair_features.set_axis(pair_positions))
+            except ValueError:
+                # An unknown student or role: extract pair by pair to fail only those requests
+                for i in pair_positions:
+                    try:
+                        features = extract_features_for_pairs(session, [requests[i]['student_id']], [requests[i]['role_id']])
+                        rows.append(features.set_axis([i]))
+                    except ValueError as e:
+                        results[i] = RequestError(404, str(e))
+        finally:
+            session.close()
+
+    if feature_positions:
+        rows.append(pd.DataFrame([requests[i]['features'] for i in feature_positions], index=feature_positions))
+
+    rows = [frame for frame in rows if len(frame)]
+    if not rows:
+        return results
+
+    X = pd.concat(rows).reindex(columns=FEATURE_COLUMNS, fill_value=0).fillna(0)
+    predictions = predict_features(X, classifier, regressor, label_encoder, chunk_size=len(X))
+    probability_columns = [c for c in predictions.columns if c.startswith('probability_')]
+
+    for i, score, level, *probabilities in zip(
+        predictions.index, predictions['readiness_score_ml'], predictions['readiness_level_ml'],
+        *(predictions[c] for c in probability_columns)
+    ):
+        results[i] = {
+            'readiness_score_ml': float(score),
+            'readiness_level_ml': str(level),
+            'probabilities': {
+                column[len('probability_'):]: float(p) for column, p in zip(probability_columns, probabilities)
+            }
+        }
+    return results
+
+class PredictionService:
+    """
+    asyncio HTTP server that micro-batches prediction requests.
+
+    A single batching task takes requests off a queue: the first request
+    opens a batch, which is closed when it holds max_batch_size requests or
+    max_wait_ms have passed. The batch is predicted on a worker thread, so
+    the event loop keeps accepting (and queueing the next batch) meanwhile.
+
+    Attributes:
+        host, port: Bound address (port is the real one when 0 was requested)
+        max_batch_size: Requests per model call
+        max_wait_ms: Longest time a batch waits for more requests
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        self.host = host
+        self.port = port
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        # One worker: batches run one at a time, each on its own session
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prediction-batch')
+        self._started_at = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {'requests': 0, 'errors': 0, 'batches': 0, 'batched_requests': 0,
+                          'max_batch': 0, 'model_seconds': 0.0}
+
+    async def start(self) -> None:
+        """Load the models and start listening."""
+        loop = asyncio.get_running_loop()
+        # Load and compile up front so the first request does not pay for it
+        await loop.run_in_executor(self._executor, lambda: [
+            get_compiled_model('classifier'), get_compiled_model('regressor'), get_model('label_encoder')
+        ])
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started_at = time.monotonic()
+        print(f"✓ Prediction service listening on http://{self.host}:{self.port} "
+              f"(max batch {self.max_batch_size}, max wait {self.max_wait_ms} ms)")
+
+    async def stop(self) -> None:
+        """Stop accepting connections and cancel the batching task."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def predict(self, request: Dict) -> Dict:
+        """Queue one parsed request and wait for its batch's result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, predict_requests, [r for r, _ in batch])
+            except Exception as e:
+                results = [RequestError(500, str(e))] * len(batch)
+            self._counters['model_seconds'] += time.perf_counter() - start
+            self._counters['batches'] += 1
+            self._counters['batched_requests'] += len(batch)
+            self._counters['max_batch'] = max(self._counters['max_batch'], len(batch))
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict:
+        """
+        Service counters and latency percentiles.
+
+        Returns:
+            {'uptime_seconds', 'requests', 'errors', 'batches', 'avg_batch_size', 'max_batch_size',
+             'model_seconds', 'latency_ms': {'p50', 'p90', 'p95', 'p99', 'max'} over the last
+             LATENCY_WINDOW prediction requests (empty before the first one)}
+        """
+        latencies = np.array(self._latencies) * 1000
+        percentiles = {}
+        if len(latencies):
+            p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+            percentiles = {'p50': round(p50, 3), 'p90': round(p90, 3), 'p95': round(p95, 3),
+                           'p99': round(p99, 3), 'max': round(float(latencies.max()), 3)}
+        batches = self._counters['batches']
+        return {
+            'uptime_seconds': round(time.monotonic() - self._started_at, 1) if self._started_at else 0.0,
+            'requests': self._counters['requests'],
+            'errors': self._counters['errors'],
+            'batches': batches,
+            'avg_batch_size': round(self._counters['batched_requests'] / batches, 2) if batches else 0.0,
+            'max_batch_size': self._counters['max_batch'],
+            'model_seconds': round(self._counters['model_seconds'], 3),
+            'latency_ms': percentiles
+        }
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if path == '/predict':
+            if method != 'POST':
+                raise RequestError(405, "Use POST /predict")
+            start = time.perf_counter()
+            self._counters['requests'] += 1
+            try:
+                result = await self.predict(parse_prediction_request(body))
+            except Exception:
+                self._counters['errors'] += 1
+                raise
+            finally:
+                self._latencies.append(time.perf_counter() - start)
+            return 200, result
+        if method != 'GET':
+            raise RequestError(405, f"Use GET {path}")
+        if path == '/health':
+            loaded = get_compiled_model('classifier') is not None and get_compiled_model('regressor') is not None
+            return 200, {'status': 'ok', 'models_loaded': loaded}
+        if path == '/stats':
+            return 200, self.stats()
+        raise RequestError(404, f"No endpoint {path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                length = headers.get('content-length', '0')
+                if len(parts) != 3 or not length.isdigit():
+                    # The body cannot be skipped reliably, so the connection is closed
+                    writer.write(_http_response(400, {'error': "Malformed request"}, keep_alive=False))
+                    break
+                if int(length) > MAX_BODY_BYTES:
+                    writer.write(_http_response(413, {'error': f"Body larger than {MAX_BODY_BYTES} bytes"},
+                                                keep_alive=False))
+                    break
+
+                method, target, version = parts
+                body = await reader.readexactly(int(length)) if int(length) else b''
+                try:
+                    status, payload = await self._route(method.upper(), target.split('?', 1)[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(_http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def _http_response(status: int, payload: Dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+async def send_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                       payload: Optional[Dict] = None) -> Tuple[int, Dict]:
+    """
+    Send one request over an open keep-alive connection to the service.
+
+    Returns:
+        (HTTP status, decoded JSON body)
+    """
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve readiness predictions over local HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Bind address (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f'Requests per model call (default: {DEFAULT_MAX_BATCH_SIZE})')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f'Longest wait for a batch to fill (default: {DEFAULT_MAX_WAIT_MS})')
+    args = parser.parse_args()
+
+    service = PredictionService(args.host, args.port, args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print("\n✓ Prediction service stopped")
+
+if __name__ == "__main__":
+    main()
@@ -160,6 +160,448 @@ def test_prediction_functions():
     finally:
         session.close()
 
+def test_streamed_predictions_match_batch():
+    """iter_predictions_ml streams bounded batches with the same rows as predict_batch_ml."""
+    from src.ml_models.predict import load_models, iter_predictions_ml, predict_batch_ml
+    from src.database.connection import get_db_session
+    from src.database.models import Student
+    import pandas as pd
+    
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(12)]
+        batches = list(iter_predictions_ml(session, student_ids=student_ids, batch_size=25))
+        assert all(len(batch) <= 25 for batch in batches)
+        
+        streamed = pd.concat(batches, ignore_index=True)
+        expected = predict_batch_ml(session, student_ids=student_ids)
+        assert set(streamed['student_id']) == set(student_ids)
+        pd.testing.assert_frame_equal(streamed, expected)
+    finally:
+        session.close()
+
+def test_model_registry_reloads_only_changed_files(tmp_path, monkeypatch):
+    """Artifacts load once, survive a touch, reload on new content, and load once under concurrency."""
+    import os
+    import threading
+    from src.ml_models import model_registry
+    
+    path = tmp_path / 'artifact.pkl'
+    joblib.dump({'version': 1}, path)
+    monkeypatch.setitem(model_registry.MODEL_ARTIFACTS, 'label_encoder', (path, 'test artifact'))
+    model_registry.clear_model_registry()
+    
+    try:
+        loaded = []
+        threads = [threading.Thread(target=lambda: loaded.append(model_registry.get_model('label_encoder')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(model is loaded[0] for model in loaded)
+        assert model_registry.model_load_stats()['label_encoder']['loads'] == 1
+        
+        # Same content, new mtime: hash matches, no reload
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert model_registry.get_model('label_encoder') is loaded[0]
+        assert model_registry.model_load_stats()['label_encoder']['loads'] == 1
+        
+        # New content (as after retraining): reloaded
+        joblib.dump({'version': 2}, path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        assert model_registry.get_model('label_encoder') == {'version': 2}
+        stats = model_registry.model_load_stats()['label_encoder']
+        assert stats['loads'] == 2 and stats['load_seconds'] > 0
+    finally:
+        model_registry.clear_model_registry()
+
+def test_batched_predictions_match_single_pair():
+    """Batched extraction and chunked predict reproduce predict_readiness_ml pair by pair."""
+    from src.ml_models.predict import load_models, predict_batch_ml, predict_readiness_ml
+    from src.database.connection import get_db_session
+    from src.database.models import Student
+    import pandas as pd
+    
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(10)]
+        batched = predict_batch_ml(session, student_ids=student_ids)
+        assert len(batched) > 0
+        pd.testing.assert_frame_equal(predict_batch_ml(session, student_ids=student_ids, chunk_size=7), batched)
+        
+        for row in batched.itertuples(index=False):
+            single = predict_readiness_ml(row.student_id, row.role_id, session)
+            assert row.readiness_score_ml == single['readiness_score_ml']
+            assert row.readiness_level_ml == single['readiness_level_ml']
+            for level, probability in single['readiness_score_ml_probabilities'].items():
+                assert batched.loc[
+                    (batched['student_id'] == row.student_id) & (batched['role_id'] == row.role_id),
+                    f'probability_{level}'
+                ].item() == probability
+    finally:
+        session.close()
+
+def test_compiled_trees_match_sklearn_on_training_set():
+    """Flat-array inference reproduces predict / predict_proba of all three models on every stored pair."""
+    from src.ml_models.predict import FEATURE_COLUMNS, load_models
+    from src.ml_models.feature_extraction import extract_features_for_pairs
+    from src.ml_models.compiled_trees import compile_model, get_compiled_model
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    import numpy as np
+    
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    session = get_db_session()
+    try:
+        pairs = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).all()
+        X = extract_features_for_pairs(session, [s for s, _ in pairs], [r for _, r in pairs])[FEATURE_COLUMNS]
+    finally:
+        session.close()
+    
+    for model in (classifier, gb_classifier, regressor):
+        if model is None:
+            continue
+        compiled = compile_model(model)
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+        np.testing.assert_array_equal(compiled.predict(X.iloc[[0]]), model.predict(X.iloc[[0]]))
+        if hasattr(model, 'predict_proba'):
+            np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    
+    assert get_compiled_model('classifier') is get_compiled_model('classifier')
+
+def test_prediction_service_batches_concurrent_requests():
+    """Concurrent requests are coalesced into micro-batches and answered like predict_batch_ml."""
+    import asyncio
+    from src.ml_models.predict import FEATURE_COLUMNS, load_models, predict_batch_ml
+    from src.ml_models.prediction_service import PredictionService, send_request
+    from src.ml_models.feature_extraction import extract_features_for_pairs
+    from src.database.connection import get_db_session
+    from src.database.models import Student
+    
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(6)]
+        expected = predict_batch_ml(session, student_ids=student_ids)
+        first = expected.iloc[0]
+        features = extract_features_for_pairs(session, [int(first.student_id)], [int(first.role_id)]).iloc[0]
+    finally:
+        session.close()
+    
+    async def scenario():
+        service = PredictionService('127.0.0.1', 0, max_batch_size=16, max_wait_ms=50)
+        await service.start()
+        try:
+            async def call(method, path, payload=None):
+                reader, writer = await asyncio.open_connection(service.host, service.port)
+                try:
+                    return await send_request(reader, writer, method, path, payload)
+                finally:
+                    writer.close()
+            
+            pairs = await asyncio.gather(*(
+                call('POST', '/predict', {'student_id': int(row.student_id), 'role_id': int(row.role_id)})
+                for row in expected.itertuples()
+            ))
+            by_features = await call('POST', '/predict', {'features': {
+                name: float(features[name]) for name in FEATURE_COLUMNS
+            }})
+            unknown = await call('POST', '/predict', {'student_id': -1, 'role_id': int(first.role_id)})
+            invalid = await call('POST', '/predict', {'student_id': 'x'})
+            stats = (await call('GET', '/stats'))[1]
+            return pairs, by_features, unknown, invalid, stats
+        finally:
+            await service.stop()
+    
+    pairs, by_features, unknown, invalid, stats = asyncio.run(scenario())
+    
+    for (status, body), row in zip(pairs, expected.itertuples()):
+        assert status == 200
+        assert body['readiness_score_ml'] == row.readiness_score_ml
+        assert body['readiness_level_ml'] == row.readiness_level_ml
+    assert by_features == (200, pairs[0][1])
+    assert unknown[0] == 404 and invalid[0] == 400
+    
+    assert stats['requests'] == len(expected) + 3
+    assert stats['batches'] < len(expected)
+    assert stats['latency_ms']['p50'] <= stats['latency_ms']['p99']
+
+def test_prediction_cache_hits_evicts_and_invalidates(monkeypatch):
+    """Repeated predictions are served from the cache, which is bounded and emptied by a new model version."""
+    from src.ml_models import predict, prediction_cache
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    
+    classifier, gb_classifier, regressor, label_encoder = predict.load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    prediction_cache.clear_prediction_cache()
+    monkeypatch.setattr(prediction_cache, 'PREDICTION_CACHE_SIZE', 3)
+    session = get_db_session()
+    try:
+        pairs = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).limit(2).all()
+        first = [predict.predict_readiness_ml(s, r, session) for s, r in pairs]
+        misses = prediction_cache.prediction_cache_stats()['misses']
+        assert misses >= 1
+        
+        first[0]['readiness_score_ml'] = -1  # callers get copies
+        second = [predict.predict_readiness_ml(s, r, session) for s, r in pairs]
+        stats = prediction_cache.prediction_cache_stats()
+        assert stats['misses'] == misses and stats['hits'] >= 2
+        assert second[1] == first[1] and second[0]['readiness_score_ml'] != -1
+        
+        # Retrained models: an entry from the old models is dropped on lookup
+        monkeypatch.setattr(predict, 'model_version', lambda names=None: 'retrained')
+        assert predict.predict_readiness_ml(*pairs[0], session) == second[0]
+        stats = prediction_cache.prediction_cache_stats()
+        assert stats['misses'] == misses + 1 and stats['invalidations'] == 1
+        assert stats['size'] == 2 and stats['model_version'] == 'retrained'
+        
+        for key in 'abcd':
+            prediction_cache.store_prediction(key, 'retrained', {'key': key})
+        assert prediction_cache.prediction_cache_stats()['size'] == 3
+        assert prediction_cache.get_cached_prediction('a', 'retrained') is None
+        assert prediction_cache.get_cached_prediction('d', 'retrained') == {'key': 'd'}
+    finally:
+        session.close()
+        prediction_cache.clear_prediction_cache()
+
+def test_portfolio_predictions_match_stored_students_without_writes():
+    """A student's portfolio submitted in memory gets the same features and predictions as the stored student."""
+    from sqlalchemy import event
+    from src.ml_models.predict import load_models, predict_readiness_ml, predict_readiness_from_portfolio
+    from src.ml_models.feature_extraction import extract_features_for_pairs, extract_features_for_portfolios
+    from src.database.connection import get_db_session, get_engine
+    from src.database.models import Student, StudentSkills, JobRole
+    import pandas as pd
+    
+    session = get_db_session()
+    try:
+        students = session.query(Student).order_by(Student.student_id).limit(20).all()
+        role_ids = [r for (r,) in session.query(JobRole.role_id).order_by(JobRole.role_id)]
+        portfolios, pairs = [], []
+        for student in students:
+            skills = [
+                {'skill_id': s.skill_id, 'proficiency_level': s.proficiency_level,
+                 'proficiency_score': float(s.proficiency_score), 'source': s.source}
+                for s in session.query(StudentSkills).filter_by(student_id=student.student_id).order_by(StudentSkills.id)
+            ]
+            for role_id in role_ids:
+                portfolios.append({'program': student.program, 'year_of_study': student.year_of_study,
+                                   'enrollment_year': student.enrollment_year, 'role_id': role_id, 'skills': skills})
+                pairs.append((student.student_id, role_id))
+        
+        pd.testing.assert_frame_equal(
+            extract_features_for_portfolios(session, portfolios),
+            extract_features_for_pairs(session, [s for s, _ in pairs], [r for _, r in pairs])
+        )
+        with pytest.raises(ValueError):
+            extract_features_for_portfolios(session, [dict(portfolios[0], program='MBA')])
+        
+        classifier, gb_classifier, regressor, label_encoder = load_models()
+        if classifier is None or regressor is None:
+            pytest.skip("Models not trained. Run train_models.py first.")
+        
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(get_engine(), 'before_cursor_execute', listener)
+        try:
+            predictions = [predict_readiness_from_portfolio(portfolio, session) for portfolio in portfolios[:10]]
+            unknown_role = predict_readiness_from_portfolio(dict(portfolios[0], role_id=-1), session)
+        finally:
+            event.remove(get_engine(), 'before_cursor_execute', listener)
+        
+        assert not [s for s in statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        assert 'not found' in unknown_role['error']
+        for prediction, (student_id, role_id) in zip(predictions, pairs[:10]):
+            assert prediction == predict_readiness_ml(student_id, role_id, session)
+    finally:
+        session.close()
+
+def test_bulk_csv_predictions_match_stored_students(tmp_path):
+    """An uploaded intake CSV mirroring stored students is predicted like them, in one batch and without writes."""
+    from sqlalchemy import event
+    from src.etl.csv_loader import load_portfolios_csv
+    from src.ml_models.bulk_prediction import predict_portfolio_table
+    from src.ml_models.predict import load_models, predict_batch_ml
+    from src.database.connection import get_db_session, get_engine
+    from src.database.models import Student, StudentSkills, SkillsMaster, JobRole
+    import pandas as pd
+    
+    classifier, gb_classifier, regressor, label_encoder = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    session = get_db_session()
+    try:
+        students = session.query(Student).order_by(Student.student_id).limit(15).all()
+        rows = []
+        for student in students:
+            base = {'name': f'Prospect {student.student_id}', 'program': student.program,
+                    'year_of_study': student.year_of_study, 'enrollment_year': student.enrollment_year,
+                    'target_role': student.target_role}
+            skills = session.query(StudentSkills, SkillsMaster.skill_name).join(
+                SkillsMaster, StudentSkills.skill_id == SkillsMaster.skill_id
+            ).filter(StudentSkills.student_id == student.student_id).order_by(StudentSkills.id).all()
+            rows += [{**base, 'skill_name': name, 'proficiency_level': skill.proficiency_level, 'source': skill.source}
+                     for skill, name in skills] or [base]
+        csv_path = tmp_path / 'intake.csv'
+        pd.DataFrame(rows).to_csv(csv_path, index=False)
+        
+        portfolio_df, error = load_portfolios_csv(str(csv_path))
+        assert error is None
+        
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(get_engine(), 'before_cursor_execute', listener)
+        try:
+            result = predict_portfolio_table(session, portfolio_df)
+        finally:
+            event.remove(get_engine(), 'before_cursor_execute', listener)
+        assert not [s for s in statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        
+        role_names = {role.role_name for role in session.query(JobRole)}
+        expected_rows = sum(1 if student.target_role in role_names else len(role_names) for student in students)
+        assert len(result) == expected_rows
+        
+        stored = predict_batch_ml(session, student_ids=[student.student_id for student in students])
+        stored['name'] = 'Prospect ' + stored['student_id'].astype(str)
+        stored['role_name'] = stored['role_id'].map(dict(session.query(JobRole.role_id, JobRole.role_name)))
+        merged = result.merge(stored, on=['name', 'role_name'], suffixes=('', '_stored'))
+        assert len(merged) == len(result)
+        for column in ['readiness_score_ml', 'readiness_level_ml', 'matched_skills_count', 'skill_gap_count']:
+            assert (merged[column] == merged[f'{column}_stored']).all(), column
+        
+        pd.DataFrame(rows).assign(program='MBA').to_csv(csv_path, index=False)
+        portfolio_df, error = load_portfolios_csv(str(csv_path))
+        assert portfolio_df is None and 'Invalid program' in error
+    finally:
+        session.close()
+
+def test_predictions_load_only_the_models_they_use():
+    """A score-only prediction loads just the regressor; its score matches the full prediction."""
+    from src.ml_models import model_registry
+    from src.ml_models.compiled_trees import clear_compiled_models
+    from src.ml_models.prediction_cache import clear_prediction_cache, prediction_cache_stats
+    from src.ml_models.predict import predict_readiness_ml
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    
+    if not all(path.exists() for path, _ in model_registry.MODEL_ARTIFACTS.values()):
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    def loaded():
+        return {name for name, stats in model_registry.model_load_stats().items() if stats['loaded']}
+    
+    model_registry.clear_model_registry()
+    clear_compiled_models()
+    clear_prediction_cache()
+    session = get_db_session()
+    try:
+        pair = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).first()
+        score_only = predict_readiness_ml(*pair, session, outputs=('score',))
+        assert loaded() == {'regressor'}
+        assert score_only['readiness_level_ml'] is None and 'decision_tree' not in score_only
+        assert score_only['model_used'] == 'ML (Random Forest)'
+        
+        level_only = predict_readiness_ml(*pair, session, outputs=('level',))
+        assert loaded() == {'regressor', 'classifier', 'label_encoder'}
+        assert level_only['readiness_score_ml'] is None
+        
+        full = predict_readiness_ml(*pair, session)
+        assert loaded() == set(model_registry.MODEL_ARTIFACTS)
+        
+        # Loading more models is not a new model version: the cache keeps its entries
+        stats = prediction_cache_stats()
+        assert stats['invalidations'] == 0 and stats['size'] == 3
+        assert stats['model_version'] == model_registry.model_version()
+        assert full['readiness_score_ml'] == score_only['readiness_score_ml']
+        assert full['decision_tree'] == level_only['decision_tree']
+        assert full['model_used'] == 'ML (Random Forest + Decision Tree + Gradient Boosting)'
+        
+        with pytest.raises(ValueError):
+            predict_readiness_ml(*pair, session, outputs=('probabilities',))
+    finally:
+        session.close()
+        clear_prediction_cache()
+
+def test_cached_prediction_touches_only_its_artifacts(monkeypatch):
+    """A score-only prediction never hashes the other artifacts, and a cache hit compiles nothing."""
+    from src.ml_models import model_registry, predict
+    from src.ml_models.compiled_trees import clear_compiled_models
+    from src.ml_models.prediction_cache import clear_prediction_cache, prediction_cache_stats
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    
+    if not all(path.exists() for path, _ in model_registry.MODEL_ARTIFACTS.values()):
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    hashed = []
+    file_hash = model_registry._file_hash
+    monkeypatch.setattr(model_registry, '_file_hash', lambda path: hashed.append(path) or file_hash(path))
+    model_registry.clear_model_registry()
+    clear_compiled_models()
+    clear_prediction_cache()
+    session = get_db_session()
+    try:
+        pair = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).first()
+        first = predict.predict_readiness_ml(*pair, session, outputs=('score',))
+        assert hashed == [model_registry.REGRESSOR_PATH]
+        
+        def no_compile(name):
+            raise AssertionError(f"compiled {name} for a cached prediction")
+        monkeypatch.setattr(predict, 'get_compiled_model', no_compile)
+        assert predict.predict_readiness_ml(*pair, session, outputs=('score',)) == first
+        assert prediction_cache_stats()['hits'] == 1
+        assert hashed == [model_registry.REGRESSOR_PATH]
+    finally:
+        session.close()
+        clear_prediction_cache()
+
+def test_gradient_boosting_only_prediction_needs_the_model(monkeypatch, tmp_path):
+    """Without a trained Gradient Boosting model, a GB-only prediction is an error; with others it is skipped."""
+    from src.ml_models import model_registry
+    from src.ml_models.prediction_cache import clear_prediction_cache
+    from src.ml_models.predict import predict_readiness_ml
+    from src.database.connection import get_db_session
+    from src.database.models import MarketReadinessScores
+    
+    if not all(path.exists() for path, _ in model_registry.MODEL_ARTIFACTS.values()):
+        pytest.skip("Models not trained. Run train_models.py first.")
+    
+    monkeypatch.setitem(model_registry.MODEL_ARTIFACTS, 'gb_classifier',
+                        (tmp_path / 'missing.pkl', 'Gradient Boosting classifier'))
+    clear_prediction_cache()
+    session = get_db_session()
+    try:
+        pair = session.query(MarketReadinessScores.student_id, MarketReadinessScores.role_id).first()
+        gb_only = predict_readiness_ml(*pair, session, outputs=('gradient_boosting',))
+        assert gb_only['error'] and gb_only['model_used'] is None
+        
+        with_score = predict_readiness_ml(*pair, session, outputs=('score', 'gradient_boosting'))
+        assert not with_score.get('error') and 'gradient_boosting' not in with_score
+        assert with_score['model_used'] == 'ML (Random Forest)'
+    finally:
+        session.close()
+        clear_prediction_cache()
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -0,0 +1,936 @@
+"""
+Tests for the rule-based scoring engines
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+import numpy as np
+from datetime import timedelta
+from sqlalchemy import event, func
+from src.database.connection import get_db_session, get_engine
+from src.database.models import *
+from src.core.scoring import calculate_readiness_score, calculate_all_scores, find_dirty_students, score_portfolio
+from src.core.scoring_matrix import calculate_scores_matrix, score_matrices, round_scores
+from src.core.role_cache import get_role_requirements
+
+class QueryCounter:
+    """Count SQL statements sent through the engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(get_engine(), 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(get_engine(), 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def test_matrix_scores_match_rule_based():
+    """Vectorized engine must reproduce calculate_readiness_score for every pair."""
+    session = get_db_session()
+    try:
+        scores = calculate_scores_matrix(session, exact=True)
+        assert len(scores['student_id']) == session.query(Student).count() * session.query(JobRole).count()
+
+        for i in range(len(scores['student_id'])):
+            expected = calculate_readiness_score(
+                int(scores['student_id'][i]), int(scores['role_id'][i]), session, use_ml=False, exact=True
+            )
+            assert float(scores['readiness_score'][i]) == expected['readiness_score']
+            assert scores['readiness_level'][i] == expected['readiness_level']
+            assert int(scores['matched_skills_count'][i]) == expected['matched_skills_count']
+            assert int(scores['required_skills_count'][i]) == expected['required_skills_count']
+            assert int(scores['skill_gap_count'][i]) == expected['skill_gap_count']
+    finally:
+        session.close()
+
+def test_float_fast_path_matches_exact():
+    """float64 scoring must agree with exact scoring across the whole cohort."""
+    session = get_db_session()
+    try:
+        fast = calculate_scores_matrix(session)
+        exact = calculate_scores_matrix(session, exact=True)
+        for key in ('readiness_score', 'readiness_level', 'matched_skills_count', 'skill_gap_count'):
+            assert fast[key].tolist() == exact[key].tolist()
+
+        for student_id, role_id in zip(exact['student_id'].tolist(), exact['role_id'].tolist()):
+            assert calculate_readiness_score(student_id, role_id, session, use_ml=False) == \
+                calculate_readiness_score(student_id, role_id, session, use_ml=False, exact=True)
+    finally:
+        session.close()
+
+    # Exactly on the 50 boundary, where the float sum lands just below 50
+    from decimal import Decimal
+    weights = (Decimal('0.05'), Decimal('0.05'), Decimal('0.35'))
+    levels = (Decimal('0.25'), Decimal('0.25'), Decimal('0.50'))
+    requirements = {
+        'skill_ids': (1, 2, 3),
+        'skill_names': ('a', 'b', 'c'),
+        'required_proficiency': levels,
+        'importance_weight': weights,
+        'total_weight': sum(weights),
+        'required_proficiency_array': np.array(levels, dtype=np.float64),
+        'importance_weight_array': np.array(weights, dtype=np.float64)
+    }
+    portfolio = [(2, 0.75), (3, 0.25)]
+    fast = score_portfolio(requirements, portfolio)
+    assert fast == score_portfolio(requirements, portfolio, exact=True)
+    assert (fast['readiness_score'], fast['readiness_level']) == (50.0, 'Developing')
+
+    student_matrix = {
+        'student_ids': np.array([1]),
+        'skill_ids': np.array([1, 2, 3]),
+        'proficiency': np.array([[0, 75, 25]]),
+        'has_skill': np.array([[False, True, True]])
+    }
+    role_matrix = {
+        'role_ids': np.array([1]),
+        'skill_ids': np.array([1, 2, 3]),
+        'required': np.array([[True, True, True]]),
+        'required_proficiency': np.array([[25, 25, 50]]),
+        'importance_weight': np.array([[5, 5, 35]])
+    }
+    fast = score_matrices(student_matrix, role_matrix)
+    exact = score_matrices(student_matrix, role_matrix, exact=True)
+    assert fast.readiness_score.tolist() == exact.readiness_score.tolist() == [50.0]
+    assert fast.readiness_level.tolist() == exact.readiness_level.tolist() == ['Developing']
+
+def test_score_matrices_partial_credit():
+    """Partial credit, capped credit, zero proficiency and roles without requirements."""
+    student_matrix = {
+        'student_ids': np.array([1, 2]),
+        'skill_ids': np.array([10, 20]),
+        # Student 1: skill 10 at 0.75, skill 20 at 0.25; student 2: skill 10 held at 0.00
+        'proficiency': np.array([[75, 25], [0, 0]]),
+        'has_skill': np.array([[True, True], [True, False]])
+    }
+    role_matrix = {
+        'role_ids': np.array([100, 200]),
+        'skill_ids': np.array([10, 20]),
+        'required': np.array([[True, True], [False, False]]),
+        # Role 100: skill 10 Advanced (weight 1.0), skill 20 Intermediate (weight 0.9)
+        'required_proficiency': np.array([[75, 50], [0, 0]]),
+        'importance_weight': np.array([[100, 90], [0, 0]])
+    }
+
+    for exact in (False, True):
+        scores = score_matrices(student_matrix, role_matrix, exact=exact)
+
+        # (1.0 × 1.0 + 0.5 × 0.9) / 1.9 × 100 = 76.315...
+        assert scores['readiness_score'].tolist() == [76.32, 0.0, 0.0, 0.0]
+        assert scores['readiness_level'].tolist() == ['Developing', 'Entry-Level', 'Entry-Level', 'Entry-Level']
+        assert scores['matched_skills_count'].tolist() == [2, 0, 1, 0]
+        assert scores['required_skills_count'].tolist() == [2, 0, 2, 0]
+        assert scores['skill_gap_count'].tolist() == [0, 0, 1, 0]
+
+def test_round_scores_matches_builtin_round():
+    """Rounding must agree with round() on .xx5 ties."""
+    values = np.array([62.125, 62.135, 50.005, 1.005, 33.333333, 99.995, 0.0])
+    assert round_scores(values).tolist() == [round(v, 2) for v in values.tolist()]
+
+def test_bulk_upsert_updates_in_place():
+    """Rescoring upserts onto unique_student_role instead of adding rows."""
+    session = get_db_session()
+    try:
+        calculate_all_scores(session, use_ml=False, chunk_size=300)
+        calculate_all_scores(session, use_ml=False, chunk_size=300)
+
+        n_pairs = session.query(Student).count() * session.query(JobRole).count()
+        assert session.query(MarketReadinessScores).count() == n_pairs
+
+        expected = calculate_scores_matrix(session)
+        stored = {
+            (row.student_id, row.role_id): (float(row.readiness_score), row.readiness_level)
+            for row in session.query(MarketReadinessScores)
+        }
+        for student_id, role_id, score, level in zip(
+            expected['student_id'].tolist(), expected['role_id'].tolist(),
+            expected['readiness_score'].tolist(), expected['readiness_level'].tolist()
+        ):
+            assert stored[(student_id, role_id)] == (score, level)
+    finally:
+        session.close()
+
+def test_incremental_rescores_only_changed_students():
+    """A new skill marks only its student dirty, and an incremental run cleans it."""
+    from datetime import date
+
+    session = get_db_session()
+    try:
+        calculate_all_scores(session, use_ml=False)
+        assert find_dirty_students(session) == []
+
+        student = session.query(Student).first()
+        held = {s.skill_id for s in session.query(StudentSkills).filter_by(student_id=student.student_id)}
+        skill = session.query(SkillsMaster).filter(~SkillsMaster.skill_id.in_(held)).first()
+        new_skill = StudentSkills(
+            student_id=student.student_id,
+            skill_id=skill.skill_id,
+            proficiency_level='Expert',
+            proficiency_score=1.0,
+            acquisition_date=date.today(),
+            source='Course'
+        )
+        session.add(new_skill)
+        session.commit()
+
+        try:
+            assert find_dirty_students(session) == [student.student_id]
+            calculate_all_scores(session, use_ml=False, incremental=True)
+            assert find_dirty_students(session) == []
+        finally:
+            session.delete(new_skill)
+            session.commit()
+            calculate_all_scores(session, use_ml=False)
+    finally:
+        session.close()
+
+def test_rescoring_skips_unchanged_rows():
+    """A repeat run writes no rows, and an irrelevant new skill still clears the student's dirty flag."""
+    from datetime import date
+    from src.core.score_writer import upsert_scores
+
+    session = get_db_session()
+    try:
+        calculate_all_scores(session, use_ml=False)
+        calculated_at = dict(session.query(MarketReadinessScores.id, MarketReadinessScores.calculated_at))
+
+        stats = upsert_scores(session, calculate_scores_matrix(session))
+        session.commit()
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 0, stats['rows'])
+        assert dict(session.query(MarketReadinessScores.id, MarketReadinessScores.calculated_at)) == calculated_at
+
+        # A skill no role requires changes no score, but the rows must still be refreshed
+        required = {s for (s,) in session.query(JobRoleSkills.skill_id)}
+        skill = session.query(SkillsMaster).filter(~SkillsMaster.skill_id.in_(required)).first()
+        student = session.query(Student).filter(
+            ~Student.student_id.in_(
+                session.query(StudentSkills.student_id).filter_by(skill_id=skill.skill_id)
+            )
+        ).first()
+        new_skill = StudentSkills(
+            student_id=student.student_id,
+            skill_id=skill.skill_id,
+            proficiency_level='Expert',
+            proficiency_score=1.0,
+            acquisition_date=date.today(),
+            source='Course'
+        )
+        session.add(new_skill)
+        session.commit()
+        try:
+            assert find_dirty_students(session) == [student.student_id]
+            calculate_all_scores(session, use_ml=False, incremental=True)
+            assert find_dirty_students(session) == []
+        finally:
+            session.delete(new_skill)
+            session.commit()
+    finally:
+        session.close()
+
+def test_role_cache_invalidated_on_requirement_change():
+    """Editing job_role_skills through the ORM drops the cached requirements."""
+    from decimal import Decimal
+
+    session = get_db_session()
+    try:
+        requirement = session.query(JobRoleSkills).order_by(JobRoleSkills.id).first()
+        original_weight = requirement.importance_weight
+        cached = get_role_requirements(session, requirement.role_id)
+        assert get_role_requirements(session, requirement.role_id) is cached
+
+        new_weight = Decimal('0.10') if original_weight != Decimal('0.10') else Decimal('0.20')
+        requirement.importance_weight = new_weight
+        session.commit()
+        try:
+            reloaded = get_role_requirements(session, requirement.role_id)
+            assert reloaded is not cached
+            position = reloaded['skill_ids'].index(requirement.skill_id)
+            assert reloaded['importance_weight'][position] == new_weight
+        finally:
+            requirement.importance_weight = original_weight
+            session.commit()
+
+        position = cached['skill_ids'].index(requirement.skill_id)
+        assert get_role_requirements(session, requirement.role_id)['importance_weight'][position] == original_weight
+    finally:
+        session.close()
+
+def test_missing_skills_need_no_per_skill_queries():
+    """Building missing_skills must not query skills_master once per missing skill."""
+    session = get_db_session()
+    try:
+        role = session.query(JobRole).first()
+        student = session.query(Student).order_by(Student.year_of_study).first()
+        get_role_requirements(session, role.role_id)  # warm the cache
+
+        with QueryCounter() as queries:
+            result = calculate_readiness_score(student.student_id, role.role_id, session, use_ml=False)
+
+        assert result['skill_gap_count'] > 0
+        assert len(result['missing_skills']) == result['skill_gap_count']
+        # Only the student's skills are fetched; requirements and names come from the cache
+        assert queries.count == 1
+    finally:
+        session.close()
+
+def test_split_shards_covers_all_students():
+    """Shards are contiguous, non-empty and cover every student exactly once."""
+    from src.core.scoring_parallel import split_shards
+
+    shards = split_shards(list(range(1, 11)), 4)
+    assert [len(shard) for shard in shards] == [3, 3, 2, 2]
+    assert sum(shards, []) == list(range(1, 11))
+    assert split_shards([7, 8], 16) == [[7], [8]]
+
+def test_parallel_scoring_matches_serial():
+    """Sharded multi-process scoring writes the same rows as the serial engine."""
+    session = get_db_session()
+    try:
+        written = calculate_all_scores(session, use_ml=False, workers=2)
+        n_pairs = session.query(Student).count() * session.query(JobRole).count()
+        assert written == n_pairs
+        assert session.query(MarketReadinessScores).count() == n_pairs
+
+        expected = calculate_scores_matrix(session)
+        stored = {
+            (row.student_id, row.role_id): (float(row.readiness_score), row.readiness_level)
+            for row in session.query(MarketReadinessScores)
+        }
+        for student_id, role_id, score, level in zip(
+            expected['student_id'].tolist(), expected['role_id'].tolist(),
+            expected['readiness_score'].tolist(), expected['readiness_level'].tolist()
+        ):
+            assert stored[(student_id, role_id)] == (score, level)
+    finally:
+        session.close()
+
+def test_parallel_scoring_passes_engine_to_shards(monkeypatch):
+    """--workers keeps the requested engine and batch size, and an unknown engine is rejected."""
+    from src.core import scoring, scoring_parallel
+
+    session = get_db_session()
+    try:
+        with pytest.raises(ValueError):
+            calculate_all_scores(session, use_ml=False, engine='sqll')
+
+        requested = []
+        monkeypatch.setattr(scoring_parallel, 'calculate_all_scores_parallel',
+                            lambda student_ids, workers, **kwargs: requested.append(kwargs) or 0)
+        calculate_all_scores(session, use_ml=False, workers=2, engine='sql', batch_size=50)
+        assert (requested[0]['engine'], requested[0]['batch_size']) == ('sql', 50)
+
+        # In the worker, the shard is scored by that engine
+        used = []
+        monkeypatch.setattr(scoring, '_calculate_all_scores_sql',
+                            lambda session, student_ids, run_scope: used.append(student_ids) or 0)
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(10)]
+        scoring_parallel.score_shard(1, student_ids, False, 1000, False, batch_size=50, engine='sql')
+        assert used == [student_ids]
+    finally:
+        session.close()
+
+def test_streamed_scores_match_matrix_engine():
+    """iter_readiness_scores yields bounded batches that together equal the in-memory engine."""
+    from src.core.scoring_matrix import iter_readiness_scores
+
+    session = get_db_session()
+    try:
+        n_roles = session.query(JobRole).count()
+        batches = list(iter_readiness_scores(session, batch_size=64))
+        assert all(len(batch['student_id']) <= 64 * n_roles for batch in batches)
+        assert len(batches) == -(-session.query(Student).count() // 64)
+
+        expected = calculate_scores_matrix(session)
+        for key in expected:
+            assert np.concatenate([batch[key] for batch in batches]).tolist() == expected[key].tolist()
+    finally:
+        session.close()
+
+def test_sparse_engine_matches_rule_based():
+    """CSR scoring produces the same rows as calculate_readiness_score."""
+    from src.core.scoring_sparse import iter_readiness_scores_sparse
+
+    session = get_db_session()
+    try:
+        batches = list(iter_readiness_scores_sparse(session, batch_size=128))
+        scores = {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+        assert len(scores['student_id']) == session.query(Student).count() * session.query(JobRole).count()
+
+        for i in range(len(scores['student_id'])):
+            expected = calculate_readiness_score(
+                int(scores['student_id'][i]), int(scores['role_id'][i]), session, use_ml=False
+            )
+            assert float(scores['readiness_score'][i]) == expected['readiness_score']
+            assert scores['readiness_level'][i] == expected['readiness_level']
+            assert int(scores['matched_skills_count'][i]) == expected['matched_skills_count']
+            assert int(scores['required_skills_count'][i]) == expected['required_skills_count']
+            assert int(scores['skill_gap_count'][i]) == expected['skill_gap_count']
+    finally:
+        session.close()
+
+def test_sparse_scores_match_dense_on_large_catalog():
+    """On a synthetic catalog with many roles and little overlap, CSR and dense scoring agree."""
+    from scipy import sparse
+    from src.core.scoring_sparse import score_sparse
+
+    rng = np.random.default_rng(0)
+    n_students, n_skills, n_roles = 800, 300, 200
+    has_skill = rng.random((n_students, n_skills)) < 0.02
+    proficiency = np.where(has_skill, rng.choice([0, 25, 33, 50, 75, 87, 100], size=has_skill.shape), 0)
+    required = rng.random((n_roles, n_skills)) < 0.03
+    required[-1] = False  # a role without requirements
+    required_proficiency = np.where(required, rng.choice([25, 50, 75, 100], size=required.shape), 0)
+    importance_weight = np.where(required, rng.integers(1, 101, size=required.shape), 0)
+
+    student_matrix = {
+        'student_ids': np.arange(n_students), 'skill_ids': np.arange(n_skills),
+        'proficiency': proficiency, 'has_skill': has_skill
+    }
+    role_matrix = {
+        'role_ids': np.arange(n_roles), 'skill_ids': np.arange(n_skills), 'required': required,
+        'required_proficiency': required_proficiency, 'importance_weight': importance_weight
+    }
+    to_csr = lambda matrix: sparse.csr_matrix(matrix.astype(np.int64))
+    student_csr = {**student_matrix, 'proficiency': to_csr(proficiency), 'has_skill': to_csr(has_skill)}
+    role_csr = {
+        **role_matrix, 'required': to_csr(required),
+        'required_proficiency': to_csr(required_proficiency), 'importance_weight': to_csr(importance_weight)
+    }
+
+    dense = score_matrices(student_matrix, role_matrix, exact=True)
+    result = score_sparse(student_csr, role_csr)
+    assert (dense['matched_skills_count'] == 0).mean() > 0.5
+    for key in dense:
+        assert result[key].tolist() == dense[key].tolist()
+
+def test_sql_engine_matches_python_scorer():
+    """engine='sql' writes the same rows as calculate_readiness_score for every pair."""
+    session = get_db_session()
+    try:
+        # Start from wrong values so every row has to be rewritten
+        session.query(MarketReadinessScores).update(
+            {'readiness_score': 0, 'readiness_level': 'Entry-Level', 'matched_skills_count': 0},
+            synchronize_session=False
+        )
+        session.commit()
+
+        written = calculate_all_scores(session, use_ml=False, engine='sql')
+        n_pairs = session.query(Student).count() * session.query(JobRole).count()
+        assert written == n_pairs
+        assert session.query(MarketReadinessScores).count() == n_pairs
+
+        for row in session.query(MarketReadinessScores):
+            expected = calculate_readiness_score(row.student_id, row.role_id, session, use_ml=False)
+            assert float(row.readiness_score) == expected['readiness_score']
+            assert row.readiness_level == expected['readiness_level']
+            assert row.matched_skills_count == expected['matched_skills_count']
+            assert row.required_skills_count == expected['required_skills_count']
+            assert row.skill_gap_count == expected['skill_gap_count']
+    finally:
+        session.close()
+
+def test_sql_rounding_matches_python_round():
+    """The SQL rounding expression agrees with round() on random quotients and exact .xx5 ties."""
+    import random
+    from sqlalchemy import text
+    from src.core.scoring_sql import round_score_sql
+
+    random.seed(7)
+    # (3a) / 600 = a / 200 is an exact tie for odd a; 25 | a makes it a binary fraction
+    cases = [(3 * a, 600) for a in range(1, 20000, 2)]
+    cases += [(n, d) for d in random.sample(range(1, 300000), 2000) for n in [random.randint(0, 100 * d)]]
+    cases += [(0, 0), (5, 0)]
+
+    expression = round_score_sql('c.n', 'c.d')
+    session = get_db_session()
+    try:
+        rows = session.execute(
+            text(f"SELECT c.n, c.d, {expression} FROM unnest(CAST(:n AS numeric[]), CAST(:d AS numeric[])) AS c(n, d)"),
+            {'n': [n for n, _ in cases], 'd': [d for _, d in cases]}
+        ).all()
+        assert len(rows) == len(cases)
+        for n, d, rounded in rows:
+            assert float(rounded) == (round(int(n) / int(d), 2) if d else 0), (n, d)
+    finally:
+        session.close()
+
+def test_interrupted_run_resumes_from_checkpoint(monkeypatch):
+    """A run that fails mid-way keeps its committed batches and --resume finishes the rest."""
+    import src.core.scoring as scoring
+
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id)]
+        n_roles = session.query(JobRole).count()
+        real_upsert = scoring.upsert_scores
+        calls = []
+
+        def crash_on_third_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError("simulated crash")
+            return real_upsert(*args, **kwargs)
+
+        monkeypatch.setattr(scoring, 'upsert_scores', crash_on_third_batch)
+        with pytest.raises(RuntimeError):
+            calculate_all_scores(session, use_ml=False, batch_size=100)
+
+        run = session.query(ScoringRun).order_by(ScoringRun.run_id.desc()).first()
+        assert (run.mode, run.scope, run.status) == ('rule-based', 'all', 'failed')
+        assert run.last_student_id == student_ids[199]
+        assert run.scores_written == 200 * n_roles
+
+        monkeypatch.setattr(scoring, 'upsert_scores', real_upsert)
+        written = calculate_all_scores(session, use_ml=False, batch_size=100, resume=True)
+        assert written == (len(student_ids) - 200) * n_roles
+
+        session.refresh(run)
+        assert run.status == 'completed'
+        assert run.students_processed == len(student_ids)
+        assert run.scores_written == len(student_ids) * n_roles
+        assert session.query(ScoringRun).order_by(ScoringRun.run_id.desc()).first().run_id == run.run_id
+    finally:
+        session.close()
+
+def test_scoring_job_workers_cover_all_ranges():
+    """Several worker processes drain a batch through SKIP LOCKED claims, each range scored once."""
+    import subprocess
+    from src.core.scoring_jobs import enqueue_scoring_jobs, batch_status
+
+    session = get_db_session()
+    try:
+        n_students = session.query(Student).count()
+        batch = enqueue_scoring_jobs(session, range_size=50)
+        try:
+            assert batch['students'] == n_students
+            worker_script = str(project_root / 'src' / 'core' / 'scoring_jobs.py')
+            workers = [
+                subprocess.Popen(
+                    [sys.executable, worker_script, 'work', '--batch', batch['batch_id'],
+                     '--worker-id', f'test-worker-{i}', '--rule-based'],
+                    stdout=subprocess.DEVNULL
+                )
+                for i in range(3)
+            ]
+            assert all(worker.wait(timeout=300) == 0 for worker in workers)
+
+            assert batch_status(session, batch['batch_id']) == {'done': batch['jobs']}
+            jobs = session.query(ScoringJob).filter_by(batch_id=batch['batch_id']).all()
+            assert all(job.attempts == 1 for job in jobs)
+            n_roles = session.query(JobRole).count()
+            assert sum(job.scores_written for job in jobs) == n_students * n_roles
+        finally:
+            session.query(ScoringJob).filter_by(batch_id=batch['batch_id']).delete()
+            session.commit()
+    finally:
+        session.close()
+
+def test_scoring_job_lease_expiry_allows_reclaim():
+    """A job held by a crashed worker is re-claimed once its lease expires."""
+    from src.core.scoring_jobs import enqueue_scoring_jobs, claim_job, run_worker
+
+    session = get_db_session()
+    other = get_db_session()
+    try:
+        batch = enqueue_scoring_jobs(session, range_size=session.query(Student).count())
+        try:
+            crashed = claim_job(session, batch['batch_id'], 'crashed-worker', lease_seconds=3600)
+            assert crashed is not None
+            assert claim_job(other, batch['batch_id'], 'other-worker') is None
+
+            # Expire the lease, as if the crashed worker's time had run out
+            session.query(ScoringJob).filter_by(job_id=crashed.job_id).update(
+                {'lease_expires_at': func.now() - timedelta(seconds=1)}, synchronize_session=False
+            )
+            session.commit()
+
+            stats = run_worker(other, batch_id=batch['batch_id'], worker_id='other-worker', use_ml=False)
+            assert stats['jobs'] == 1
+
+            session.expire_all()
+            job = session.query(ScoringJob).filter_by(job_id=crashed.job_id).one()
+            assert (job.status, job.worker_id, job.attempts) == ('done', 'other-worker', 2)
+        finally:
+            session.query(ScoringJob).filter_by(batch_id=batch['batch_id']).delete()
+            session.commit()
+    finally:
+        other.close()
+        session.close()
+
+def test_scoring_job_lease_renewed_per_batch():
+    """Renewing keeps a slow range claimed; once re-claimed, the old worker stops and cannot finish it."""
+    from src.core.scoring_jobs import enqueue_scoring_jobs, claim_job, renew_lease, score_job, _finish_job
+
+    session = get_db_session()
+    other = get_db_session()
+    try:
+        batch = enqueue_scoring_jobs(session, range_size=session.query(Student).count())
+        try:
+            job = claim_job(session, batch['batch_id'], 'slow-worker', lease_seconds=60)
+            job_id = job.job_id
+
+            def expire_lease():
+                session.query(ScoringJob).filter_by(job_id=job_id).update(
+                    {'lease_expires_at': func.now() - timedelta(seconds=1)}, synchronize_session=False
+                )
+                session.commit()
+
+            # A renewal after a batch pushes the lease out again
+            expire_lease()
+            assert renew_lease(session, job_id, 'slow-worker', 1, lease_seconds=60)
+            assert claim_job(other, batch['batch_id'], 'other-worker') is None
+
+            # Lease ran out and another worker took the range over
+            expire_lease()
+            assert claim_job(other, batch['batch_id'], 'other-worker') is not None
+            assert not renew_lease(session, job_id, 'slow-worker', 1)
+
+            n_roles = session.query(JobRole).count()
+            scores = score_job(session, job, use_ml=False, batch_size=100, worker_id='slow-worker', attempt=1)
+            assert scores == 100 * n_roles
+            assert not _finish_job(session, job_id, 'slow-worker', 1, {'status': 'done'})
+            assert _finish_job(other, job_id, 'other-worker', 2, {'status': 'done'})
+        finally:
+            session.query(ScoringJob).filter_by(batch_id=batch['batch_id']).delete()
+            session.commit()
+    finally:
+        other.close()
+        session.close()
+
+def test_scoring_workers_use_sparse_engine(monkeypatch):
+    """Job ranges and parallel shards are scored by the sparse engine when it is requested."""
+    from src.core import scoring_sparse, scoring_parallel
+    from src.core.scoring_jobs import enqueue_scoring_jobs, run_worker
+
+    calls = []
+    original = scoring_sparse.iter_readiness_scores_sparse
+    monkeypatch.setattr(scoring_sparse, 'iter_readiness_scores_sparse',
+                        lambda *args, **kwargs: calls.append(kwargs['student_ids']) or original(*args, **kwargs))
+
+    session = get_db_session()
+    try:
+        n_students = session.query(Student).count()
+        batch = enqueue_scoring_jobs(session, range_size=n_students)
+        try:
+            stats = run_worker(session, batch_id=batch['batch_id'], worker_id='sparse-worker', use_ml=False,
+                               batch_size=n_students, engine='sparse')
+            assert stats['jobs'] == 1 and len(calls) == 1 and len(calls[0]) == n_students
+        finally:
+            session.query(ScoringJob).filter_by(batch_id=batch['batch_id']).delete()
+            session.commit()
+
+        scoring_parallel.score_shard(1, calls[0][:10], False, 1000, False, engine='sparse')
+        assert calls[-1] == calls[0][:10]
+    finally:
+        session.close()
+
+def test_recommendations_match_brute_force_rescoring():
+    """Each stored recommendation's projected score equals rescoring the upgraded portfolio."""
+    from src.core.recommendations import calculate_recommendations
+
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(60)]
+        calculate_recommendations(session, top_k=3, student_ids=student_ids, batch_size=25)
+
+        recommendations = session.query(SkillRecommendation).filter(
+            SkillRecommendation.student_id.in_(student_ids)
+        ).order_by(SkillRecommendation.student_id, SkillRecommendation.rank).all()
+        assert recommendations
+
+        by_student = {}
+        for rec in recommendations:
+            by_student.setdefault(rec.student_id, []).append(rec)
+
+        for student_id, recs in by_student.items():
+            assert [rec.rank for rec in recs] == list(range(1, len(recs) + 1))
+            assert len(recs) <= 3
+            assert len({rec.role_id for rec in recs}) == 1
+            gains = [float(rec.score_gain) for rec in recs]
+            assert gains == sorted(gains, reverse=True) and gains[-1] > 0
+
+            requirements = get_role_requirements(session, recs[0].role_id)
+            portfolio = dict(session.query(StudentSkills.skill_id, StudentSkills.proficiency_score).filter_by(
+                student_id=student_id
+            ))
+            current = calculate_readiness_score(student_id, recs[0].role_id, session, use_ml=False, exact=True)
+            for rec in recs:
+                assert float(rec.current_score) == current['readiness_score']
+                assert rec.action == ('upgrade' if rec.skill_id in portfolio else 'acquire')
+
+                i = requirements['skill_ids'].index(rec.skill_id)
+                upgraded = {**portfolio, rec.skill_id: requirements['required_proficiency'][i]}
+                projected = score_portfolio(requirements, upgraded.items(), exact=True)
+                assert float(rec.projected_score) == projected['readiness_score']
+    finally:
+        session.close()
+
+def test_scoring_refreshes_recommendations_only_on_request(monkeypatch):
+    """refresh_recommendations recomputes only the scored students' recommendations; its failure does not raise."""
+    from datetime import date
+    from src.core import recommendations
+    from src.core.recommendations import calculate_recommendations
+
+    session = get_db_session()
+    try:
+        calculate_all_scores(session, use_ml=False)
+        calculate_recommendations(session)
+        before = dict(session.query(SkillRecommendation.id, SkillRecommendation.student_id))
+
+        def stored():
+            session.expire_all()
+            return dict(session.query(SkillRecommendation.id, SkillRecommendation.student_id))
+
+        # Expert in the student's top recommended skill: that recommendation must go
+        top = session.query(SkillRecommendation).filter_by(rank=1, action='acquire').first()
+        student_id, skill_id = top.student_id, top.skill_id
+        new_skill = StudentSkills(
+            student_id=student_id,
+            skill_id=skill_id,
+            proficiency_level='Expert',
+            proficiency_score=1.0,
+            acquisition_date=date.today(),
+            source='Course'
+        )
+        session.add(new_skill)
+        session.commit()
+        try:
+            n_roles = session.query(JobRole).count()
+            assert calculate_all_scores(session, use_ml=False, incremental=True) == n_roles
+            assert stored() == before
+
+            def fail(*args, **kwargs):
+                raise RuntimeError("recommendations unavailable")
+            monkeypatch.setattr(recommendations, 'calculate_recommendations', fail)
+            assert calculate_all_scores(session, use_ml=False, student_ids=[student_id],
+                                        refresh_recommendations=True) == n_roles
+            assert stored() == before
+            monkeypatch.undo()
+
+            calculate_all_scores(session, use_ml=False, student_ids=[student_id], refresh_recommendations=True)
+            after = stored()
+            assert {i: s for i, s in before.items() if s != student_id} == \
+                   {i: s for i, s in after.items() if s != student_id}
+            assert not any(s == student_id for i, s in after.items() if i in before)
+            assert session.query(SkillRecommendation).filter_by(student_id=student_id, skill_id=skill_id).count() == 0
+        finally:
+            session.delete(new_skill)
+            session.commit()
+            calculate_all_scores(session, use_ml=False, refresh_recommendations=True)
+    finally:
+        session.close()
+
+def test_requirement_simulation_matches_rescoring_edited_role():
+    """What-if edits reproduce rule-based scoring under the edited requirements, without queries."""
+    from decimal import Decimal
+    from src.core.simulation import simulate_requirement_changes, invalidate_simulation_cache
+    from src.core.scoring import PROFICIENCY_MAP
+
+    session = get_db_session()
+    try:
+        invalidate_simulation_cache()
+        role_id = session.query(JobRoleSkills.role_id).order_by(JobRoleSkills.role_id).first()[0]
+        requirements = get_role_requirements(session, role_id)
+        edits = [
+            {'role_id': role_id, 'skill_id': requirements['skill_ids'][0], 'importance_weight': 0.3},
+            {'role_id': role_id, 'skill_id': requirements['skill_ids'][1], 'required_proficiency': 'Expert'}
+        ]
+
+        unchanged = simulate_requirement_changes(session, [])
+        assert unchanged['cohort']['baseline'] == unchanged['cohort']['simulated']
+
+        # The baseline is what default (float64) rule-based scoring stores
+        stored = calculate_scores_matrix(session)
+        for level in ('Ready', 'Developing', 'Entry-Level'):
+            assert unchanged['cohort']['baseline'][level] == int((stored.readiness_level == level).sum())
+        assert unchanged['cohort']['baseline']['avg_score'] == pytest.approx(
+            float(stored.readiness_score.mean()), abs=0.005
+        )
+
+        with QueryCounter() as counter:
+            result = simulate_requirement_changes(session, edits)
+        assert counter.count == 0
+
+        weights = list(requirements['importance_weight'])
+        levels = list(requirements['required_proficiency'])
+        weights[0] = Decimal('0.30')
+        levels[1] = PROFICIENCY_MAP['Expert']
+        edited = dict(requirements, importance_weight=tuple(weights), required_proficiency=tuple(levels),
+                      total_weight=sum(weights, Decimal('0')),
+                      importance_weight_array=np.array(weights, dtype=np.float64),
+                      required_proficiency_array=np.array(levels, dtype=np.float64))
+
+        portfolios = {}
+        for student_id, skill_id, proficiency in session.query(
+            StudentSkills.student_id, StudentSkills.skill_id, StudentSkills.proficiency_score
+        ):
+            portfolios.setdefault(student_id, []).append((skill_id, proficiency))
+        expected = [
+            score_portfolio(edited, portfolios.get(student_id, []))
+            for (student_id,) in session.query(Student.student_id)
+        ]
+
+        role = next(r for r in result['roles'] if r['role_id'] == role_id)
+        for level in ('Ready', 'Developing', 'Entry-Level'):
+            assert role['simulated'][level] == sum(e['readiness_level'] == level for e in expected)
+        assert role['simulated']['avg_score'] == pytest.approx(
+            sum(e['readiness_score'] for e in expected) / len(expected), abs=0.005
+        )
+        for other in result['roles']:
+            if other['role_id'] != role_id:
+                assert other['baseline'] == other['simulated']
+
+        with pytest.raises(ValueError):
+            simulate_requirement_changes(session, [{'role_id': role_id, 'skill_id': requirements['skill_ids'][0],
+                                                    'importance_weight': 1.5}])
+    finally:
+        session.close()
+
+def test_simulation_cache_invalidated_on_skill_changes():
+    """ORM edits to student_skills or job_role_skills drop the cached what-if matrices."""
+    from decimal import Decimal
+    from sqlalchemy import update
+    from src.core.simulation import get_simulation_base
+
+    session = get_db_session()
+    try:
+        base = get_simulation_base(session)
+        assert get_simulation_base(session) is base
+
+        skill = session.query(StudentSkills).order_by(StudentSkills.id).first()
+        original_score = skill.proficiency_score
+        skill.proficiency_score = Decimal('0.50') if original_score != Decimal('0.50') else Decimal('0.60')
+        session.commit()
+        try:
+            reloaded = get_simulation_base(session)
+            assert reloaded is not base
+        finally:
+            skill.proficiency_score = original_score
+            session.commit()
+        base = get_simulation_base(session)
+        assert base is not reloaded
+
+        requirement = session.query(JobRoleSkills).order_by(JobRoleSkills.id).first()
+        original_weight = requirement.importance_weight
+        new_weight = Decimal('0.10') if original_weight != Decimal('0.10') else Decimal('0.20')
+        session.execute(update(JobRoleSkills).where(JobRoleSkills.id == requirement.id)
+                        .values(importance_weight=new_weight))
+        session.commit()
+        try:
+            assert get_simulation_base(session) is not base
+        finally:
+            session.execute(update(JobRoleSkills).where(JobRoleSkills.id == requirement.id)
+                            .values(importance_weight=original_weight))
+            session.commit()
+    finally:
+        session.close()
+
+def test_score_batch_missing_skills_match_rule_based():
+    """ScoreBatch columns and its CSR of missing skills agree with calculate_readiness_score."""
+    from src.core.score_batch import ScoreBatch
+
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(40)]
+        scores = calculate_scores_matrix(session, student_ids=student_ids, exact=True, missing_skills=True)
+        assert isinstance(scores, ScoreBatch)
+        assert scores.missing_skills.shape[0] == scores.n_pairs
+
+        for i in range(scores.n_pairs):
+            expected = calculate_readiness_score(
+                int(scores.student_id[i]), int(scores.role_id[i]), session, use_ml=False, exact=True
+            )
+            assert scores.readiness_level[i] == expected['readiness_level']
+            assert sorted(scores.missing_skill_ids(i).tolist()) == sorted(
+                skill['skill_id'] for skill in expected['missing_skills']
+            )
+            assert len(scores.missing_skill_ids(i)) == scores.skill_gap_count[i]
+
+        halves = ScoreBatch.concatenate([
+            calculate_scores_matrix(session, student_ids=student_ids[:20], exact=True, missing_skills=True),
+            calculate_scores_matrix(session, student_ids=student_ids[20:], exact=True, missing_skills=True)
+        ])
+        assert (halves.missing_skills != scores.missing_skills).nnz == 0
+        assert halves.to_dataframe().equals(scores.to_dataframe())
+    finally:
+        session.close()
+
+def test_ml_scoring_counts_come_from_features_without_per_row_queries():
+    """ML scoring stores the rule-based skill counts and issues no per-pair queries."""
+    from src.core.scoring_ml import calculate_all_scores_ml
+    from src.ml_models.predict import load_models
+
+    classifier, _, regressor, _ = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+
+    session = get_db_session()
+    try:
+        student_ids = [s for (s,) in session.query(Student.student_id).order_by(Student.student_id).limit(40)]
+
+        query_counts = []
+        for subset in (student_ids[:10], student_ids):
+            with QueryCounter() as counter:
+                calculate_all_scores_ml(session, student_ids=subset, batch_size=len(student_ids))
+            query_counts.append(counter.count)
+        assert query_counts[0] == query_counts[1]
+
+        expected = calculate_scores_matrix(session, student_ids=student_ids)
+        stored = {
+            (row.student_id, row.role_id): row
+            for row in session.query(MarketReadinessScores).filter(MarketReadinessScores.student_id.in_(student_ids))
+        }
+        for i in range(expected.n_pairs):
+            row = stored[(int(expected.student_id[i]), int(expected.role_id[i]))]
+            assert row.matched_skills_count == expected.matched_skills_count[i]
+            assert row.required_skills_count == expected.required_skills_count[i]
+            assert row.skill_gap_count == expected.skill_gap_count[i]
+    finally:
+        session.close()
+
+def test_incremental_ml_run_scores_new_students():
+    """A student without score rows is predicted by an incremental ML run, not left dirty."""
+    from src.ml_models.predict import load_models, predict_batch_ml
+
+    classifier, _, regressor, _ = load_models()
+    if classifier is None or regressor is None:
+        pytest.skip("Models not trained. Run train_models.py first.")
+
+    session = get_db_session()
+    try:
+        calculate_all_scores(session, use_ml=False)
+        assert find_dirty_students(session) == []
+
+        student = Student(name='Incremental Test', email='incremental.test@example.com',
+                          program='Btech', year_of_study=2, enrollment_year=2024)
+        session.add(student)
+        session.commit()
+        try:
+            assert find_dirty_students(session) == [student.student_id]
+            assert calculate_all_scores(session, incremental=True) == session.query(JobRole).count()
+            assert find_dirty_students(session) == []
+
+            expected = predict_batch_ml(session, student_ids=[student.student_id])
+            stored = {
+                row.role_id: float(row.readiness_score)
+                for row in session.query(MarketReadinessScores).filter_by(student_id=student.student_id)
+            }
+            assert stored == dict(zip(expected['role_id'].tolist(), expected['readiness_score_ml'].tolist()))
+        finally:
+            session.query(MarketReadinessScores).filter_by(student_id=student.student_id).delete()
+            session.delete(student)
+            session.commit()
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])